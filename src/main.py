@@ -60,6 +60,9 @@ from my.exceptions import BlankFileCreationError, DestinationPaddingWriteError,
             DestinationDeviceTooSmallError, MBRCopyError,\
     FilesystemFormattingError
 from my.disktools.disks import Disk
+from my.disktools.kernel import update_kernel_partitions
+from my.disktools.alignment import ALIGN_AUTO
+from my.disktools.layout import PartitionSpec, REST
 
 
 
@@ -958,12 +961,9 @@ umount {mtpt}/dev {mtpt}/proc {mtpt}/sys {mtpt}/tmp {mtpt}/run 2> /dev/null
 
 
 def sync_and_partprobe(dev):
-    os.system("""
-sleep 1;sync;sync;sync;sleep 1
-echo "Running partprobe {dev}"
-partprobe {dev}
-sleep 1;sync;sync;sync;sleep 1
-""".format(dev=dev))
+    os.sync()
+    update_kernel_partitions(dev)
+    os.sync()
 
 
 
@@ -1122,12 +1122,12 @@ Please wait. This might take up to an hour.
 
 def repartition_and_losetup_our_working_copy(source, destination, fstype, bootdev, rootdev, old_dev, poolname):
     """
-    Delete the working copy's old partitions. Install two partitions:
-    one that began on the same sector on the new image as it did on
-    the source image, and one that occupies the rest of the working
-    copy. The first partition (on the working copy) will be 512MB long,
-    whereas the first and only partition on the source image will
-    take up 1GB or more.
+    Make sure that the working copy has two partitions: one that
+    begins on the same sector on the new image as it did on the source
+    image, and one that occupies the rest of the working copy. The first
+    partition (on the working copy) will be 512MB long, whereas the first
+    and only partition on the source image will take up 1GB or more. If
+    the working copy is already laid out like that, it isn't repartitioned.
     """
     if fstype == 'zfs':
         _retcode, _stdout_txt, _stderr_txt = call_binary(['zpool', 'destroy', poolname])
@@ -1140,9 +1140,9 @@ def repartition_and_losetup_our_working_copy(source, destination, fstype, bootde
     if srcd.partitions[0].partno != 1:
         raise ValueError("Why is the first partition not partition #1? Look into this, please.")
     disk = Disk(destination)
-    disk.delete_all_partitions()
-    disk.add_partition(partno=1, start=srcd.partitions[0].start, size_in_MiB=512)
-    disk.add_partition(partno=2)
+    disk.apply_layout([PartitionSpec(partno=1, start=srcd.partitions[0].start,
+                                     size=512 * 1024 * 1024 // disk.sector_size),
+                       PartitionSpec(partno=2, size=REST, align=ALIGN_AUTO)])
     res = os.system('''
     losetup {bootdev} -o {start1} --sizelimit {size1} "{output_image_fname}"
     losetup {rootdev} -o {start2} --sizelimit {size2} "{output_image_fname}"
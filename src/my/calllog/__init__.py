@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""my.calllog
+
+Keep track of the binaries that call_binary() runs, and what they cost.
+
+Created on Oct 17, 2026
+@author: Tom Blackshaw
+
+call_binary() used to open /tmp/call_binary.txt, append the command line and
+the return code, and close it again, every time it ran anything. The file
+grew forever, and every fork cost an extra open() and close().
+
+Now call_binary() hands me a CallRecord -- the command line, when it began,
+how long it took, the user and system CPU time and maximum resident set
+size that os.wait4() reported, and how much it wrote to stdout and stderr.
+I keep the most recent records in memory, for call_log_summary(), and queue
+them for the log file. A background thread appends the queue to the file,
+one JSON object per line, every few seconds, or sooner if the queue grows
+long; and again at exit. When the file grows too big, I move it aside to
+<name>.1 and start a new one, so that the two of them stay a few MiB.
+
+Example:
+    $ call_log_summary()['sfdisk']
+    CallSummary(count=42, failures=0, total_wall_time=1.93, p50=0.031,
+                p90=0.122, p99=0.410, max_wall_time=0.47, ...)
+
+Todo:
+    * Add more TODOs
+
+.. _Google Python Style Guide:
+   http://google.github.io/styleguide/pyguide.html
+
+"""
+
+import atexit
+from collections import deque, namedtuple
+import json
+import math
+import os
+import threading
+
+CallRecord = namedtuple(
+    "CallRecord",
+    "binary argv returncode started wall_time user_time system_time max_rss stdout_bytes stderr_bytes",
+)
+CallSummary = namedtuple(
+    "CallSummary",
+    "count failures total_wall_time p50 p90 p99 max_wall_time user_time system_time max_rss",
+)
+
+_CALL_LOG_PATH = "/tmp/call_binary.jsonl"
+_CALL_LOG_MAX_BYTES = 4 * 1024 * 1024
+_CALL_LOG_FLUSH_INTERVAL = 5.0
+_CALL_LOG_FLUSH_THRESHOLD = 256  # Pending records that wake the flusher early
+_CALL_LOG_MAX_PENDING = 8192  # If the file can't keep up, drop the oldest
+_CALL_LOG_HISTORY = 4096  # Records that call_log_summary() considers
+
+_history = deque(maxlen=_CALL_LOG_HISTORY)
+_pending = deque(maxlen=_CALL_LOG_MAX_PENDING)
+_call_log_lock = threading.Lock()
+_call_log_file_lock = threading.Lock()
+_flush_wanted = threading.Event()
+_flusher = None
+
+
+def _flush_periodically():
+    while True:
+        _flush_wanted.wait(_CALL_LOG_FLUSH_INTERVAL)
+        _flush_wanted.clear()
+        flush_call_log()
+
+
+def record_call(call_rec):
+    """Remember a call to a binary, and queue it for the log file.
+
+    I don't touch the file: the background flusher does that.
+
+    Args:
+        call_rec (CallRecord): What call_binary() ran, and what it cost.
+
+    Returns:
+        None.
+
+    """
+    global _flusher  # pylint: disable=global-statement
+    with _call_log_lock:
+        _history.append(call_rec)
+        _pending.append(call_rec)
+        backlog = len(_pending)
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_periodically, name="call log flusher", daemon=True)
+            _flusher.start()
+    if backlog >= _CALL_LOG_FLUSH_THRESHOLD:
+        _flush_wanted.set()
+
+
+def flush_call_log():
+    """Append the queued records to the log file now.
+
+    If the file is too big, I move it aside to <name>.1 first. If I can't
+    write to it, I drop the records: the log should never break a disk
+    operation.
+
+    Returns:
+        int: How many records I wrote.
+
+    """
+    with _call_log_file_lock:
+        with _call_log_lock:
+            records = list(_pending)
+            _pending.clear()
+        if not records:
+            return 0
+        path = _CALL_LOG_PATH
+        try:
+            if os.path.getsize(path) >= _CALL_LOG_MAX_BYTES:
+                os.replace(path, path + ".1")
+        except FileNotFoundError:
+            pass
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(call_rec._asdict()) + "\n" for call_rec in records))
+        except OSError:
+            return 0
+        return len(records)
+
+
+def recent_calls(binary=None):
+    """Return the most recent CallRecords (up to _CALL_LOG_HISTORY of them), oldest first.
+
+    Args:
+        binary (:obj:`str`, optional): Only return calls of this binary,
+            e.g. 'sfdisk'.
+
+    Returns:
+        list of CallRecord.
+
+    """
+    with _call_log_lock:
+        records = list(_history)
+    return [r for r in records if binary is None or r.binary == binary]
+
+
+def _percentile(sorted_values, fraction):
+    """The nearest-rank percentile of a sorted, nonempty list."""
+    return sorted_values[max(0, math.ceil(len(sorted_values) * fraction) - 1)]
+
+
+def call_log_summary():
+    """Summarize the recent calls, binary by binary.
+
+    Example:
+        $ s = call_log_summary()
+        $ sorted(s, key=lambda b: s[b].total_wall_time)[-1]
+        'sfdisk'
+
+    Returns:
+        dict: {binary: CallSummary(count, failures, total_wall_time, p50,
+            p90, p99, max_wall_time, user_time, system_time, max_rss)}.
+            The times are in seconds, and the percentiles are of the wall
+            time. max_rss is in KiB. Calls made by async_call_binary()
+            count towards everything but the CPU time and max_rss, which
+            asyncio doesn't let me measure.
+
+    """
+    by_binary = {}
+    for call_rec in recent_calls():
+        by_binary.setdefault(call_rec.binary, []).append(call_rec)
+    summary = {}
+    for binary, records in by_binary.items():
+        wall_times = sorted(r.wall_time for r in records)
+        summary[binary] = CallSummary(
+            count=len(records),
+            failures=sum(1 for r in records if r.returncode != 0),
+            total_wall_time=sum(wall_times),
+            p50=_percentile(wall_times, 0.50),
+            p90=_percentile(wall_times, 0.90),
+            p99=_percentile(wall_times, 0.99),
+            max_wall_time=wall_times[-1],
+            user_time=sum(r.user_time for r in records if r.user_time is not None),
+            system_time=sum(r.system_time for r in records if r.system_time is not None),
+            max_rss=max((r.max_rss for r in records if r.max_rss is not None), default=None),
+        )
+    return summary
+
+
+def clear_call_log():
+    """Forget the recent calls (but not the ones in the file). Handy between provisioning runs."""
+    with _call_log_lock:
+        _history.clear()
+
+
+atexit.register(flush_call_log)
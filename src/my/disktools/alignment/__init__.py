@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""my.disktools.alignment
+
+Choose partition boundaries that suit the disk's erase blocks.
+
+Created on Oct 17, 2026
+@author: Tom Blackshaw
+
+An SD card or eMMC chip erases flash in big blocks -- 4 MiB, 8 MiB, even
+12 MiB on some cards -- and a partition that starts halfway through one
+makes the card do twice the work on every write that straddles the
+boundary, for the rest of the card's life. fdisk's 1 MiB alignment is fine
+for a hard disk, but not always for a card.
+
+I read the boundaries that the kernel reports for the disk -- its physical
+block size, optimal I/O size, discard granularity and, for SD cards and
+eMMC, its preferred erase size (see sysfs_queue_limits()) -- and choose an
+alignment that is a multiple of all of them, and of 1 MiB. Partitions
+should start on such a boundary; and, so that the next partition can start
+on one too without leaving a gap, their sizes should be multiples of it.
+
+Pass align=ALIGN_AUTO to Disk.add_partition(), DiskTransaction.add_partition()
+or a PartitionSpec to use it.
+
+Example:
+    $ disk_alignment('/dev/mmcblk0', 512)
+    8192
+
+Todo:
+    * Add more TODOs
+
+.. _Google Python Style Guide:
+   http://google.github.io/styleguide/pyguide.html
+
+"""
+
+import math
+import os
+
+from my.disktools.sysfs import sysfs_queue_limits
+
+ALIGN_AUTO = "auto"
+
+_MiB = 1024 * 1024
+_MAX_ALIGNMENT = 64 * _MiB  # If the boundaries are that awkward, settle for the biggest one.
+
+
+def alignment_from_limits(limits):
+    """Choose an alignment, in bytes, from a disk's QueueLimits.
+
+    Args:
+        limits (QueueLimits or None): See sysfs_queue_limits().
+
+    Returns:
+        int: The least common multiple of 1 MiB and every nonzero boundary in
+            `limits`. If that's unreasonably large, the largest boundary,
+            rounded up to a whole number of MiB.
+
+    """
+    boundaries = [_MiB] + [b for b in (limits or ()) if b and b > 0]
+    alignment = math.lcm(*boundaries)
+    if alignment > _MAX_ALIGNMENT:
+        alignment = -(-max(boundaries) // _MiB) * _MiB
+    return alignment
+
+
+def disk_alignment(disk_path, sector_size):
+    """Choose an alignment, in sectors, for the partitions of the specified disk.
+
+    Args:
+        disk_path (:obj:`str`): The /dev entry of the disk, or an image file.
+            An image file gets 1 MiB, as it has no erase blocks of its own.
+        sector_size (int): The disk's logical sector size, in bytes.
+
+    Returns:
+        int: The alignment, in sectors.
+
+    """
+    limits = None if os.path.isfile(os.path.realpath(disk_path)) else sysfs_queue_limits(disk_path)
+    return max(1, alignment_from_limits(limits) // sector_size)
+
+
+def resolve_alignment(disk_path, sector_size, align):
+    """Turn an align=... parameter into a number of sectors.
+
+    Args:
+        disk_path (:obj:`str`): The /dev entry of the disk, or an image file.
+        sector_size (int): The disk's logical sector size, in bytes.
+        align (int, :obj:`str` or None): A number of sectors, ALIGN_AUTO, or None.
+
+    Returns:
+        int or None: The alignment in sectors, or None if `align` was None.
+
+    Raises:
+        ValueError: `align` is neither a positive integer nor ALIGN_AUTO.
+
+    """
+    if align is None:
+        return None
+    if align == ALIGN_AUTO:
+        return disk_alignment(disk_path, sector_size)
+    if type(align) is not int or align < 1:
+        raise ValueError("align should be a positive number of sectors or '%s', not %r" % (ALIGN_AUTO, align))
+    return align
+
+
+def aligned_end(start, end, alignment, limit):
+    """Move a partition's final sector so that the partition after it may start on a boundary.
+
+    I round `end` up, so that end + 1 is a multiple of `alignment`. If that
+    would take it past `limit`, I round it down instead -- unless that
+    would leave nothing, in which case I leave it alone.
+
+    Args:
+        start (int): The partition's first sector.
+        end (int): The partition's final sector, as requested.
+        alignment (int): The alignment, in sectors.
+        limit (int): The last sector that the partition may occupy.
+
+    Returns:
+        int: The new final sector.
+
+    """
+    up = -(-(end + 1) // alignment) * alignment - 1
+    if up <= limit:
+        return up
+    down = (end + 1) // alignment * alignment - 1
+    return down if down > start else end
@@ -0,0 +1,408 @@
+# -*- coding: utf-8 -*-
+"""my.disktools.asyncdisks
+
+Disk and DiskPartition, for asyncio.
+
+Created on Oct 17, 2026
+@author: Tom Blackshaw
+
+Disk and DiskPartition block: every sfdisk and partprobe that they run
+holds up the calling thread until it finishes, and so do their waits for
+udev. A provisioning service that runs on asyncio would need a thread per
+card reader to use them.
+
+AsyncDisk and AsyncDiskPartition do the same jobs with awaitable methods.
+Whatever forks -- sfdisk, when the disk is a device; partprobe, when the
+BLKPG and BLKRRPART ioctls won't do -- runs via async_call_binary(), and
+the waits sleep via async_pause_until_true(). The rest is what Disk does
+anyway: I plan changes with a DiskTransaction, read and write image files
+natively (see my.disktools.parttable), and tell the kernel with ioctls
+(see my.disktools.kernel). Those take a few sector reads and no forks, so
+one event loop can drive dozens of disks at once.
+
+AsyncDisk is safe to share between tasks in one event loop: its changes
+run one at a time. It is not threadsafe. Nor does it take the lock of the
+Disk (or threadsafeDisk()) that wraps the same disk, and its reads don't
+join the coalesced, cached reads of sfdisk_output() and disk_namedtuple()
+(see my.disktools.singleflight and my.disktools.readcache): don't change
+a disk with a Disk in one thread while an AsyncDisk reads or changes it
+in another. Its writes do clear those caches, so a Disk that reads the
+disk afterwards sees what the AsyncDisk wrote.
+
+Example:
+    $ disk = await AsyncDisk.open('/dev/sda')
+    $ await disk.add_partition(partno=1, size_in_MiB=512, align=ALIGN_AUTO)
+    $ await disk.add_partition(partno=2)
+    $ [p.node for p in disk.partitions]
+    ['/dev/sda1', '/dev/sda2']
+
+Todo:
+    * Add more TODOs
+
+.. _Google Python Style Guide:
+   http://google.github.io/styleguide/pyguide.html
+
+"""
+
+import asyncio
+import json
+import os
+import stat
+import sys
+
+from my.disktools.disks import enhance_the_sfdisk_output, is_this_a_disk
+from my.disktools.kernel import update_kernel_partitions_without_partprobe
+from my.disktools.layout import layout_from_record, layout_overlaps
+from my.disktools.partitions import DiskPartition, partition_paths
+from my.disktools.parttable import disk_record, partition_node, read_partition_table
+from my.disktools.readcache import invalidate_disk_reads
+from my.disktools.sysfs import sysfs_has_partition
+from my.disktools.transaction import DiskTransaction
+from my.exceptions import (
+    PartitionDeletionError,
+    PartitionTableCannotReadError,
+    PartitionTableWriteError,
+    PartitionWasNotCreatedError,
+)
+from my.globals import async_call_binary, async_pause_until_true
+
+
+async def async_sfdisk_output(disk_path):
+    """Do what sfdisk_output() does, without blocking the event loop.
+
+    Raises:
+        PartitionTableCannotReadError: Neither I nor sfdisk can read it.
+
+    """
+    try:
+        json_rec = read_partition_table(disk_path)
+    except OSError:
+        json_rec = None
+    if json_rec is not None:
+        return json_rec
+    retcode, stdout_txt, stderr_txt = await async_call_binary(["sfdisk", "-J", disk_path])
+    if retcode != 0:
+        raise PartitionTableCannotReadError(
+            "Unable to read {disk_path} with sfdisk\n{stderr_txt}".format(disk_path=disk_path, stderr_txt=stderr_txt)
+        )
+    return json.loads(stdout_txt)
+
+
+async def async_disk_namedtuple(disk_path):
+    """Do what disk_namedtuple() does, without blocking the event loop.
+
+    Raises:
+        ValueError: If `disk_path` is an invalid string or points to a
+            nonexistent disk.
+
+    """
+    if disk_path in (None, "/", "") or not os.path.exists(disk_path) or os.path.isdir(disk_path):
+        raise ValueError("Cannot get disk record -- %s not found" % str(disk_path))
+    json_rec = await async_sfdisk_output(disk_path)
+    # It may run sfdisk -l for the disk ID, and it reads /dev/disk/by-*.
+    await asyncio.to_thread(enhance_the_sfdisk_output, disk_path, json_rec)
+    return disk_record(json_rec)
+
+
+async def async_update_kernel_partitions(disk_path, reread=False):
+    """Do what update_kernel_partitions() does, without blocking the event loop."""
+    how = update_kernel_partitions_without_partprobe(disk_path, reread)
+    if how == "partprobe":
+        await async_call_binary(["partprobe", os.path.realpath(disk_path)])
+    return how
+
+
+def _is_block_device(path):
+    try:
+        return stat.S_ISBLK(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+
+class AsyncDiskPartition(DiskPartition):
+    """A DiskPartition that can update itself without blocking: await async_update().
+
+    AsyncDisk makes these for you. I can't probe myself when I'm created,
+    because that would block, so you must give me my record and my disk.
+    My update() is DiskPartition's, and blocks.
+
+    Args:
+        node (:obj:`str`): The /dev entry (or image partition path) of the partition.
+        partition_rec (namedtuple): My entry in my disk's disk_namedtuple().
+        parentnode (:obj:`str`): The disk to which I belong.
+
+    Raises:
+        ValueError: `partition_rec` or `parentnode` is missing.
+
+    """
+
+    __slots__ = ()
+
+    def __init__(self, node, partition_rec=None, parentnode=None):
+        if partition_rec is None or parentnode is None:
+            raise ValueError("AsyncDiskPartition needs its partition_rec and its parentnode")
+        super().__init__(node, partition_rec=partition_rec, parentnode=parentnode)
+
+    def __repr__(self):
+        return 'AsyncDiskPartition(node="%s")' % self.node
+
+    async def async_update(self):
+        """Re-read my disk's partition table and fill myself in from my entry.
+
+        Raises:
+            ValueError: My partition is no longer in the table.
+
+        """
+        rec = await async_disk_namedtuple(self.parentnode)
+        for partition_rec in rec.partitiontable.partitions:
+            if self.node in partition_paths(partition_rec):
+                self._absorb(partition_rec)
+                return
+        raise ValueError("Partition {node} cannot be found/analyzed".format(node=self.node))
+
+
+class AsyncDisk:
+    """Class instance that wraps around /dev/sda, /dev/mmcblk0, or an image file, for asyncio.
+
+    I'm empty until you await update() -- or use `await AsyncDisk.open(node)`,
+    which does that for you. Creating me checks nothing; the first update()
+    checks that `node` is a disk, in a worker thread, because that may mean
+    reading sysfs or running sfdisk.
+
+    Args:
+        node (:obj:`str`): The path (/dev/etc.) of the disk that we care about.
+
+    """
+
+    __slots__ = (
+        "_user_specified_node",
+        "_node",
+        "_cache",
+        "_partitions",
+        "_partitions_by_partno",
+        "_lock",
+    )
+
+    def __init__(self, node):
+        self._user_specified_node = node
+        self._node = os.path.realpath(node)
+        self._cache = None
+        self._partitions = []
+        self._partitions_by_partno = {}
+        self._lock = asyncio.Lock()
+
+    def __repr__(self):
+        return 'AsyncDisk(node="%s")' % self.node
+
+    @classmethod
+    async def open(cls, node):
+        """Create an AsyncDisk and read its partition table.
+
+        Raises:
+            ValueError: `node` is not a disk.
+
+        """
+        disk = cls(node)
+        await disk.update()
+        return disk
+
+    @property
+    def node(self):
+        """str: the /dev path (or image path) of the disk."""
+        return self._node
+
+    @property
+    def partitions(self):
+        """list[] of AsyncDiskPartition: All the partitions that belong to this disk."""
+        return self._partitions
+
+    @property
+    def partitiontable_type(self):
+        """str: 'dos' or 'gpt'."""
+        return self._cache.partitiontable.partitiontable_type
+
+    @property
+    def serno(self):
+        """str: the disk ID, e.g. 0x1234ABCD, or the GPT disk GUID."""
+        return self._cache.partitiontable.serno
+
+    @property
+    def sector_size(self):
+        """int: the sector size that the disk uses. Probably 512."""
+        return self._cache.partitiontable.sector_size
+
+    @property
+    def size_in_sectors(self):
+        """int: The maximum capacity of the disk, in sectors."""
+        return self._cache.partitiontable.size_in_sectors
+
+    @property
+    def overlapping(self):
+        """Tell you if this disk's partitions overlap, according to my cached record."""
+        return layout_overlaps(layout_from_record(self._cache))
+
+    def partition(self, partno):
+        """Return my partition #`partno`.
+
+        Raises:
+            AttributeError: I have no such partition.
+
+        """
+        try:
+            return self._partitions_by_partno[partno]
+        except KeyError:
+            raise AttributeError(
+                "Disk {node} does not contain a partition #{partno}".format(node=self.node, partno=partno)
+            ) from None
+
+    async def update(self, partprobe=False):
+        """Re-read my partition table and rebuild my partitions.
+
+        Args:
+            partprobe (:obj:`bool`): Should I tell the kernel about my
+                partitions first?
+
+        Raises:
+            ValueError: I'm not a disk. (I check the first time.)
+
+        """
+        if self._cache is None:
+            await self._check_that_i_am_a_disk()
+        if partprobe:
+            await async_update_kernel_partitions(self.node)
+        self._cache = await async_disk_namedtuple(self.node)
+        self._partitions = [
+            AsyncDiskPartition(p.node, partition_rec=p, parentnode=self.node)
+            for p in self._cache.partitiontable.partitions
+        ]
+        self._partitions_by_partno = {p.partno: p for p in self._partitions}
+
+    async def add_partition(self, partno=None, start=None, end=None, fstype=None, size_in_MiB=None,
+                            align=None, timeout=2):
+        """Add a partition, and wait for the kernel to notice it.
+
+        The parameters are those of DiskTransaction.add_partition(), plus:
+
+        Args:
+            timeout (float, optional): How long to wait for the kernel.
+
+        Returns:
+            LayoutEntry: The new partition.
+
+        Raises:
+            PartitionWasNotCreatedError: The kernel didn't notice it in time,
+                or the table that I read back is not the one that I wrote.
+
+        """
+        async with self._lock:
+            txn = await self._transaction()
+            entry = txn.add_partition(partno=partno, start=start, end=end, fstype=fstype,
+                                      size_in_MiB=size_in_MiB, align=align)
+            await self._commit(txn)
+        try:
+            await self.wait_for_partition(entry.partno, timeout=timeout)
+        except TimeoutError as e:
+            raise PartitionWasNotCreatedError(
+                "Failed to add partition #%d to %s" % (entry.partno, self.node)
+            ) from e
+        return entry
+
+    async def delete_partition(self, partno, timeout=5):
+        """Delete a partition, and wait for the kernel to notice.
+
+        Raises:
+            PartitionDeletionError: It couldn't be deleted, or the kernel
+                didn't notice in time.
+
+        """
+        async with self._lock:
+            txn = await self._transaction()
+            txn.delete_partition(partno)
+            await self._commit(txn)
+        try:
+            await self.wait_for_partition(partno, present=False, timeout=timeout)
+        except TimeoutError as e:
+            raise PartitionDeletionError(
+                "Failed to delete partition #%d from %s" % (partno, self.node)
+            ) from e
+
+    async def delete_all_partitions(self):
+        """Delete all my partitions at once."""
+        async with self._lock:
+            txn = await self._transaction()
+            txn.delete_all_partitions()
+            await self._commit(txn)
+
+    async def apply_layout(self, specs):
+        """Make my partitions look like `specs`. See Disk.apply_layout().
+
+        Returns:
+            list of LayoutChange: What was changed.
+
+        """
+        async with self._lock:
+            txn = await self._transaction()
+            changes = txn.apply_layout(specs)
+            await self._commit(txn)
+        return changes
+
+    async def wait_for_partition(self, partno, present=True, timeout=2):
+        """Wait until the kernel -- and udev -- know that partition #`partno` exists (or doesn't).
+
+        An image file has no kernel partitions, so I return at once.
+
+        Args:
+            partno (int): The partition#.
+            present (bool, optional): Wait for it to appear (True) or vanish (False).
+            timeout (float, optional): How long to wait, in seconds.
+
+        Raises:
+            TimeoutError: It didn't happen in time.
+
+        """
+        if not _is_block_device(self.node):
+            return
+        node = partition_node(self.node, partno)
+
+        def _done():
+            return bool(sysfs_has_partition(self.node, partno)) == present and os.path.exists(node) == present
+
+        await async_pause_until_true(timeout=timeout, test_func=_done,
+                                     nudge_func=lambda: async_update_kernel_partitions(self.node))
+
+    async def _check_that_i_am_a_disk(self):
+        if os.path.isfile(self._node) or self._node.startswith("/dev/loop"):
+            return
+        if not await asyncio.to_thread(is_this_a_disk, self._user_specified_node):
+            raise ValueError("Nope -- %s is not a disk" % self._user_specified_node)
+
+    async def _transaction(self):
+        if self._cache is None:
+            await self.update()
+        return DiskTransaction(self._cache, await async_sfdisk_output(self.node))
+
+    async def _commit(self, txn):
+        """Write the transaction, tell the kernel, and update myself: Disk.transaction(), for asyncio."""
+        if not txn.changed:
+            return
+        try:
+            if not txn.write_natively():
+                retcode, _stdout_txt, stderr_txt = await async_call_binary(
+                    ["sfdisk", "-f", "--no-tell-kernel", self.node], txn.sfdisk_script()
+                )
+                if retcode != 0:
+                    raise PartitionTableWriteError(
+                        "Failed to write the new partition table to %s: %s" % (self.node, stderr_txt)
+                    )
+        except BaseException:
+            invalidate_disk_reads(self.node)
+            try:
+                await self.update(partprobe=_is_block_device(self.node))
+            except Exception as e:  # pylint: disable=broad-except
+                # The write's exception is the one that matters. Don't hide it.
+                sys.stderr.write("Unable to update %s after a failed write: %s\n" % (self.node, str(e)))
+            raise
+        invalidate_disk_reads(self.node)
+        await self.update(partprobe=_is_block_device(self.node))
+        if [e[:3] for e in layout_from_record(self._cache).partitions] != [e[:3] for e in txn.layout.partitions]:
+            raise PartitionWasNotCreatedError("The partition table of %s is not what I wrote to it" % self.node)
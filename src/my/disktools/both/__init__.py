@@ -18,7 +18,89 @@ Todo:
 
 from collections import namedtuple
 import os
+import threading
 
+_DEVDISKBY_ROOT = "/dev/disk"
+_DEVDISKBY_FIELDS = ("id", "label", "partuuid", "path", "uuid")
+_devdiskby_index = {}
+_devdiskby_mtimes = None
+_devdiskby_lock = threading.Lock()
+
+
+def _devdiskby_dir_mtimes():
+    mtimes = []
+    for searchby in _DEVDISKBY_FIELDS:
+        try:
+            mtimes.append(os.stat("%s/by-%s" % (_DEVDISKBY_ROOT, searchby)).st_mtime_ns)
+        except FileNotFoundError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
+
+def devdiskbyxxxx_index():
+    """Return the reverse index of /dev/disk/by-____/ softlinks, rebuilding it if it is stale.
+
+    Rather than list and resolve every softlink in /dev/disk/by-{searchby}
+    every time someone wants to know a device's partuuid (or whatever),
+    I walk all five /dev/disk/by-____/ directories once and remember what
+    I found. The index is rebuilt whenever any of those directories' mtimes
+    change -- i.e. whenever udev adds, removes or renames a softlink.
+
+    Returns:
+        dict: {device_path: {searchby: softlink}}, e.g.
+            {'/dev/mmcblk0p1': {'partuuid': '/dev/disk/by-partuuid/bbc1bbc2-01',
+                                'uuid': '/dev/disk/by-uuid/2bcf1a74-...', ...}}
+            Please do not modify it.
+
+    """
+    global _devdiskby_index, _devdiskby_mtimes  # pylint: disable=global-statement
+    with _devdiskby_lock:
+        mtimes = _devdiskby_dir_mtimes()
+        if mtimes != _devdiskby_mtimes:
+            index = {}
+            for searchby, mtime in zip(_DEVDISKBY_FIELDS, mtimes):
+                if mtime is None:
+                    continue
+                altdir = "%s/by-%s" % (_DEVDISKBY_ROOT, searchby)
+                try:
+                    softlinks = os.listdir(altdir)
+                except FileNotFoundError:
+                    continue
+                for p in softlinks:
+                    fullpath = os.path.join(altdir, p)
+                    try:
+                        linked_to = os.path.realpath(fullpath)
+                    except FileNotFoundError:
+                        continue
+                    # The first softlink wins, as it always has.
+                    index.setdefault(linked_to, {}).setdefault(searchby, fullpath)
+            _devdiskby_index = index
+            _devdiskby_mtimes = mtimes
+        return _devdiskby_index
+
+
+def devdiskbyxxxx_paths(device_path, index=None):
+    """Return all the /dev/disk/by-____/ softlinks to the specified device path.
+
+    Args:
+        device_path (:obj:`str`): The /dev/... entry, e.g. /dev/sdx1
+        index (dict, optional): A devdiskbyxxxx_index() to consult. If it
+            is unspecified, I'll use the current one.
+
+    Returns:
+        dict: {'id': str or None, 'label': str or None, 'partuuid': str or None,
+            'path': str or None, 'uuid': str or None}
+
+    Example:
+        $ devdiskbyxxxx_paths('/dev/mmcblk0p1')
+        {'id': '/dev/disk/by-id/mmc-SD32G_0x2c3ec1bb-part1', 'label': None,
+        'partuuid': '/dev/disk/by-partuuid/bbc1bbc2-01', 'path': ..., 'uuid': ...}
+
+    """
+    if index is None:
+        index = devdiskbyxxxx_index()
+    found = index.get(device_path, {})
+    return {searchby: found.get(searchby) for searchby in _DEVDISKBY_FIELDS}
 
 
 def devdiskbyxxxx_path(device_path, searchby):
@@ -26,9 +108,10 @@ def devdiskbyxxxx_path(device_path, searchby):
 
     Each disk node and partition node -- e.g. /dev/sda, /dev/mmcblk0p2, etc. --
     is also listed in /dev/disk/by-uuid, /dev/disk/by-partuuid, etc. via soft-
-    links. I search the specified subdirectory -- /dev/disk/by-{searchby} --
-    and look for any softlinks to the specified node path. If I find it, I
-    return it. If I can't find it, I return None.
+    links. I look up the specified node path in the reverse index of the
+    specified subdirectory -- /dev/disk/by-{searchby} -- (see
+    devdiskbyxxxx_index()). If I find it, I return it. If I can't find it,
+    I return None.
 
     Args:
         device_path (:obj:`str`): The /dev/... entry, e.g. /dev/sdx1
@@ -56,12 +139,14 @@ def devdiskbyxxxx_path(device_path, searchby):
     """
     if not os.path.exists(device_path):
         raise ValueError("Device path %s does not exist" % device_path)
-    altdir = "/dev/disk/by-%s" % searchby
+    altdir = "%s/by-%s" % (_DEVDISKBY_ROOT, searchby)
     if not os.path.exists(altdir):
         raise ValueError(
             "Cannot search by %s -- directory %s not found" % (searchby, altdir)
         )
-    for p in os.listdir(altdir):
+    if searchby in _DEVDISKBY_FIELDS:
+        return devdiskbyxxxx_index().get(device_path, {}).get(searchby)
+    for p in os.listdir(altdir):  # e.g. by-diskseq, which I don't index
         fullpath = os.path.join(altdir, p)
         try:
             linked_to = os.path.realpath(fullpath)
@@ -76,8 +161,17 @@ def devdiskbyxxxx_path(device_path, searchby):
 
 
 def has_legible_parttable(node):
+    """Return True if supplied disk path contains a legible partition table; else, False.
+
+    I read the partition table myself if I can. I ask sfdisk only if I don't
+    recognize what I find."""
     from my.globals import call_binary
-    """Return True if supplied disk path contains a legible partition table; else, False."""
+    from my.disktools.parttable import read_partition_table
+    try:
+        if read_partition_table(node) is not None:
+            return True
+    except OSError:
+        return False
     retcode, _stdouf_txt, _stderr_txt = call_binary(['sfdisk','-d',node])
     return True if retcode == 0 else False
 
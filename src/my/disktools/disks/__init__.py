@@ -21,14 +21,24 @@ Todo:
 
 import sys
 
-from collections import namedtuple
+from contextlib import contextmanager
+import bisect
+import copy
 import json
 import os
 import io
 import subprocess
 
-from my.disktools.both import devdiskbyxxxx_path, has_legible_parttable
-from my.disktools.partitions import deduce_partno, add_partition, _DOS_EXTENDED
+from my.disktools.both import devdiskbyxxxx_index, devdiskbyxxxx_paths, has_legible_parttable
+from my.disktools.kernel import update_kernel_partitions
+from my.disktools.layout import layout_from_record, layout_overlaps
+from my.disktools.parttable import read_partition_table, disk_record
+from my.disktools.probe import probe_disk_identifier, probe_fingerprint, probe_geometry, probe_serno_and_geometry
+from my.disktools.readcache import invalidate_disk_reads, read_cache
+from my.disktools.singleflight import coalesced_disk_read
+from my.disktools.sysfs import block_topology, sysfs_is_a_disk
+from my.disktools.transaction import DiskTransaction, _GPT_MAX_PARTNO
+from my.disktools.partitions import deduce_partno, add_partition, overlapping, _DOS_EXTENDED
 from my.exceptions import (
     PartitionsOverlapError,
     StartEndAssBackwardsError,
@@ -39,13 +49,16 @@ from my.exceptions import (
     WeNeedAnExtendedPartitionError, PartitionTableCannotReadError,
     PartitionTableReorderingError, PartitionDeletionError,
 )
-from my.globals import call_binary, _GPT, _DOS
+from my.globals import call_binary, read_locked, write_locked, ReadWriteLock, _GPT, _DOS, _DOS_EXTENDED_TYPES
 
 import threading
 import time
 
 _disks_dct = {}
+_disks_construction_locks = {}
 the_threadsafeDisk_lock = threading.Lock()
+_DOS_MAX_PARTNO = 63
+_sfdisk_outputs = read_cache("sfdisk_output")
 
 
 def sfdisk_compatible_text_line(node, start, size, fstype):
@@ -88,19 +101,32 @@ def threadsafeDisk(disk_path):
             nonexistent file, or is a directory, or has an unfamiliar
             name structure.
     
+    Note:
+        Building a Disk is slow -- it reads the disk and runs partprobe --
+        so I hold the_threadsafeDisk_lock only while I look up the registry.
+        Each disk has its own construction lock: two threads that want the
+        same disk wait for one Disk to be built, but a thread that wants
+        /dev/sdb does not wait for /dev/sda. Softlinks to the same disk
+        share one Disk.
+
     Todo:
         * Better TODO lists
         * Don't use global _disks_dct; do something smarter
 
     """
     global _disks_dct  #pylint: disable=global-statement, global-variable-not-assigned
-    try:
-        the_threadsafeDisk_lock.acquire()
-        if disk_path not in _disks_dct:
-            _disks_dct[disk_path] = Disk(disk_path)
-        retval = _disks_dct[disk_path]
-    finally:
-        the_threadsafeDisk_lock.release()
+    key = os.path.realpath(disk_path)
+    with the_threadsafeDisk_lock:
+        if key in _disks_dct:
+            return _disks_dct[key]
+        construction_lock = _disks_construction_locks.setdefault(key, threading.Lock())
+    with construction_lock:
+        with the_threadsafeDisk_lock:
+            if key in _disks_dct:
+                return _disks_dct[key]
+        retval = Disk(disk_path)
+        with the_threadsafeDisk_lock:
+            _disks_dct[key] = retval
     return retval
 
 
@@ -109,7 +135,8 @@ def is_this_a_disk(node, insist_on_this_existence_state=None):
 
     Examine the supplied path. If it doesn't exist or if we can't figure out
     its nature by examining its path string, raise an exception. Otherwise,
-    return True if it's a disk or False if it's a partition.
+    return True if it's a disk or False if it's a partition. If sysfs knows
+    the device, I take its word for it (see sysfs_is_a_disk()).
 
     Args:
         node (:obj:`str`): Full path to the disk in question. The
@@ -143,6 +170,10 @@ def is_this_a_disk(node, insist_on_this_existence_state=None):
         raise ValueError("I cannot tell if %s is a disk or not. The file/dir/dev does not exist." % str(node))
     linked_to = os.path.realpath(node)
     search_for_this_stub = os.path.basename(linked_to)
+    if insist_on_this_existence_state is None:
+        is_a_disk = sysfs_is_a_disk(linked_to)
+        if is_a_disk is not None:
+            return is_a_disk
     if node.count("/") > 3 and linked_to.count("/") <= 3:
         return is_this_a_disk(
             linked_to, insist_on_this_existence_state=insist_on_this_existence_state
@@ -166,8 +197,7 @@ def is_this_a_disk(node, insist_on_this_existence_state=None):
     elif "zram" in os.path.basename(node):
         return False
     elif "loop" in os.path.basename(node):
-        retcode, _stdout_txt, _stderr_txt = call_binary(['sfdisk', '-d', node])
-        return True if retcode==0 else False
+        return has_legible_parttable(node)
 #        backfname = call_binary(['losetup','-O', 'BACK-FILE', '/dev/loop5'])[1].strip('\n').split('\n')[-1]
 #        return is_this_a_disk(backfname, insist_on_this_existence_state=insist_on_this_existence_state)
     elif exists:
@@ -217,6 +247,7 @@ w
 q
 """,
     )
+    invalidate_disk_reads(disk_path)
     if retcode != 0:
         raise PartitionTableReorderingError(
             "Failed to sort {disk_path}'s partitions".format(disk_path=disk_path)
@@ -227,9 +258,12 @@ q
 def serno_sizeinbytes_sizeinsectors_and_sectorsize(disk_path):
     """Retrieve the disk serial#, disk size (bytes and sectors), and sector size.
 
-    This subroutine interrogates the disk device path via fdisk and obtains
-    the disk ID (its eight-digit hexadecimal string), its size in bytes,
-    its size in disk sectors, and the sector size.
+    This subroutine probes the disk with ioctls and reads its disk ID
+    straight from the disk (see my.disktools.probe), and obtains the disk
+    ID (its eight-digit hexadecimal string), its size in bytes, its size in
+    disk sectors, and the sector size. If the disk cannot be probed that
+    way, I interrogate the disk device path via sfdisk instead; and if I
+    don't recognize its partition table, I ask sfdisk for its disk ID.
 
     Args:
         disk_path (:obj:`str`): The /dev entry (e.g. /dev/sda) of the disk_path.
@@ -253,6 +287,14 @@ def serno_sizeinbytes_sizeinsectors_and_sectorsize(disk_path):
     """
     if not os.path.exists(disk_path):
         raise ValueError("%s not found" % disk_path)
+    try:
+        serno, disk_length_in_bytes, disk_length_in_sectors, sector_size = probe_serno_and_geometry(disk_path)
+    except OSError:
+        pass
+    else:
+        if serno is None:
+            serno = _sfdisk_disk_identifier(disk_path)
+        return (serno, disk_length_in_bytes, disk_length_in_sectors, sector_size)
     retcode, stdout_txt, stderr_txt = call_binary(
         param_lst=["sfdisk", "-l", disk_path], input_str=None
     )
@@ -284,9 +326,27 @@ def serno_sizeinbytes_sizeinsectors_and_sectorsize(disk_path):
     )
 
 
+def _sfdisk_disk_identifier(disk_path):
+    """Ask sfdisk for the disk ID of a partition table that I don't recognize. Return None if it can't say."""
+    try:
+        retcode, stdout_txt, _stderr_txt = call_binary(["sfdisk", "-l", disk_path])
+    except OSError:
+        return None
+    if retcode != 0:
+        return None
+    for line in stdout_txt.split("\n"):
+        if line.startswith("Disk identifier:"):
+            return line.split(":", 1)[1].strip()
+    return None
+
+
 def get_serno(disk_path):
     """Read partition table of disk. Return its serial number."""
-    return serno_sizeinbytes_sizeinsectors_and_sectorsize(disk_path)[0]
+    try:
+        serno = probe_disk_identifier(disk_path)
+    except OSError:
+        return serno_sizeinbytes_sizeinsectors_and_sectorsize(disk_path)[0]
+    return serno if serno is not None else _sfdisk_disk_identifier(disk_path)
 
 
 def set_serno(disk_path, new_serno):
@@ -330,7 +390,8 @@ w
     if retcode != 0:
         print("stdout_txt:", stdout_txt)
         print("stderr_txt:", stderr_txt)
-    _, __, ___ = call_binary(['partprobe', disk_path])
+    invalidate_disk_reads(disk_path)
+    update_kernel_partitions(disk_path, reread=True)  # so that udev sees the new PARTUUIDs
     resultant_serno = get_serno(disk_path) 
     if resultant_serno != new_serno:
         # print(retcode)
@@ -341,14 +402,20 @@ w
         )
 
 
-def sfdisk_output(disk_path):
+def sfdisk_output(disk_path, topology=None):
     """Call sfdisk, collect information in JSON format, and return it.
 
-    This subroutine calls sfisk and asks for a JSON-formatted output of
-    information pertaining to the disk specified in node.
+    This subroutine reads the partition table directly (see
+    my.disktools.parttable.read_partition_table) and returns the same
+    JSON-formatted information that sfdisk would have. If the partition
+    table is not one that I recognize, I call sfdisk and ask it for a
+    JSON-formatted output of information pertaining to the disk instead.
 
     Args:
         node (:obj:`str`): The /dev entry (e.g. /dev/sda) of the node.
+        topology (dict, optional): The block_topology() to consult when I
+            check whether the disk has changed. scan_disks() hands every
+            disk the same one.
 
     Returns:
         json dictionary {
@@ -365,13 +432,31 @@ def sfdisk_output(disk_path):
                     ]
                 }
 
+    Note:
+        If other threads ask about the same disk at the same time, we share
+        one read (see my.disktools.singleflight); and I remember the result
+        until the disk changes (see my.disktools.readcache). You get your
+        own copy.
+
     Raises:
-        None
+        PartitionTableCannotReadError: Neither I nor sfdisk can read it.
 
     Todo:
         * Add more TODOs
 
     """
+    return copy.deepcopy(
+        coalesced_disk_read("sfdisk_output", disk_path, lambda: _sfdisk_output(disk_path), _sfdisk_outputs, topology)
+    )
+
+
+def _sfdisk_output(disk_path):
+    try:
+        json_rec = read_partition_table(disk_path)
+    except OSError:
+        json_rec = None
+    if json_rec is not None:
+        return json_rec
     retcode, stdout_txt, stderr_txt = call_binary(
         param_lst=["sfdisk", "-J", disk_path], input_str=None
     )
@@ -388,14 +473,16 @@ def sfdisk_output(disk_path):
 #    return res
 
 
-def all_disk_paths():
-    """Derive a complete list of disks (not partitions) from /proc/partitions.
+def all_disk_paths(topology=None):
+    """Derive a complete list of disks (not partitions) from /sys/class/block.
 
-    Interrogate /proc/partitions. Gather a list of disks (not partitions) from
-    that file. Return the list as, well, a list of /dev/... entries.
+    Interrogate /sys/class/block (see scan_disk_paths()). If there isn't
+    one, interrogate /proc/partitions instead. Gather a list of disks (not
+    partitions). Return the list as, well, a list of /dev/... entries.
 
     Args:
-        None
+        topology (dict, optional): A block_topology() to consult. If it is
+            unspecified, I'll use the current one.
 
     Returns:
         list of strings, e.g. ['/dev/sda', '/dev/mmcblk0', '/dev/sdb']
@@ -407,6 +494,11 @@ def all_disk_paths():
         * Add a meaningful check --- did our serial-change succeed or fail?
 
     """
+    from my.disktools.inventory import scan_disk_paths
+
+    all_dev_entries = scan_disk_paths(topology=topology)
+    if all_dev_entries is not None:
+        return all_dev_entries
     all_dev_entries = []
     with open("/proc/partitions", "r", encoding="utf-8") as f:
         s = f.read().split("\n")
@@ -426,8 +518,8 @@ def namedtuples_for_all_disks():
 
     Scan /proc/partitions. Create a namedtuple for each disk (not the
     partitions but the *disks*) and make a list of them all. The
-    namedtuples are generated by disk_namedtuple(), which in turn uses
-    the JSON library and calls sfdisk -J (get JSON-friendly output).
+    namedtuples are generated by disk_namedtuple(), several disks at a
+    time (see scan_disks()).
 
     Args:
         None.
@@ -436,16 +528,22 @@ def namedtuples_for_all_disks():
         list of namedtuples: One per disk listed in /proc/partitions.
 
     Raises:
-        None.
+        Whatever disk_namedtuple() raised for the first disk that failed.
 
     Todo:
         * Add more TODOs.
 
     """
-    disks = []
-    for devpath in all_disk_paths():
-        disks.append(disk_namedtuple(devpath))
-    return disks
+    from my.disktools.inventory import scan_disks
+
+    topology = block_topology()
+    disk_paths = all_disk_paths(topology)
+    records = {}
+    for result in scan_disks(disk_paths, topology=topology):
+        if result.error is not None:
+            raise result.error
+        records[result.node] = result.record
+    return [records[devpath] for devpath in disk_paths]
 
 
 
@@ -473,17 +571,17 @@ def enhanced_sfdisk_output_rec(node):
         PartitionDeletionError: Failed to delete partition.
     
     """
-    json_rec = sfdisk_output(node)
+    return coalesced_disk_read("disk_namedtuple", node, lambda: _disk_namedtuple(node))
+
+
+def _disk_namedtuple(disk_path, devdiskby_index=None, topology=None):
+    json_rec = sfdisk_output(disk_path, topology)
     # Changes are saved to json_rec
-    _ = enhance_the_sfdisk_output(node, json_rec)
-    rec = json.loads(
-        json.dumps(json_rec),
-        object_hook=lambda d: namedtuple("X", d.keys())(*d.values()),
-    )
-    return rec
+    _ = enhance_the_sfdisk_output(disk_path, json_rec, devdiskby_index)
+    return disk_record(json_rec)
 
 
-def enhance_the_sfdisk_output(disk_path, json_rec):
+def enhance_the_sfdisk_output(disk_path, json_rec, devdiskby_index=None):
     """Add sector size, disk size, etc. to the supplied JSON record.
 
     Using fdisk, we interrogate the specified disk, obtain additional
@@ -498,6 +596,9 @@ def enhance_the_sfdisk_output(disk_path, json_rec):
             sfdisk returned when asked about node. THIS IS MODIFIED
             BY ME. The new data is added to json_rec, which will retain
             its new data.
+        devdiskby_index (dict, optional): The devdiskbyxxxx_index() to
+            consult for the /dev/disk/by-____/ softlinks. If it is
+            unspecified, I'll use the current one.
 
     Returns:
         None, although json_rec has been modified by me to include the new data.
@@ -521,43 +622,50 @@ def enhance_the_sfdisk_output(disk_path, json_rec):
     json_rec["partitiontable"]["partitiontable_type"] = json_rec["partitiontable"]["label"]
     del json_rec["partitiontable"]["label"]
     json_rec["partitiontable"]["serno"] = serno
+    if devdiskby_index is None:
+        devdiskby_index = devdiskbyxxxx_index()
+    disk_paths = devdiskbyxxxx_paths(disk_path, devdiskby_index)
     for disk_searchby in ("myid", "label", "partuuid", "path", "uuid"):
-        newval = devdiskbyxxxx_path(
-            disk_path, disk_searchby.replace('my','')
-        )
+        newval = disk_paths[disk_searchby.replace('my','')]
         if disk_searchby not in json_rec["partitiontable"] \
         or newval not in (None, ''): 
             json_rec["partitiontable"][disk_searchby] = newval 
-        for partition_rec in json_rec["partitiontable"]["partitions"]:
-            for partition_searchby in ("myid", "label", "partuuid", "path", "uuid"):
-                try:
-                    partition_rec[partition_searchby] = devdiskbyxxxx_path(
-                        partition_rec["node"], partition_searchby.replace('my',''))
-                except ValueError:
-                    partition_rec[partition_searchby] = None
+    for partition_rec in json_rec["partitiontable"]["partitions"]:
+        partition_devdiskby_paths = devdiskbyxxxx_paths(partition_rec["node"], devdiskby_index)
+        for partition_searchby in ("myid", "label", "partuuid", "path", "uuid"):
+            partition_rec[partition_searchby] = partition_devdiskby_paths[partition_searchby.replace('my','')]
     json_rec["partitiontable"]["node"] = disk_path
     return json_rec
 
 
-def disk_namedtuple(disk_path):
+def disk_namedtuple(disk_path, devdiskby_index=None, topology=None):
     """Get a namedtuple of info from sfdisk and fdisk, re: the disk specified.
 
     The binary 'sfdisk' can generate a JSON record containing information about
     a specified disk and all its partitions. I, disk_namedtuple(), call that
     binary and process its output. I turn it from a JSON-esque dictionary
-    into a named tuple. For example, rec['partitiontable'] becomes
+    into a DiskRecord (see my.disktools.parttable), which behaves like a
+    named tuple. For example, rec['partitiontable'] becomes
     becomes rec.partitiontable and so on.
 
     Args:
         disk_path (:obj:`str`): The /dev entry (e.g. /dev/sda) of the node.
+        devdiskby_index (dict, optional): The devdiskbyxxxx_index() to
+            consult. scan_disks() hands every disk the same one.
+        topology (dict, optional): The block_topology() to consult. Ditto.
 
     Returns:
-        namedtuple(
+        DiskRecord(
             partitiontable:[]
             ...
             ...
         )
 
+    Note:
+        If other threads ask about the same disk at the same time, we share
+        one probe, and one record (see my.disktools.singleflight). Unless
+        you pass me an index or a topology: then the probe is all yours.
+
     Raises:
         ValueError: If node is an invalid string or points to a
             nonexistent disk.
@@ -568,14 +676,9 @@ def disk_namedtuple(disk_path):
     """
     if disk_path in (None, "/", "") or not os.path.exists(disk_path) or os.path.isdir(disk_path):
         raise ValueError("Cannot get disk record -- %s not found" % str(disk_path))
-    json_rec = sfdisk_output(disk_path)
-    # Changes are saved to json_rec
-    _ = enhance_the_sfdisk_output(disk_path, json_rec) 
-    res = json.loads(
-        json.dumps(json_rec),
-        object_hook=lambda d: namedtuple("X", d.keys())(*d.values()),
-    )
-    return res
+    if devdiskby_index is not None or topology is not None:
+        return _disk_namedtuple(disk_path, devdiskby_index, topology)
+    return coalesced_disk_read("disk_namedtuple", disk_path, lambda: _disk_namedtuple(disk_path))
 
 
 def get_partitiontable_type(disk_path):
@@ -595,7 +698,8 @@ def reset_disk_partition_table(diskdev, pttype):
 w""".format(ptcode=ptdic[pttype]))
 #    if retcode != 0:
 #        raise ValueError("Cannot give partition table type '%s' to disk '%s'\n%s" % (pttype, diskdev, stderr_txt))
-    os.system("partprobe %s" % diskdev)
+    invalidate_disk_reads(diskdev)
+    update_kernel_partitions(diskdev)
     j = sfdisk_output(diskdev)
     if j['partitiontable']['label'] != pttype:
         raise ValueError("Cannot give partition table type '%s' to disk '%s'\n%s" % (pttype, diskdev, stderr_txt))
@@ -604,6 +708,10 @@ w""".format(ptcode=ptdic[pttype]))
 class Disk:
     """Class instance that wraps around /dev/sda, /dev/mmcblk0, or whichever.
 
+    Each instance has its own ReadWriteLock. Many threads may read my
+    properties at once; update(), add_partition() and the other methods
+    that change the disk run one at a time, while nobody is reading.
+
     Note:
         None.
     
@@ -629,10 +737,29 @@ class Disk:
 
     Todo:
         * Add more TODOs
-        * Add proper read- and write-locking.
 
     """
+    __slots__ = (
+        "_user_specified_node",
+        "_node",
+        "_cache",
+        "_myid",
+        "_pddev",
+        "_unit",
+        "_partitiontable_type",
+        "_serno",
+        "_sector_size",
+        "_size_in_sectors",
+        "_geometry",
+        "_partitions",
+        "_partitions_by_partno",
+        "_partition_starts",
+        "_fingerprint",
+        "_rwlock",
+    )
+
     def __init__(self, node, new_partition_table=None):
+        self._rwlock = ReadWriteLock()
         self._user_specified_node = node
         self._node = os.path.realpath(self._user_specified_node)
         if not os.path.isfile(os.path.realpath(self._node)) and not self._node.startswith('/dev/loop') and not is_this_a_disk(self._user_specified_node):
@@ -648,6 +775,7 @@ class Disk:
     def __repr__(self):
         return 'Disk(node="%s")' % self.node
 
+    @read_locked
     def __str__(self):
         return """node=%s  serno=%s  unit=%s  partitions:%d""" % (
             self.node,
@@ -656,11 +784,13 @@ class Disk:
             len(self.partitions),
         )
 
+    @write_locked
     def partprobe(self):
-        """Run partprobe binary on my own disk (self.node).
+        """Tell the kernel about any changes to my partitions.
 
         Note:
-            None.
+            Despite my name, I no longer run the partprobe binary unless I
+            have to. See update_kernel_partitions().
 
         Args:
             None.
@@ -669,9 +799,9 @@ class Disk:
             None.
 
         """
-        d = self.node if os.path.exists(self.node) else ""
-        _, __, ___ = call_binary(['partprobe', d])
+        update_kernel_partitions(self.node)
 
+    @write_locked
     def update(self, partprobe=True):
         """Re-read the paths, disk ID, etc. for this disk.
 
@@ -688,6 +818,10 @@ class Disk:
         from my.disktools.partitions import DiskPartition
         if partprobe:
             self.partprobe()
+        try:
+            self._fingerprint = probe_fingerprint(self.node)
+        except OSError:
+            self._fingerprint = None
         self._cache = disk_namedtuple(self.node)
         self._myid = self._cache.partitiontable.myid
         self._pddev = self._cache.partitiontable.device # Unused!
@@ -696,22 +830,70 @@ class Disk:
         self._serno = self._cache.partitiontable.serno
         self._sector_size = self._cache.partitiontable.sector_size
         self._size_in_sectors = self._cache.partitiontable.size_in_sectors
+        try:
+            self._geometry = probe_geometry(self.node)
+        except OSError:
+            self._geometry = None
         self._partitions = []
+        self._partitions_by_partno = {}
         for p in self._cache.partitiontable.partitions:
-            self.partitions.append(DiskPartition(p.node))
+            diskpartition = DiskPartition(p.node, partition_rec=p, parentnode=self.node)
+            self._partitions.append(diskpartition)
+            self._partitions_by_partno.setdefault(diskpartition.partno, []).append(diskpartition)
+        self._partition_starts = sorted((p.start, p.partno) for p in self._partitions)
         if self.overlapping:
             sys.stderr.write("Warning -- partitions in %s are overlapping\n" % self.node)
         if self._pddev != self.node:
             sys.stderr.write("Warning -- sfdisk said the node is {pddev} but you said it was {node}\n".format(pddev=self._pddev, node=self.node))
-        for p in self.partitions:
-            p.update()
+
+    @write_locked
+    def refresh_if_changed(self, partprobe=False):
+        """Re-read this disk, but only if its partition table has changed.
+
+        I compare the disk's fingerprint (see probe_fingerprint()) with the
+        one that I took the last time I updated myself. If they match, I do
+        nothing else: no sfdisk, no partprobe, no rebuilding of partitions.
+        Otherwise, I run update().
+
+        Args:
+            partprobe (:obj:`bool`): Should update() run partprobe first?
+
+        Returns:
+            bool: True if I updated myself, False if there was no need.
+
+        """
+        try:
+            fingerprint = probe_fingerprint(self.node)
+        except OSError:
+            fingerprint = None
+        if fingerprint is not None and fingerprint == self._fingerprint:
+            return False
+        self.update(partprobe=partprobe)
+        return True
+
+    @property
+    @read_locked
+    def fingerprint(self):
+        """str: my fingerprint (see probe_fingerprint()) as of my last update(),
+        or None if I couldn't take one."""
+        return self._fingerprint
+
+    @fingerprint.setter
+    def fingerprint(self, value):
+        raise AttributeError("Not permitted")
+
+    @fingerprint.deleter
+    def fingerprint(self):
+        raise AttributeError("Not permitted")
 
     @property
+    @read_locked
     def serno(self):
         """str: the ID (from sfdisk's output) of the disk itself"""
         return self._serno
 
     @serno.setter
+    @write_locked
     def serno(self, value):
         # _ = int(value, 16)
         # if len(value) != 10 or value[:2] != "0x":
@@ -727,6 +909,7 @@ class Disk:
         raise AttributeError("Not permitted")
 
     @property
+    @read_locked
     def partitiontable_type(self):
         """str: the /dev/disk/by-label/... (from sfdisk's output) of the disk"""
         return self._partitiontable_type
@@ -753,6 +936,7 @@ class Disk:
         raise AttributeError("Not permitted")
 
     @property
+    @read_locked
     def unit(self):
         """str: the human-readable name of the unit of measurement that
         fdisk, sfdisk, etc. will use when reading and writing the
@@ -781,6 +965,7 @@ class Disk:
     #     raise AttributeError("Not permitted")
 
     @property
+    @read_locked
     def partitions(self):
         """list[] of DiskPartition records: All the partitions
         that belong to this disk."""
@@ -795,6 +980,7 @@ class Disk:
         raise AttributeError("Not permitted")
 
     @property
+    @read_locked
     def sector_size(self):
         """int: the sector size that the disk uses. Probably 512."""
         return self._sector_size
@@ -808,6 +994,7 @@ class Disk:
         raise AttributeError("Not permitted")
 
     @property
+    @read_locked
     def size_in_sectors(self):
         """int: The maximum capacity of the disk, in sector."""
         return self._size_in_sectors
@@ -821,11 +1008,26 @@ class Disk:
         raise AttributeError("Not permitted")
 
     @property
-    def overlapping(self):
-        """Tell you if this disk's partitions overlap."""
-        from my.disktools.partitions import overlapping
+    @read_locked
+    def geometry(self):
+        """DiskGeometry namedtuple: my size, logical and physical sector
+        sizes, and minimum/optimal I/O sizes (see my.disktools.probe).
+        None if I could not be probed."""
+        return self._geometry
+
+    @geometry.setter
+    def geometry(self, value):
+        raise AttributeError("Not permitted")
 
-        return overlapping(self.node)
+    @geometry.deleter
+    def geometry(self):
+        raise AttributeError("Not permitted")
+
+    @property
+    @read_locked
+    def overlapping(self):
+        """Tell you if this disk's partitions overlap, according to my cached record."""
+        return layout_overlaps(layout_from_record(self._cache))
 
     @overlapping.setter
     def overlapping(self, value):
@@ -835,14 +1037,49 @@ class Disk:
     def overlapping(self):
         raise AttributeError("Not permitted")
     
+    @read_locked
     def partition(self, partno):
-        matches = [p for p in self.partitions if p.partno == partno]
+        """Return my partition #`partno`, from my index: no scanning, no probing.
+
+        Raises:
+            AttributeError: I have no such partition, or more than one.
+
+        """
+        matches = self._partitions_by_partno.get(partno, [])
         if len(matches) == 0:
             raise AttributeError("Disk {node} does not contain a partition #{partno}".format(node=self.node, partno=partno))
         if len(matches) > 1:
             raise AttributeError("Disk {node} contains {howmany} partitions #{partno}. One should be the maximum".format(node=self.node, partno=partno, howmany=len(matches)))
         return matches[0]
 
+    @read_locked
+    def partition_at(self, sector):
+        """Return the partition that contains the specified sector, or None.
+
+        I bisect my partitions' start sectors, so that a 128-partition GPT
+        disk costs no more to search than a 2-partition one. If a DOS
+        logical partition contains the sector, I return it, not the
+        extended partition around it.
+
+        Args:
+            sector (int): A sector# on me.
+
+        Returns:
+            DiskPartition or None.
+
+        """
+        i = bisect.bisect_right(self._partition_starts, (sector, _GPT_MAX_PARTNO + 1))
+        if i > 0:
+            p = self.partition(self._partition_starts[i - 1][1])
+            if p.end >= sector:
+                return p
+        if self.partitiontable_type == _DOS:  # The sector may lie between two logical partitions.
+            for p in self._partitions:
+                if p.fstype in _DOS_EXTENDED_TYPES and p.start <= sector <= p.end:
+                    return p
+        return None
+
+    @write_locked
     def add_partition(
         self,
         partno=None,
@@ -850,7 +1087,8 @@ class Disk:
         end=None,
         fstype=None,
         debug=False,
-        size_in_MiB=None
+        size_in_MiB=None,
+        align=None
     ):
         """Add a disk partition to this disk.
 
@@ -871,6 +1109,11 @@ class Disk:
                 filesystem type, broadly speaking. The default is probably 83.
             size_in_MiB (int, optional): The size of the partition in mibibibbly
                 whatever.
+            align (int or :obj:`str`, optional): A number of sectors, or
+                ALIGN_AUTO to line the partition up with my erase blocks
+                (see my.disktools.alignment). If it is specified, an
+                unspecified start is the first aligned sector after the
+                previous partition, and `size_in_MiB` is rounded to suit.
 
         Returns:
             None.
@@ -894,27 +1137,25 @@ class Disk:
             if len(self.partitions) == 0:
                 partno = 1
             else:
-                partno = max([r.partno for r in self.partitions]) + 1
-        if partno < 1 or partno > 63:
+                partno = max(self._partitions_by_partno) + 1
+        max_partno = _GPT_MAX_PARTNO if self.partitiontable_type == _GPT else _DOS_MAX_PARTNO
+        if partno < 1 or partno > max_partno:
             raise ValueError("The specified partno %d is too low/high" % partno)
-        elif partno in [r.partno for r in self.partitions]:
+        elif partno in self._partitions_by_partno:
             raise ValueError(
                 "Partition %d exists already. I cannot create two of them." % partno
             )
         elif self.partitiontable_type == _DOS and partno >= 5 and _DOS_EXTENDED not in [p.fstype for p in self.partitions]:
             raise WeNeedAnExtendedPartitionError(
                 "Please create an extended partition first.")
-        elif self.partitiontable_type != _DOS or partno >= 5:
+        elif self.partitiontable_type != _DOS or partno >= 5 or align is not None:
             pass
         # If partition# is 2, 3, or 4, we'll run some 'start'/'end' checks.
         else:
             if start is None:
                 try:
-                    previous_partition = [
-                        r for r in self.partitions if r.partno == partno - 1
-                    ][0]
-                    start = previous_partition.end + 1
-                except IndexError:
+                    start = self._partitions_by_partno[partno - 1][0].end + 1
+                except KeyError:
                     start = None
             if partno > 1 and start is None:
                 raise ValueError(
@@ -922,10 +1163,8 @@ class Disk:
                 )
             if end is None and size_in_MiB is None:
                 try:
-                    end = [r for r in self.partitions if r.partno == partno + 1][
-                        0
-                    ].start - 1
-                except IndexError:
+                    end = self._partitions_by_partno[partno + 1][0].start - 1
+                except KeyError:
                     pass
         #     if start is None and len(self.partitions) > 0:
         #         start = max([p.end for p in self.partitions]) + 1
@@ -948,7 +1187,8 @@ class Disk:
                 end=end,
                 fstype=fstype,
                 debug=debug,
-                size_in_MiB=size_in_MiB
+                size_in_MiB=size_in_MiB,
+                align=align
             )
         except (
             PartitionsOverlapError,
@@ -958,7 +1198,7 @@ class Disk:
             ValueError,
             ExistentPriorPartitionError,
         ) as e:
-            if self.overlapping and type(e) is not PartitionsOverlapError:
+            if overlapping(self.node) and type(e) is not PartitionsOverlapError:
                 e = PartitionsOverlapError(
                     "Changing exception from %s to PartitionsOverlapError" % str(e)
                 )
@@ -972,12 +1212,88 @@ class Disk:
         finally:
             self.update()
 
+    @contextmanager
+    def transaction(self):
+        """Collect several changes to my partitions, then make them all at once.
+
+        Inside the `with` block, call add_partition(), delete_partition(),
+        delete_all_partitions() and set_fstype() on the DiskTransaction that
+        I give you. Nothing touches the disk until the block ends. Then I
+        validate the new layout, write it in one go (see
+        DiskTransaction.write()), tell the kernel once -- unless I'm an
+        image file -- and update() myself once. If the block raises an
+        exception, I write nothing. I hold my write lock throughout.
+
+        Example:
+            $ with disk.transaction() as t:
+            $     t.delete_all_partitions()
+            $     t.add_partition(partno=1, start=8192, size_in_MiB=512)
+            $     t.add_partition(partno=2)
+
+        Yields:
+            DiskTransaction: See my.disktools.transaction.
+
+        Raises:
+            PartitionTableWriteError: sfdisk failed to write the new table.
+            PartitionWasNotCreatedError: The table that I read back does not
+                match the one that I wrote.
+
+        """
+        with self._rwlock.writing():
+            txn = DiskTransaction(self._cache, sfdisk_output(self.node))
+            yield txn
+            if not txn.changed:
+                return
+            try:
+                txn.write()
+            finally:
+                invalidate_disk_reads(self.node)
+                if not os.path.isfile(self.node):
+                    self.partprobe()
+                self.update(partprobe=False)
+            if [e[:3] for e in layout_from_record(self._cache).partitions] != [
+                e[:3] for e in txn.layout.partitions
+            ]:  # Compare partno, start and end. sfdisk may spell the fstype differently.
+                raise PartitionWasNotCreatedError(
+                    "The partition table of %s is not what I wrote to it" % self.node
+                )
+
+    def apply_layout(self, specs):
+        """Make my partitions look like `specs`, changing as little as possible.
+
+        I diff the layout that you want against the one that I have, and
+        make only the changes that are needed: see
+        DiskTransaction.apply_layout(). If I already match, I write nothing
+        and don't bother the kernel.
+
+        Example:
+            $ disk.apply_layout([PartitionSpec(partno=1, start=8192, size=1048576),
+            $                    PartitionSpec(partno=2, size=REST)])
+            []
+
+        Args:
+            specs (list of PartitionSpec): (partno, start, size, fstype, name,
+                align). See my.disktools.layout.
+
+        Returns:
+            list of LayoutChange namedtuples: What I changed.
+
+        Raises:
+            PartitionTableWriteError: sfdisk failed to write the new table.
+
+        """
+        with self.transaction() as txn:
+            changes = txn.apply_layout(specs)
+        return changes
+
+    @write_locked
     def delete_all_partitions(self):
         """Delete all partitions that I, a disk, contain."""
         from my.disktools.partitions import delete_all_partitions
-        delete_all_partitions(self.node)  # Also runs partprobe.
-        self.update(partprobe=False)  # No need to run partprobe again.
+        delete_all_partitions(self.node)  # Also tells the kernel.
+        self.update(partprobe=False)  # No need to tell it again.
 
+    @write_locked
     def delete_partition(self, partno, update=True):
         """Delete the specified partition#.
 
@@ -1014,6 +1330,7 @@ the order of the logical partitions." % (partno + 1, self.node, partno))
                 % (partno, self.node)
             )
 
+    @read_locked
     def dump(self):
         """Derive information about me and my partitions.
 
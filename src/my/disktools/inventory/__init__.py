@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""my.disktools.inventory
+
+List and probe every disk on the host, several at a time.
+
+Created on Oct 17, 2026
+@author: Tom Blackshaw
+
+namedtuples_for_all_disks() used to probe one disk after another, and a
+host with thirty USB card readers spent most of its time waiting for each
+one in turn. Now scan_disks() probes them in a thread pool -- the work is
+sector reads, ioctls and the odd sfdisk, none of which holds the GIL -- and
+hands you each disk's record as soon as it's ready.
+
+Every probe in one scan consults the same snapshot of the /dev/disk/by-____/
+index (see devdiskbyxxxx_index()) and of the sysfs topology (see
+block_topology()), taken once, at the start. Nobody rebuilds them halfway
+through, and the disks all describe the same moment.
+
+scan_disk_paths() does the same for all_disk_paths(): the disk-or-not checks
+(which may mean reading a loop device's partition table) run in the pool.
+all_disk_paths() is called often, so the pool is created once, when it's
+first needed, and kept; and a handful of candidates are checked one by one,
+without bothering it.
+
+Example:
+    $ for result in scan_disks():
+    $     print(result.node, result.error or len(result.record.partitiontable.partitions))
+    /dev/sdc 2
+    /dev/sda 1
+    /dev/sdb Unable to read /dev/sdb with sfdisk
+
+Todo:
+    * Add more TODOs
+
+.. _Google Python Style Guide:
+   http://google.github.io/styleguide/pyguide.html
+
+"""
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+
+from my.disktools.both import devdiskbyxxxx_index
+from my.disktools.sysfs import block_topology, sysfs_disk_paths
+
+DiskScanResult = namedtuple("DiskScanResult", "node record error")
+
+_SCAN_MAX_WORKERS = 16
+_scan_pool = None
+_scan_pool_lock = threading.Lock()
+
+
+def _shared_scan_pool():
+    """The module's thread pool, created the first time that somebody needs it."""
+    global _scan_pool  # pylint: disable=global-statement
+    with _scan_pool_lock:
+        if _scan_pool is None:
+            _scan_pool = ThreadPoolExecutor(max_workers=_SCAN_MAX_WORKERS, thread_name_prefix="disk scan")
+        return _scan_pool
+
+
+def _scan_pool_for(max_workers):
+    """Return (pool, is it mine to shut down?)."""
+    if max_workers == _SCAN_MAX_WORKERS:
+        return _shared_scan_pool(), False
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="disk scan"), True
+
+
+def scan_disk_paths(max_workers=_SCAN_MAX_WORKERS, topology=None):
+    """Do what sysfs_disk_paths() does, checking the candidates concurrently.
+
+    Args:
+        max_workers (int, optional): How many devices to check at once. If
+            there are fewer candidates than that, I check them one by one.
+        topology (dict, optional): A block_topology() to consult. If it is
+            unspecified, I'll take a snapshot of the current one.
+
+    Returns:
+        list of strings, e.g. ['/dev/sda', '/dev/mmcblk0'], in major:minor
+            order; or None if there is no /sys/class/block to read.
+
+    """
+    if topology is None:
+        topology = block_topology()
+
+    def _map(func, candidates):
+        candidates = list(candidates)
+        if len(candidates) < max_workers:
+            return list(map(func, candidates))
+        pool, mine = _scan_pool_for(max_workers)
+        try:
+            return list(pool.map(func, candidates))
+        finally:
+            if mine:
+                pool.shutdown(wait=True)
+
+    return sysfs_disk_paths(topology, _map)
+
+
+def scan_disks(disk_paths=None, max_workers=_SCAN_MAX_WORKERS, topology=None):
+    """Probe several disks at once. Yield each one's record as soon as it's ready.
+
+    Args:
+        disk_paths (list of str, optional): The disks to probe. If it is
+            unspecified, I probe every disk on the host (see all_disk_paths()).
+        max_workers (int, optional): How many disks to probe at once.
+        topology (dict, optional): The block_topology() that every probe
+            should consult. If it is unspecified, I'll take a snapshot.
+
+    Yields:
+        DiskScanResult(node, record, error): `record` is what
+            disk_namedtuple(node) would have returned, or None if probing
+            the disk raised an exception, in which case `error` is that
+            exception. The results come in the order in which the probes
+            finish, not the order of `disk_paths`.
+
+    """
+    if topology is None:
+        topology = block_topology()
+    devdiskby_index = devdiskbyxxxx_index()
+    if disk_paths is None:
+        disk_paths = scan_disk_paths(max_workers, topology)
+    if disk_paths is None:
+        from my.disktools.disks import all_disk_paths
+
+        disk_paths = all_disk_paths(topology)
+    if not disk_paths:
+        return
+    from my.disktools.disks import disk_namedtuple
+
+    pool, mine = _scan_pool_for(max_workers)
+    futures = {}
+    try:
+        for disk_path in disk_paths:
+            futures[pool.submit(disk_namedtuple, disk_path, devdiskby_index, topology)] = disk_path
+        for future in as_completed(futures):
+            error = future.exception()
+            yield DiskScanResult(futures[future], None if error else future.result(), error)
+    finally:
+        for future in futures:  # If you stop listening, I stop probing.
+            future.cancel()
+        if mine:
+            pool.shutdown(wait=True)
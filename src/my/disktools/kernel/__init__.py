@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""my.disktools.kernel
+
+Tell the kernel about changes to a disk's partitions, one partition at a time.
+
+Created on Oct 17, 2026
+@author: Tom Blackshaw
+
+partprobe makes the kernel forget every partition on the disk and read the
+whole table again, which sets off a storm of udev events -- even for the
+partitions that haven't changed. Instead, I compare the partition table on
+the disk with the partitions that the kernel knows about (courtesy of
+sysfs) and issue one BLKPG ioctl per difference: BLKPG_DEL_PARTITION for
+partitions that have gone or moved, BLKPG_RESIZE_PARTITION for ones that
+have grown or shrunk, and BLKPG_ADD_PARTITION for new ones. If nothing has
+changed, I issue no ioctls at all.
+
+If BLKPG won't do it -- a partition that is in use can't be deleted, say --
+I fall back on BLKRRPART (re-read the whole table), and if that fails too,
+on partprobe.
+
+Image files have no kernel partitions, so there's nothing to do for them.
+
+Example:
+    $ update_kernel_partitions('/dev/mmcblk0')
+    'blkpg'
+
+Todo:
+    * Add more TODOs
+
+.. _Google Python Style Guide:
+   http://google.github.io/styleguide/pyguide.html
+
+"""
+
+import ctypes
+import fcntl
+import os
+import stat
+import struct
+
+from my.disktools.parttable import partno_of_node, read_partition_table
+from my.disktools.sysfs import sysfs_partition_extents
+from my.globals import call_binary, _DOS, _DOS_EXTENDED_TYPES
+
+BLKRRPART = 0x125F
+BLKPG = 0x1269
+BLKPG_ADD_PARTITION = 1
+BLKPG_DEL_PARTITION = 2
+BLKPG_RESIZE_PARTITION = 3
+
+_KERNEL_SECTOR_SIZE = 512
+_BLKPG_IOCTL_ARG = struct.Struct("@iiiP")  # struct blkpg_ioctl_arg
+_BLKPG_PARTITION = struct.Struct("@qqi64s64s4x")  # struct blkpg_partition, with its tail padding
+
+
+def _blkpg(fd, op, partno, start=0, length=0):
+    """Issue one BLKPG ioctl. `start` and `length` are in bytes."""
+    data = ctypes.create_string_buffer(_BLKPG_PARTITION.pack(start, length, partno, b"", b""))
+    arg = _BLKPG_IOCTL_ARG.pack(op, 0, _BLKPG_PARTITION.size, ctypes.addressof(data))
+    fcntl.ioctl(fd, BLKPG, arg)
+
+
+def _wanted_extents(table_rec):
+    """Turn a partition table into {partno: (start, size)}, in the kernel's 512-byte sectors."""
+    table = table_rec["partitiontable"]
+    ratio = (table.get("sectorsize") or _KERNEL_SECTOR_SIZE) // _KERNEL_SECTOR_SIZE
+    extents = {}
+    for p in table["partitions"]:
+        start, size = p["start"] * ratio, p["size"] * ratio
+        if table["label"] == _DOS and p["type"] in _DOS_EXTENDED_TYPES:
+            size = min(size, max(ratio, 2))  # The kernel only maps the first sector or two.
+        extents[partno_of_node(p["node"])] = (start, size)
+    return extents
+
+
+def kernel_partition_changes(wanted, current):
+    """Work out which BLKPG operations would turn `current` into `wanted`.
+
+    Args:
+        wanted (dict): {partno: (start, size)}, from the partition table.
+        current (dict): {partno: (start, size)}, from sysfs.
+
+    Returns:
+        list of (op, partno, start, size) tuples, deletions first, then
+            resizes, then additions. A partition that has moved is deleted
+            and added again. An empty list means the kernel is up to date.
+
+    """
+    deletions, resizes, additions = [], [], []
+    for partno, (start, size) in sorted(current.items()):
+        if partno not in wanted or wanted[partno][0] != start:
+            deletions.append((BLKPG_DEL_PARTITION, partno, start, size))
+    for partno, (start, size) in sorted(wanted.items()):
+        if partno not in current or current[partno][0] != start:
+            additions.append((BLKPG_ADD_PARTITION, partno, start, size))
+        elif current[partno][1] != size:
+            resizes.append((BLKPG_RESIZE_PARTITION, partno, start, size))
+    return deletions + resizes + additions
+
+
+def update_kernel_partitions(disk_path, reread=False):
+    """Bring the kernel's idea of a disk's partitions into line with its partition table.
+
+    Args:
+        disk_path (:obj:`str`): The /dev entry of the disk, e.g. /dev/sda.
+        reread (bool, optional): If True, skip the BLKPG stage and make the
+            kernel re-read the whole table. set_serno() wants that, so that
+            udev sees the new PARTUUIDs.
+
+    Returns:
+        :obj:`str` or None: How I did it -- 'blkpg', 'blkrrpart' or
+            'partprobe' -- or None if there was nothing to do (e.g.
+            `disk_path` is an image file).
+
+    """
+    how = update_kernel_partitions_without_partprobe(disk_path, reread)
+    if how == "partprobe":
+        call_binary(["partprobe", os.path.realpath(disk_path)])
+    return how
+
+
+def update_kernel_partitions_without_partprobe(disk_path, reread=False):
+    """Do what update_kernel_partitions() does, up to the point where it would run partprobe.
+
+    The ioctls return at once, so AsyncDisk can call me from an event loop
+    and run partprobe itself, if need be, without blocking.
+
+    Returns:
+        :obj:`str` or None: 'blkpg', 'blkrrpart', None -- or 'partprobe',
+            which means that you should run partprobe yourself.
+
+    """
+    disk_path = os.path.realpath(disk_path)
+    try:
+        if not stat.S_ISBLK(os.stat(disk_path).st_mode):
+            return None
+        fd = os.open(disk_path, os.O_RDONLY)
+    except OSError:
+        return "partprobe"
+    try:
+        if not reread:
+            try:
+                table_rec = read_partition_table(disk_path)
+            except OSError:
+                table_rec = None
+            if table_rec is not None:
+                changes = kernel_partition_changes(
+                    _wanted_extents(table_rec), sysfs_partition_extents(disk_path)
+                )
+                try:
+                    for op, partno, start, size in changes:
+                        _blkpg(fd, op, partno, start * _KERNEL_SECTOR_SIZE, size * _KERNEL_SECTOR_SIZE)
+                    return "blkpg" if changes else None
+                except OSError:
+                    pass
+        try:
+            fcntl.ioctl(fd, BLKRRPART)
+            return "blkrrpart"
+        except OSError:
+            pass
+    finally:
+        os.close(fd)
+    return "partprobe"
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""my.disktools.layout
+
+Reason about a disk's partition layout without touching the disk.
+
+Created on Oct 17, 2026
+@author: Tom Blackshaw
+
+A Layout is the bare bones of a partition table -- its type, plus the
+partno, start, end and fstype of each partition -- held in memory. I build
+one from a disk record (see disk_namedtuple()) that you already have, and
+then answer questions about it (e.g. "would adding this partition cause
+an overlap?") without reading the disk again or probing any partitions.
+
+Overlaps are found by sorting the partitions by their first sector and
+sweeping across them once, so that a 128-partition GPT table costs
+O(n log n), not O(n^2). DOS extended partitions are containers: their
+logical partitions live inside them and do not count as overlapping
+them. A logical partition that strays outside its extended partition
+does count, though.
+
+plan_layout_changes() compares two layouts -- the one on the disk and the
+one you want -- and works out the fewest changes that turn the first into
+the second. A partition that stays where it is, but grows or shrinks or
+changes type, is resized or retyped, not deleted and created again.
+
+Example:
+    $ layout = layout_from_record(disk_namedtuple('/dev/sda'))
+    $ layout_overlaps(layout, [3, 8192, 16383, '83'])
+    False
+
+Todo:
+    * Add more TODOs
+
+.. _Google Python Style Guide:
+   http://google.github.io/styleguide/pyguide.html
+
+"""
+
+from collections import namedtuple
+
+from my.disktools.parttable import partno_of_node
+from my.globals import _DOS, _DOS_EXTENDED_TYPES
+
+_FIRST_LOGICAL_PARTNO = 5
+_HYPOTHETICAL_SIZE = 99999999
+
+Layout = namedtuple("Layout", "partitiontable_type partitions")
+LayoutEntry = namedtuple("LayoutEntry", "partno start end fstype")
+PartitionSpec = namedtuple("PartitionSpec", "partno start size fstype name align", defaults=(None,) * 5)
+LayoutChange = namedtuple("LayoutChange", "op partno entry")
+
+REST = "rest"
+CREATE = "create"
+DELETE = "delete"
+RESIZE = "resize"
+RETYPE = "retype"
+RENAME = "rename"
+
+
+def layout_from_record(rec):
+    """Distill a disk record into a Layout.
+
+    Args:
+        rec (DiskRecord): What disk_namedtuple() returned.
+
+    Returns:
+        Layout namedtuple (partitiontable_type, partitions), where
+            partitions is a tuple of LayoutEntry namedtuples (partno, start,
+            end, fstype), in the order in which the partition table lists
+            them. `end` is the final sector of the partition, inclusive.
+
+    """
+    return Layout(
+        partitiontable_type=rec.partitiontable.partitiontable_type,
+        partitions=tuple(
+            LayoutEntry(
+                partno=partno_of_node(p.node),
+                start=p.start,
+                end=p.start + p.size - 1,
+                fstype=p.type,
+            )
+            for p in rec.partitiontable.partitions
+        ),
+    )
+
+
+def _hypothetical_entry(layout, hypothetically, size_in_sectors=None):
+    partno, start, end, fstype = hypothetically
+    if partno is None:
+        partno = layout.partitions[-1].partno + 1
+    container = None
+    if layout.partitiontable_type == _DOS and partno >= _FIRST_LOGICAL_PARTNO:
+        container = next((e for e in layout.partitions if e.fstype in _DOS_EXTENDED_TYPES), None)
+    if start is None and container is not None:
+        # The first free sector after the last logical partition's EBR.
+        start = max([e.end + 2 for e in layout.partitions if e.partno >= _FIRST_LOGICAL_PARTNO]
+                    + [container.start + 1])
+    elif start is None:
+        start = layout.partitions[-1].end + 1
+    if end is None and size_in_sectors is not None:
+        end = start + size_in_sectors - 1
+    elif end is None:
+        end = container.end if container is not None else start + _HYPOTHETICAL_SIZE
+    return LayoutEntry(partno=partno, start=start, end=end, fstype=fstype)
+
+
+def _any_overlap(entries):
+    """Sweep across `entries`, sorted by their first sector. True if any two overlap."""
+    furthest_end = None
+    for entry in sorted(entries, key=lambda e: e.start):
+        if furthest_end is not None and entry.start <= furthest_end:
+            return True
+        if furthest_end is None or entry.end > furthest_end:
+            furthest_end = entry.end
+    return False
+
+
+def layout_overlaps(layout, hypothetically=None, size_in_sectors=None):
+    """Are two or more partitions in the layout overlapping?
+
+    If the layout's partitions overlap, *or* if the hypothetical partition
+    would overlap one of them, I return True. Else, I return False. I do no
+    I/O whatsoever.
+
+    Args:
+        layout (Layout): See layout_from_record().
+        hypothetically ([partno,start,end,fstype], optional): The proposed
+            new partition. Any of its fields may be None, in which case I
+            guess: the partno and start follow on from the last partition
+            (or, for a logical partition, from the last logical partition),
+            and the end is the end of the extended partition -- or, for
+            any other partition, a long way off.
+        size_in_sectors (int, optional): The size of the proposed partition.
+            If its end is unspecified, I work it out from this.
+
+    Returns:
+        True if overlap is/would be, False otherwise.
+
+    """
+    if not layout.partitions:
+        return False
+    entries = list(layout.partitions)
+    if hypothetically:
+        entries.append(_hypothetical_entry(layout, hypothetically, size_in_sectors))
+    if layout.partitiontable_type != _DOS:
+        return _any_overlap(entries)
+    extended = [e for e in entries if e.fstype in _DOS_EXTENDED_TYPES]
+    if not extended:
+        return _any_overlap(entries)
+    container = extended[0]
+    primaries = [e for e in entries if e.partno < _FIRST_LOGICAL_PARTNO]
+    logicals = [e for e in entries if e.partno >= _FIRST_LOGICAL_PARTNO]
+    for e in logicals:
+        if e.start < container.start or e.end > container.end:
+            return True
+    return _any_overlap(primaries) or _any_overlap(logicals)
+
+
+def _is_extended(layout, entry):
+    return layout.partitiontable_type == _DOS and entry.fstype in _DOS_EXTENDED_TYPES
+
+
+def plan_layout_changes(current, desired):
+    """Work out the fewest changes that turn one layout into another.
+
+    A partition that is in `current` but not in `desired`, or that starts
+    somewhere else in `desired`, is deleted (and, in the latter case,
+    created again). A partition that starts in the same place is resized
+    if its end has moved, and retyped if its type has changed. I do no I/O.
+
+    DOS tables need a little more care. A partition that turns from an
+    extended partition into an ordinary one, or vice versa, is deleted and
+    created again. If the extended partition is deleted, so are all of the
+    logical partitions. If a logical partition is deleted, so are all of
+    the ones after it, because logical partitions cannot be renumbered.
+
+    Args:
+        current (Layout): The layout as it is. See layout_from_record().
+        desired (Layout): The layout as you want it to be.
+
+    Returns:
+        list of LayoutChange namedtuples (op, partno, entry), in the order in
+            which they should be made: deletions (highest partno first), then
+            resizes, retypes and creations. For a deletion, `entry` is the
+            partition as it was; otherwise, as it will be. An empty list means
+            that the layouts already match.
+
+    """
+    have = {e.partno: e for e in current.partitions}
+    want = {e.partno: e for e in desired.partitions}
+    doomed = set()
+    for partno, entry in have.items():
+        wanted = want.get(partno)
+        if wanted is None or wanted.start != entry.start or \
+                _is_extended(current, entry) != _is_extended(desired, wanted):
+            doomed.add(partno)
+    if current.partitiontable_type == _DOS:
+        logicals = [p for p in have if p >= _FIRST_LOGICAL_PARTNO]
+        if any(_is_extended(current, have[p]) for p in doomed):
+            doomed.update(logicals)
+        elif doomed.intersection(logicals):
+            first = min(doomed.intersection(logicals))
+            doomed.update(p for p in logicals if p >= first)
+    changes = [LayoutChange(DELETE, p, have[p]) for p in sorted(doomed, reverse=True)]
+    resizes, retypes, creations = [], [], []
+    for partno, wanted in sorted(want.items()):
+        if partno not in have or partno in doomed:
+            creations.append(LayoutChange(CREATE, partno, wanted))
+            continue
+        if have[partno].end != wanted.end:
+            resizes.append(LayoutChange(RESIZE, partno, wanted))
+        if have[partno].fstype.lower() != wanted.fstype.lower():
+            retypes.append(LayoutChange(RETYPE, partno, wanted))
+    return changes + resizes + retypes + creations
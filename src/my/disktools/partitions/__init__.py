@@ -38,7 +38,13 @@ import json
 import os
 import string
 
-from my.disktools.both import devdiskbyxxxx_path
+from my.disktools.kernel import update_kernel_partitions
+from my.disktools.layout import layout_from_record, layout_overlaps
+from my.disktools.parttable import partno_of_node, read_partition_table, wipe_partition_table
+from my.disktools.readcache import invalidate_disk_reads
+from my.disktools.sfdiskdump import sfdisk_dump
+from my.disktools.sysfs import sysfs_has_partition, sysfs_parentnode, sysfs_partno, sysfs_siblings
+from my.disktools.transaction import DiskTransaction, normalized_fstype
 from my.exceptions import (
     StartEndAssBackwardsError,
     PartitionWasNotCreatedError,
@@ -49,6 +55,7 @@ from my.exceptions import (
     PartitionAttributeWriteFailureError,
     PartitionAttributeReadFailureError,
     PartitionTableReorderingError,
+    PartitionTableWriteError,
 )
 from my.globals import call_binary, pause_until_true, _DOS_DEFAULT, _DOS_EXTENDED, _GPT_DEFAULT,\
     _DOS
@@ -56,6 +63,8 @@ import subprocess
 import time
 import sys
 
+_MiB = 1024 * 1024
+_SFDISK_FIELDS = ("start", "size", "type")
 
 
 
@@ -72,6 +81,12 @@ class DiskPartition:
             softlinks such as /dev/disk/by-{id,partuuid,label,...}/etc.),
             but I'll always deduce the real entry (probably /dev/sdXNN
             or /dev/mmcblkXpNN) and use that as my node path.
+        partition_rec (namedtuple, optional): My entry in my disk's
+            disk_namedtuple(). If you already have it -- Disk.update()
+            does -- pass it to me and I'll fill myself in from it instead
+            of probing the disk all over again.
+        parentnode (:obj:`str`, optional): The disk to which I belong.
+            If you supply partition_rec, please supply this too.
 
     Returns:
         DiskPartition if successful; else, raise an exception.
@@ -87,11 +102,31 @@ class DiskPartition:
         * Add read- and write-locking
 
     """
+    __slots__ = (
+        "_user_specified_node",
+        "_node",
+        "_partno",
+        "_parentnode",
+        "_cache",
+        "_start",
+        "_size",
+        "_fstype",
+        "_myid",
+        "_label",
+        "_partuuid",
+        "_path",
+        "_uuid",
+    )
 
-    def __init__(self, node):
+    def __init__(self, node, partition_rec=None, parentnode=None):
         self._user_specified_node = node
         self._node = os.path.realpath(self._user_specified_node)
-        self.update()
+        self._partno = None
+        self._parentnode = parentnode
+        if partition_rec is None:
+            self.update()
+        else:
+            self._absorb(partition_rec)
         if self.parentnode is None:
             raise ValueError(
                 "%s does not belong to any disk" % self._user_specified_node
@@ -118,16 +153,30 @@ class DiskPartition:
         )
 
     def update(self):
-        """Update the fields by reading sfdisk's output and processing it."""
-        self._cache = partition_namedtuple(self.node)
+        """Update the fields by reading sfdisk's output and processing it.
+
+        If I know which disk I belong to, I read that disk's partition table
+        and nobody else's."""
+        if self._parentnode is None:
+            partition_rec = partition_namedtuple(self.node)
+        else:
+            partition_rec = find_matching_namedtuple(self._parentnode, self.node)
+            if partition_rec is None:
+                raise ValueError("Partition {node} cannot be found/analyzed".format(node=self.node))
+        self._absorb(partition_rec)
+
+    def _absorb(self, partition_rec):
+        """Fill in my fields from my entry in my disk's disk_namedtuple()."""
+        self._cache = partition_rec
+        self._partno = partno_of_node(self._cache.node)  # No need to ask sysfs
         self._start = self._cache.start  
         self._size = self._cache.size
         self._fstype = self._cache.type
-        self._myid = devdiskbyxxxx_path(self.node, "id")  if self.isdev else None
-        self._label = devdiskbyxxxx_path(self.node, "label")  if self.isdev else None
-        self._partuuid =devdiskbyxxxx_path(self.node, "partuuid") if self.isdev else None
-        self._path = devdiskbyxxxx_path(self.node, "path") if self.isdev else None
-        self._uuid = devdiskbyxxxx_path(self.node, "uuid") if self.isdev else None
+        self._myid = self._cache.myid if self.isdev else None
+        self._label = self._cache.label if self.isdev else None
+        self._partuuid = self._cache.partuuid if self.isdev else None
+        self._path = self._cache.path if self.isdev else None
+        self._uuid = self._cache.uuid if self.isdev else None
 
     @property
     def node(self):
@@ -157,13 +206,22 @@ class DiskPartition:
     
     @property
     def parentnode(self):
-        """str: The disk to which I belong."""
+        """str: The disk to which I belong.
+
+        If I am a /dev entry, sysfs tells me which disk I belong to. Only if
+        sysfs has never heard of me do I go looking through every disk's
+        partition table for myself."""
         from my.disktools.disks import namedtuples_for_all_disks
+        if self._parentnode is not None:
+            return self._parentnode
         if not self.isdev:
             return self.node.rstrip('01234567890')
         else:
             if not os.path.exists(self.node):
                 raise AttributeError("%s does not exist" % self.node)
+            parentnode = sysfs_parentnode(self.node)
+            if parentnode is not None:
+                return parentnode
             for d in namedtuples_for_all_disks():
                 for p in d.partitiontable.partitions:
                     if self.node in partition_paths(p):
@@ -180,9 +238,16 @@ class DiskPartition:
 
     @property
     def partno(self):
-        """int: My partition# in the disk to which I belong."""
-        n = deduce_partno(self.node)
-        return n
+        """int: My partition# in the disk to which I belong.
+
+        It can't change while my node stays the same. My record says what it
+        is; failing that, I look it up once."""
+        if self._partno is None:
+            n = sysfs_partno(self.node) if self.isdev else None
+            if n is None:
+                n = deduce_partno(self.node)
+            self._partno = n
+        return self._partno
 
     @partno.setter
     def partno(self, value):
@@ -192,6 +257,19 @@ class DiskPartition:
     def partno(self):
         raise AttributeError("Not permitted")
 
+    @property
+    def siblings(self):
+        """list[] of str: The /dev entries of the other partitions on my disk."""
+        return sysfs_siblings(self.node) if self.isdev else []
+
+    @siblings.setter
+    def siblings(self, value):
+        raise AttributeError("Not permitted")
+
+    @siblings.deleter
+    def siblings(self):
+        raise AttributeError("Not permitted")
+
     @property
     def start(self):
         """int: first sector# of this partition."""
@@ -350,7 +428,9 @@ def overlapping(disk_path, hypothetically=None):
     Else, return False.
 
     Note:
-        This isn't perfect. It's good but it's not perfect.
+        I read the disk once and then consult its layout (see
+            my.disktools.layout). If you already have the disk's record,
+            call layout_overlaps() yourself and save a read.
 
     Args:
         disk_path (:obj:`str`): The /dev entry (e.g. /dev/sda1) of the disk.
@@ -365,43 +445,17 @@ def overlapping(disk_path, hypothetically=None):
     """
     from my.disktools.disks import disk_namedtuple
 
-    rec = disk_namedtuple(disk_path)
-    partitions_data_lst = []
-    for partrec in rec.partitiontable.partitions:
-        p = DiskPartition(partrec.node)
-        partitions_data_lst.append([p.partno, p.start, p.end, p.fstype])
-    if len(partitions_data_lst) <= (0 if hypothetically else 1):
-        return False
-    if hypothetically:
-        hypo_partno, hypo_start, hypo_end, hypo_fstype = hypothetically
-        if hypo_partno is None:
-            hypo_partno = partitions_data_lst[-1][0] + 1
-        if hypo_start is None:
-            hypo_start = partitions_data_lst[-1][2] + 1
-        if hypo_end is None:
-            hypo_end = hypo_start + 99999999
-        partitions_data_lst.append([hypo_partno, hypo_start, hypo_end, hypo_fstype])
-    for a in range(0, len(partitions_data_lst)):
-        partnoA, startA, endA, fstypeA = partitions_data_lst[a]
-        for b in range(0, len(partitions_data_lst)):
-            partnoB, startB, endB, fstypeB = partitions_data_lst[b]
-            if (
-                a != b
-                and startA <= endB
-                and endA >= startB
-                and fstypeA != _DOS_EXTENDED
-                and fstypeB != _DOS_EXTENDED
-            ):
-                return True # FIXME: Test w/ GPT partitiontable 
-    del partnoA, partnoB
-    return False
+    return layout_overlaps(layout_from_record(disk_namedtuple(disk_path)), hypothetically)
 
 
 def delete_all_partitions(partition_path):
     """Delete all partitions from specified disk.
 
     Note:
-        None.
+        I empty the partition table myself (see wipe_partition_table()),
+        keeping the disk identifier, and then tell the kernel once. I only
+        call sfdisk if the table is one that I don't recognize. If there
+        is no partition table at all, I do nothing.
 
     Args:
         disk_path (:obj:`str`): The /dev entry of the disk in
@@ -417,20 +471,38 @@ def delete_all_partitions(partition_path):
         PartitionDeletionError: Failed to delete partition `disk_path`.
 
     """
-    realpartition_path = os.path.realpath(partition_path) 
-    os.system(
-        """sfdisk -d {partition_path}| grep -vx "{partition_path}.*[0-9] : .*"| sfdisk -f {partition_path} 2>/dev/null >/dev/null""".format(
-            partition_path=realpartition_path
+    realpartition_path = os.path.realpath(partition_path)
+    try:
+        wiped = wipe_partition_table(realpartition_path)
+    except ValueError:  # A partition table that only sfdisk understands
+        retcode, _stdout_txt, stderr_txt = call_binary(
+            ["sfdisk", "-f", "--no-tell-kernel", "--delete", realpartition_path]
         )
-    )
-    call_binary(['partprobe',realpartition_path])
+        if retcode != 0:
+            raise PartitionDeletionError(
+                "Failed to delete the partitions of %s: %s" % (realpartition_path, stderr_txt)
+            )
+        wiped = True
+    except OSError as e:
+        raise PartitionDeletionError(
+            "Failed to delete the partitions of %s: %s" % (realpartition_path, str(e))
+        ) from e
+    finally:
+        invalidate_disk_reads(realpartition_path)
+    if wiped:
+        update_kernel_partitions(realpartition_path)
 
 
 def partition_exists(disk_path, partno):
     """Does this partno# exist on this disk?
 
     Note:
-        None.
+        If the disk is a block device, I ask sysfs whether the kernel
+        knows about the partition: a partition that the table lists but
+        the kernel doesn't know about yet (or vice versa) is no use to
+        anybody, so callers wait for the kernel to catch up. Otherwise --
+        e.g. the disk is an image file -- I ask the disk's SfdiskDump (see
+        sfdisk_dump()). Neither costs a fork.
 
     Args:
         disk_path (:obj:`str`): The /dev entry of the disk or file in
@@ -445,30 +517,14 @@ def partition_exists(disk_path, partno):
         True if `disk_path` exists, False if it doesn't.
 
     """
-    _retcode, stdout_txt, _stderr_txt = call_binary(['sfdisk','-d',disk_path])
-#    if _retcode == 0:
-    relevant_lines = [r for r in stdout_txt.split('\n') if r.find(disk_path)==0 and len(disk_path) <= r.find('%d :'%partno) <= len(disk_path)+5]
-    if relevant_lines not in (None, []):
-#        relevant_line = relevant_lines[0]
-#        print("disk %s partno %d ==> %s" % (disk_path, partno, relevant_line.split(' ')[0]))
-        return True
-    return False
-
-
-def OLD_BUT_GOOD_partition_exists(disk_path, partno):
-    disk_path = os.path.realpath(disk_path)
-    res = os.system('''
-disk_path=%s
-partno=%d
-fullpartitiondev=$(sfdisk -d $disk_path | grep -x "$disk_path.*$partno :.*" | head -n1 | cut -d' ' -f1)
-[ -e "$fullpartitiondev" ] && exit 0 || exit 1
-    ''' % (disk_path, partno)) 
-    if res == 0:
-        return True
-    else:
+    in_kernel = sysfs_has_partition(disk_path, partno)
+    if in_kernel is not None:
+        return in_kernel
+    try:
+        return sfdisk_dump(disk_path).partition(partno) is not None
+    except PartitionAttributeReadFailureError:
         return False
-    
-    
+
 
 def get_partition_fstype(disk_path, partno):
     """Get partition type of partno# of the disk.
@@ -520,16 +576,7 @@ def get_disk_partition_table(disk_path):
         PartitionAttributeReadFailureError: Failed to read the partition table.
 
     """
-    disk_path = os.path.realpath(disk_path)
-    retcode, stdout_txt, _stderr_txt = call_binary(
-        param_lst=["sfdisk", "-d", disk_path], input_str=None
-    )
-    if retcode != 0:
-        # print(stderr_txt)
-        raise PartitionAttributeReadFailureError(
-            "Unable to retrieve disk partitiontable of %s" % disk_path
-        )
-    return stdout_txt
+    return sfdisk_dump(disk_path).dumps()
 
 
 def get_disk_partition_table_line(disk_path, partno):
@@ -550,19 +597,7 @@ def get_disk_partition_table_line(disk_path, partno):
         PartitionAttributeReadFailureError: Failed to read the line from the partition table.
 
     """
-    sfdisk_op_text_lst = get_disk_partition_table(disk_path).split("\n")
-    try:
-        sfdisk_op_line_number = [
-            i
-            for i in range(len(sfdisk_op_text_lst))
-            if sfdisk_op_text_lst[i].startswith(disk_path)
-            and sfdisk_op_text_lst[i].find("%d : " % partno) >= 0
-        ][0]
-    except IndexError as e:
-        raise PartitionAttributeReadFailureError(
-            "Failed to retrieve info on partition#%d from %s" % (partno, disk_path)
-        ) from e
-    return sfdisk_op_text_lst[sfdisk_op_line_number]
+    return sfdisk_dump(disk_path).line(partno)
 
 
 def get_disk_partition_field_value(disk_path, partno, fieldno):
@@ -581,19 +616,18 @@ def get_disk_partition_field_value(disk_path, partno, fieldno):
         :obj:`str`: What was found.
 
     Raises:
-        None.
+        PartitionAttributeReadFailureError: Failed to read the partition table,
+            or there's no such partition.
 
     """
-    return (
-        get_disk_partition_table_line(disk_path, partno)
-        .split(",")[fieldno]
-        .split("=")[-1]
-        .strip()
-    )
+    return str(sfdisk_dump(disk_path).get(partno, _SFDISK_FIELDS[fieldno]))
 
 
 def set_disk_partition_field_value(disk_path, partno, fieldno, newval):
-    """Set a field of a partition of a disk, using sfdisk.
+    """Set a field of a partition of a disk.
+
+    I edit a copy of the disk's SfdiskDump and write it back: natively, if
+    the disk is an image file, or with a single sfdisk call otherwise.
 
     Args:
         disk_path (:obj:`str`): The /dev entry of the disk in
@@ -609,43 +643,16 @@ def set_disk_partition_field_value(disk_path, partno, fieldno, newval):
         None.
 
     Raises:
-        None.
+        PartitionAttributeReadFailureError: There's no such partition.
+        PartitionAttributeWriteFailureError: Failed to write the new table.
 
     """
-    oldcurr_line = get_disk_partition_table_line(disk_path, partno)
-    oldval = get_disk_partition_field_value(disk_path, partno, fieldno)
-    itemno = 0
-    dct = {}
-    for this_pair in [
-        r.split("=")
-        for r in oldcurr_line.replace(" : ", " ,")
-        .replace("/dev/", "node=/dev/")
-        .split(",")
-    ]:
-        dct[itemno] = [this_pair[0].strip(), this_pair[1].strip()]
-        itemno = itemno + 1
-    if itemno != 4:
-        raise SystemError(
-            "I am unable to process the output of sfdisk. \
-There is a strange number of fields in this line. \
-disk_path=%s partno=%d fieldno=%d"
-            % (disk_path, partno, fieldno)
-        )
-    dct[fieldno + 1][1] = newval
-    newcurr_line = """%-10s: start=%12s, size=%12s, type=%s""" % (
-        dct[0][1],
-        dct[1][1],
-        dct[2][1],
-        dct[3][1],
-    )
-    old_txt = get_disk_partition_table(disk_path)
-    new_txt = old_txt.replace(oldcurr_line, newcurr_line)
-    retcode, _stdout_txt, _stderr_txt = call_binary(
-        param_lst=["sfdisk", "-f", disk_path], input_str=new_txt
-    )
-    if retcode != 0:
-        # print(stdout_txt)
-        # print(stderr_txt)
+    dump = sfdisk_dump(disk_path).copy()
+    oldval = dump.get(partno, _SFDISK_FIELDS[fieldno])
+    dump.set(partno, _SFDISK_FIELDS[fieldno], newval)
+    try:
+        dump.write(disk_path)
+    except PartitionTableWriteError as e:
         raise PartitionAttributeWriteFailureError(
             "Failed to change field {fieldno} of partno#{partno} of {disk_path} from {oldval} to {newval}".format(
                 fieldno=fieldno,
@@ -654,7 +661,10 @@ disk_path=%s partno=%d fieldno=%d"
                 oldval=oldval,
                 newval=newval,
             )
-        )
+        ) from e
+    finally:
+        invalidate_disk_reads(disk_path)
+    update_kernel_partitions(disk_path)
 
 
 def set_partition_fstype(disk_path, partno, fstype):
@@ -699,6 +709,10 @@ def add_partition_SUB(
 ):
     """Low-level subroutine to add partition to specified disk.
 
+    If the disk is an image file whose partition table I can read, I add
+    the partition with a DiskTransaction and write the table myself.
+    Otherwise, I drive fdisk.
+
     Note:
         Do not call me. Call add_partition() instead.
 
@@ -715,7 +729,8 @@ def add_partition_SUB(
         end (int, optional): The final cylinder of the partition. If it is
             unspecified, the last possible cylinder on the disk.
         fstype (:obj:`str`, optional): The hex code for fdisk to set the
-            filesystem type, broadly speaking. The default is probably 83.
+            filesystem type, broadly speaking, or an alias for it (see
+            normalized_fstype()). The default is probably 83.
         size_in_MiB (int, optional): The size of the partition in mibibibbly
             whatever.
 
@@ -723,7 +738,8 @@ def add_partition_SUB(
         None.
 
     Raises:
-        ValueError: Bad parameters supplied.
+        ValueError: Bad parameters supplied, e.g. an fstype that means
+            nothing on this disk.
 
     """
     disk_path = os.path.realpath(disk_path)
@@ -736,6 +752,19 @@ def add_partition_SUB(
         raise ValueError(
             "Specify either end=... or size_in_MIB... but don't specify both"
         )
+    from my.disktools.disks import get_partitiontable_type
+    partitiontable_type = get_partitiontable_type(disk_path)
+    if fstype is not None:
+        fstype = normalized_fstype(fstype, partitiontable_type)  # Same answer, whichever way I go
+    if os.path.isfile(disk_path) and partno is not None and read_partition_table(disk_path) is not None:
+        from my.disktools.disks import disk_namedtuple, sfdisk_output
+        txn = DiskTransaction(disk_namedtuple(disk_path), sfdisk_output(disk_path))
+        txn.add_partition(partno=partno, start=start, end=end, fstype=fstype, size_in_MiB=size_in_MiB)
+        try:
+            txn.write()
+        finally:
+            invalidate_disk_reads(disk_path)
+        return 0
     elif end is None and size_in_MiB is not None:
         end_str = "+%dM" % size_in_MiB
     elif end is not None and size_in_MiB is None:
@@ -747,8 +776,6 @@ def add_partition_SUB(
         debug_str = ""
     else:
         debug_str = " >/dev/null 2>/dev/null"
-    from my.disktools.disks import get_partitiontable_type
-    partitiontable_type = get_partitiontable_type(disk_path)
     if fstype is None and partitiontable_type == 'dos':
         fstype = _DOS_DEFAULT
     res = os.system(
@@ -761,7 +788,8 @@ def add_partition_SUB(
                 debug_str=debug_str
                 )
         )
-    call_binary(['partprobe',disk_path])
+    invalidate_disk_reads(disk_path)
+    update_kernel_partitions(disk_path)
     if fstype == None:
         pass
     elif partitiontable_type == _DOS:
@@ -773,6 +801,7 @@ def add_partition_SUB(
                 debug="" if debug else "> /dev/null 2> /dev/null",
             )
         )
+        invalidate_disk_reads(disk_path)
     else:
         sys.stderr.write("Ignoring fstype {fstype} because this is a {partitiontable_type} partitiontable\r".format(fstype=fstype, partitiontable_type=partitiontable_type))
     return res
@@ -844,7 +873,7 @@ def add_partition_SUB(
 
 
 def add_partition(
-    disk_path, partno, start, end=None, fstype=None, debug=False, size_in_MiB=None
+    disk_path, partno, start, end=None, fstype=None, debug=False, size_in_MiB=None, align=None
 ):
     """Add a partition to the specified disk.
 
@@ -867,6 +896,10 @@ def add_partition(
             filesystem type, broadly speaking. The default is probably 83.
         size_in_MiB (int, optional): The size of the partition in mibibibbly
             whatever.
+        align (int or :obj:`str`, optional): A number of sectors, or
+            ALIGN_AUTO. If specified, I choose the start (if it is
+            unspecified) and round the size to suit, as
+            DiskTransaction.add_partition() would, before I do anything.
 
     Returns:
         None.
@@ -880,7 +913,9 @@ def add_partition(
 
     """
     from my.disktools.disks import get_partitiontable_type, disk_namedtuple, get_how_many_partitions
-    if overlapping(disk_path):
+    disk_rec = disk_namedtuple(disk_path)
+    layout = layout_from_record(disk_rec)
+    if layout_overlaps(layout):
         raise PartitionsOverlapError(
             "I cannot create a new partition until you've fixed the overlapping old ones."
         )
@@ -889,6 +924,11 @@ def add_partition(
             "Specify either end=... or size_in_MIB... but don't specify both"
         )
     disk_path = os.path.realpath(disk_path)
+    if align is not None:
+        entry = DiskTransaction(disk_namedtuple(disk_path)).add_partition(
+            partno=partno, start=start, end=end, fstype=fstype, size_in_MiB=size_in_MiB, align=align
+        )
+        start, end, size_in_MiB = entry.start, entry.end, None
     if debug:
         sys.stderr.write(
             "add_partition() -- disk_path=%s; partno=%s; start=%s; end=%s; fstype=%s; size_in_MiB=%s"
@@ -905,7 +945,10 @@ def add_partition(
     if end is not None and start is not None and end <= start:
         raise StartEndAssBackwardsError("The partition must end after it starts")
     res = 0
-    if overlapping(disk_path, [partno, start, end, fstype]):
+    size_in_sectors = None
+    if size_in_MiB is not None:
+        size_in_sectors = size_in_MiB * _MiB // (disk_rec.partitiontable.sector_size or 512)
+    if layout_overlaps(layout, [partno, start, end, fstype], size_in_sectors):
         raise PartitionsOverlapError(
             "We would overlap if we tried to make this partition"
         )
@@ -945,7 +988,7 @@ def add_partition(
         )
     try:
         pause_until_true(timeout=2, test_func=(lambda x=disk_path, y=partno: partition_exists(x,y)),
-                                      nudge_func=(lambda x=disk_path: call_binary(['partprobe', x])))
+                                      nudge_func=(lambda x=disk_path: update_kernel_partitions(x)))
     except TimeoutError as e:
         raise PartitionWasNotCreatedError(
             "Failed to add partition #{partno} to {disk_path} (res={res})".format(
@@ -1046,6 +1089,11 @@ def dev_namedtuple(node):
     from my.disktools.disks import all_disk_paths
     if not os.path.exists(node):
         raise ValueError("Partition devpath %s does not exist" % node)
+    parentnode = sysfs_parentnode(node)
+    if parentnode is not None:
+        res = find_matching_namedtuple(the_disk=parentnode, the_partition=node)
+        if res is not None:
+            return res
     for this_disk_path in all_disk_paths():
         res = find_matching_namedtuple(the_disk=this_disk_path, the_partition=node)
         if res is not None:
@@ -1100,9 +1148,10 @@ Sorry."
     res = os.system(
         """sfdisk %s --del %d > /dev/null 2> /dev/null""" % (disk_path, partno)
     )
+    invalidate_disk_reads(disk_path)
     try:
         pause_until_true(timeout=5, test_func=(lambda x=disk_path, y=partno: not partition_exists(x,y)),
-                                      nudge_func=(lambda x=disk_path: call_binary(['partprobe', x])))
+                                      nudge_func=(lambda x=disk_path: update_kernel_partitions(x)))
     except TimeoutError as  e:
         raise PartitionDeletionError(
             "Failed to delete partition #{partno} to {disk_path}".format(
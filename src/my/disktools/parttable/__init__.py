@@ -0,0 +1,811 @@
+# -*- coding: utf-8 -*-
+"""my.disktools.parttable
+
+Read partition tables straight from a disk or a disk image.
+
+Created on Oct 17, 2026
+@author: Tom Blackshaw
+
+This module contains a pure-Python reader for DOS partition tables (the
+MBR plus the EBR chain of logical partitions) and for GPT partition tables
+(the protective MBR, the primary GPT header and the GPT entry array). It
+produces the same JSON-esque dictionary that `sfdisk -J` does, so the
+callers do not have to fork sfdisk just to find out what's on a disk.
+
+If I cannot make sense of the table -- it's a Sun label, say, or the GPT
+header is corrupt -- I return None. The caller is expected to fall back
+on sfdisk in that case.
+
+write_partition_table() does the opposite: it takes such a dictionary and
+writes the MBR and EBRs, or the protective MBR, both GPT headers and both
+GPT entry arrays, with pwrite(). It's meant for image files, where there
+is no kernel to tell and no need for fdisk.
+
+This module also contains the record types -- DiskRecord,
+PartitionTableRecord and PartitionRecord -- that disk_namedtuple() and
+friends hand out. They behave like the namedtuples that used to be built
+on the fly (one brand-new class per dictionary, per refresh!) but they
+are fixed, __slots__-based classes.
+
+Example:
+    $ read_partition_table('/dev/mmcblk0')
+    {'partitiontable': {'label': 'dos', 'id': '0x5452574f', 'device':
+    '/dev/mmcblk0', 'unit': 'sectors', 'sectorsize': 512, 'partitions':
+    [{'node': '/dev/mmcblk0p1', 'start': 8192, 'size': 2097152,
+    'type': '83'}]}}
+
+Todo:
+    * Add more TODOs
+
+.. _Google Python Style Guide:
+   http://google.github.io/styleguide/pyguide.html
+
+"""
+
+import hashlib
+import os
+import struct
+import uuid
+import zlib
+
+from my.globals import _DOS, _GPT
+
+_MBR_SIZE = 512
+_MBR_SIGNATURE = b"\x55\xaa"
+_MBR_DISK_ID_OFFSET = 440
+_MBR_ENTRIES_OFFSET = 446
+_MBR_ENTRY = struct.Struct("<B3sB3sII")
+_MBR_PROTECTIVE_TYPE = 0xEE
+_MBR_EXTENDED_TYPES = (0x05, 0x0F, 0x85)
+_MAX_LOGICAL_PARTITIONS = 256  # Stop me from chasing a looping EBR chain forever.
+
+_GPT_SIGNATURE = b"EFI PART"
+_GPT_HEADER = struct.Struct("<8sIIIIQQQQ16sQIII")
+_GPT_ENTRY = struct.Struct("<16s16sQQQ72s")
+_GPT_MIN_HEADER_SIZE = 92
+_GPT_MAX_ENTRIES = 4096
+_GPT_ATTRIBUTE_NAMES = {
+    0: "RequiredPartition",
+    1: "NoBlockIOProtocol",
+    2: "LegacyBIOSBootable",
+}
+_GPT_REVISION = 0x00010000
+_GPT_DEFAULT_ENTRIES = 128
+_CHS_HEADS = 255
+_CHS_SECTORS = 63
+_CHS_MAX = (1023, 254, 63)
+
+
+class _SlottedRecord:
+    """A read-only record with a fixed set of fields. Missing fields are None."""
+
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for field in self.__slots__:
+            object.__setattr__(self, field, fields.get(field))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Not permitted")
+
+    def __delattr__(self, name):
+        raise AttributeError("Not permitted")
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, f) == getattr(other, f) for f in self.__slots__
+        )
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, f) for f in self.__slots__))
+
+    def __repr__(self):
+        return "%s(%s)" % (
+            type(self).__name__,
+            ", ".join("%s=%r" % (f, getattr(self, f)) for f in self.__slots__),
+        )
+
+    def _asdict(self):
+        return {f: getattr(self, f) for f in self.__slots__}
+
+
+class PartitionRecord(_SlottedRecord):
+    """One partition, as listed in its disk's partition table.
+
+    The fields are those of one entry in sfdisk -J's 'partitions' list
+    (node, start, size, type, bootable, uuid, name, attrs) plus those that
+    enhance_the_sfdisk_output() adds (myid, label, partuuid, path, uuid).
+
+    """
+
+    __slots__ = (
+        "node",
+        "start",
+        "size",
+        "type",
+        "bootable",
+        "name",
+        "attrs",
+        "myid",
+        "label",
+        "partuuid",
+        "path",
+        "uuid",
+    )
+
+
+class PartitionTableRecord(_SlottedRecord):
+    """A disk's partition table: sfdisk -J's 'partitiontable', plus enhancements."""
+
+    __slots__ = (
+        "id",
+        "device",
+        "unit",
+        "firstlba",
+        "lastlba",
+        "sectorsize",
+        "partitions",
+        "sector_size",
+        "size_in_bytes",
+        "size_in_sectors",
+        "partitiontable_type",
+        "serno",
+        "myid",
+        "label",
+        "partuuid",
+        "path",
+        "uuid",
+        "node",
+    )
+
+
+class DiskRecord(_SlottedRecord):
+    """What disk_namedtuple() returns: rec.partitiontable.partitions[0].node etc."""
+
+    __slots__ = ("partitiontable",)
+
+
+def disk_record(json_rec):
+    """Turn a (possibly enhanced) sfdisk -J dictionary into a DiskRecord.
+
+    Args:
+        json_rec (dict): {'partitiontable': {..., 'partitions': [{...}, ...]}},
+            as returned by read_partition_table() or by sfdisk -J. Fields that
+            the record types don't know about are ignored.
+
+    Returns:
+        DiskRecord: e.g. rec.partitiontable.partitions[0].start
+
+    """
+    partitiontable = dict(json_rec["partitiontable"])
+    partitiontable["partitions"] = [
+        PartitionRecord(**p) for p in partitiontable.get("partitions", [])
+    ]
+    return DiskRecord(partitiontable=PartitionTableRecord(**partitiontable))
+
+
+def partition_node(disk_path, partno):
+    """Derive the node of partition #partno of the specified disk, sfdisk-style.
+
+    sfdisk puts a 'p' between the disk's name and the partition# if the
+    disk's name ends in a digit (e.g. /dev/mmcblk0p1, /dev/loop5p1), and
+    doesn't otherwise (e.g. /dev/sda1, /root/image.img1).
+
+    Args:
+        disk_path (:obj:`str`): The /dev entry (e.g. /dev/sda) or image path.
+        partno (int): The partition#.
+
+    Returns:
+        :obj:`str`: The partition's node, e.g. /dev/mmcblk0p2.
+
+    """
+    return "%s%s%d" % (disk_path, "p" if disk_path[-1].isdigit() else "", partno)
+
+
+def partno_of_node(node):
+    """Extract the partition# from a partition's node, e.g. 2 from /dev/mmcblk0p2."""
+    i = len(node)
+    while i > 0 and node[i - 1].isdigit():
+        i -= 1
+    return int(node[i:])
+
+
+def _sector_size_of(disk_path):
+    from my.disktools.probe import probe_geometry
+    return probe_geometry(disk_path).sector_size
+
+
+def _pread_exactly(fd, length, offset):
+    buf = os.pread(fd, length, offset)
+    if len(buf) != length:
+        raise EOFError("Short read: wanted %d bytes at offset %d" % (length, offset))
+    return buf
+
+
+def _gpt_guid(raw_bytes):
+    return str(uuid.UUID(bytes_le=raw_bytes)).upper()
+
+
+def _gpt_attrs(attrs):
+    words = [_GPT_ATTRIBUTE_NAMES[b] for b in sorted(_GPT_ATTRIBUTE_NAMES) if attrs & (1 << b)]
+    guid_bits = [str(b) for b in range(48, 64) if attrs & (1 << b)]
+    if guid_bits:
+        words.append("GUID:%s" % ",".join(guid_bits))
+    return " ".join(words)
+
+
+def _mbr_entries(sector):
+    """Return the four (bootflag, type, lba_start, nsectors) tuples of an MBR/EBR."""
+    entries = []
+    for i in range(4):
+        bootflag, _chs1, ptype, _chs2, lba_start, nsectors = _MBR_ENTRY.unpack_from(
+            sector, _MBR_ENTRIES_OFFSET + i * _MBR_ENTRY.size
+        )
+        entries.append((bootflag, ptype, lba_start, nsectors))
+    return entries
+
+
+def _gpt_header(fd, lba, sector_size):
+    """Read and verify the GPT header at the specified LBA. Return a dict, or None."""
+    try:
+        raw = _pread_exactly(fd, sector_size, lba * sector_size)
+    except EOFError:
+        return None
+    (
+        signature,
+        _revision,
+        header_size,
+        header_crc,
+        _reserved,
+        my_lba,
+        alternate_lba,
+        first_usable_lba,
+        last_usable_lba,
+        disk_guid,
+        entries_lba,
+        num_entries,
+        entry_size,
+        entries_crc,
+    ) = _GPT_HEADER.unpack_from(raw)
+    if (
+        signature != _GPT_SIGNATURE
+        or not _GPT_MIN_HEADER_SIZE <= header_size <= sector_size
+        or my_lba != lba
+        or entry_size < _GPT_ENTRY.size
+        or not 0 < num_entries <= _GPT_MAX_ENTRIES
+    ):
+        return None
+    if zlib.crc32(raw[:16] + b"\0\0\0\0" + raw[20:header_size]) != header_crc:
+        return None
+    return {
+        "raw": raw[:header_size],
+        "header_crc": header_crc,
+        "alternate_lba": alternate_lba,
+        "first_usable_lba": first_usable_lba,
+        "last_usable_lba": last_usable_lba,
+        "disk_guid": disk_guid,
+        "entries_lba": entries_lba,
+        "num_entries": num_entries,
+        "entry_size": entry_size,
+        "entries_crc": entries_crc,
+    }
+
+
+def _read_gpt(fd, disk_path, sector_size, size_in_sectors):
+    """Read the GPT (primary, or backup if the primary is broken). Return a dict or None."""
+    for lba in (1, size_in_sectors - 1):
+        hdr = _gpt_header(fd, lba, sector_size)
+        if hdr is None:
+            continue
+        try:
+            entries_raw = _pread_exactly(
+                fd, hdr["num_entries"] * hdr["entry_size"], hdr["entries_lba"] * sector_size
+            )
+        except EOFError:
+            continue
+        if zlib.crc32(entries_raw) != hdr["entries_crc"]:
+            continue
+        partitions = []
+        for i in range(hdr["num_entries"]):
+            type_guid, part_guid, first_lba, last_lba, attrs, name = _GPT_ENTRY.unpack_from(
+                entries_raw, i * hdr["entry_size"]
+            )
+            if type_guid == bytes(16):
+                continue
+            partition_rec = {
+                "node": partition_node(disk_path, i + 1),
+                "start": first_lba,
+                "size": last_lba - first_lba + 1,
+                "type": _gpt_guid(type_guid),
+                "uuid": _gpt_guid(part_guid),
+            }
+            name = name.decode("utf-16-le", errors="replace").split("\0")[0]
+            if name != "":
+                partition_rec["name"] = name
+            if attrs != 0:
+                partition_rec["attrs"] = _gpt_attrs(attrs)
+            partitions.append(partition_rec)
+        return {
+            "partitiontable": {
+                "label": _GPT,
+                "id": _gpt_guid(hdr["disk_guid"]),
+                "device": disk_path,
+                "unit": "sectors",
+                "firstlba": hdr["first_usable_lba"],
+                "lastlba": hdr["last_usable_lba"],
+                "sectorsize": sector_size,
+                "partitions": partitions,
+            }
+        }
+    return None
+
+
+def _ebr_chain(fd, sector_size, ext_start):
+    """Yield (lba, sector) for each EBR in the chain that begins at ext_start."""
+    ebr_lba = ext_start
+    visited = set()
+    while ebr_lba not in visited and len(visited) < _MAX_LOGICAL_PARTITIONS:
+        visited.add(ebr_lba)
+        try:
+            ebr = _pread_exactly(fd, _MBR_SIZE, ebr_lba * sector_size)
+        except EOFError:
+            return
+        if ebr[510:512] != _MBR_SIGNATURE:
+            return
+        yield ebr_lba, ebr
+        next_one = _mbr_entries(ebr)[1]
+        if next_one[1] not in _MBR_EXTENDED_TYPES or next_one[2] == 0:
+            return
+        ebr_lba = ext_start + next_one[2]
+
+
+def _read_dos(fd, disk_path, sector_size, mbr):
+    """Read the MBR's four primary entries and the EBR chain. Return a dict or None."""
+    partitions = []
+    primaries = _mbr_entries(mbr)
+    for partno, (bootflag, ptype, lba_start, nsectors) in enumerate(primaries, start=1):
+        if ptype == 0 or nsectors == 0:
+            continue
+        partitions.append(_dos_partition_rec(disk_path, partno, bootflag, ptype, lba_start, nsectors))
+    extended = [r for r in primaries if r[1] in _MBR_EXTENDED_TYPES and r[3] > 0]
+    if extended:
+        partno = 5
+        for ebr_lba, ebr in _ebr_chain(fd, sector_size, extended[0][2]):
+            bootflag, ptype, lba_start, nsectors = _mbr_entries(ebr)[0]
+            if ptype != 0 and nsectors != 0:
+                partitions.append(
+                    _dos_partition_rec(disk_path, partno, bootflag, ptype, ebr_lba + lba_start, nsectors)
+                )
+                partno += 1
+    return {
+        "partitiontable": {
+            "label": _DOS,
+            "id": "0x%08x" % struct.unpack_from("<I", mbr, _MBR_DISK_ID_OFFSET)[0],
+            "device": disk_path,
+            "unit": "sectors",
+            "sectorsize": sector_size,
+            "partitions": partitions,
+        }
+    }
+
+
+def _dos_partition_rec(disk_path, partno, bootflag, ptype, start, size):
+    partition_rec = {
+        "node": partition_node(disk_path, partno),
+        "start": start,
+        "size": size,
+        "type": "%x" % ptype,
+    }
+    if bootflag == 0x80:
+        partition_rec["bootable"] = True
+    return partition_rec
+
+
+def read_partition_table(disk_path, sector_size=None):
+    """Read the partition table of a disk (or image) without calling sfdisk.
+
+    I open the disk, read its MBR and -- if the MBR is a protective one --
+    its GPT header and entry array. I turn what I find into the dictionary
+    that `sfdisk -J {disk_path}` would have printed.
+
+    Args:
+        disk_path (:obj:`str`): The /dev entry (e.g. /dev/sda) or image path.
+        sector_size (int, optional): The logical sector size. If it is
+            unspecified, I'll work it out for myself.
+
+    Returns:
+        dict or None: {'partitiontable': {...}} in sfdisk's format, or None
+            if I don't recognize the partition table (or there isn't one).
+
+    Raises:
+        OSError: The disk could not be opened or read.
+
+    """
+    if sector_size is None:
+        sector_size = _sector_size_of(disk_path)
+    fd = os.open(disk_path, os.O_RDONLY)
+    try:
+        try:
+            mbr = _pread_exactly(fd, _MBR_SIZE, 0)
+        except EOFError:
+            return None
+        if mbr[510:512] != _MBR_SIGNATURE:
+            return None
+        primaries = _mbr_entries(mbr)
+        if any(bootflag not in (0x00, 0x80) for bootflag, _, __, ___ in primaries):
+            return None  # Probably a FAT boot sector, not an MBR. Let sfdisk decide.
+        if any(ptype == _MBR_PROTECTIVE_TYPE for _, ptype, __, ___ in primaries):
+            size_in_sectors = os.lseek(fd, 0, os.SEEK_END) // sector_size
+            return _read_gpt(fd, disk_path, sector_size, size_in_sectors)
+        return _read_dos(fd, disk_path, sector_size, mbr)
+    finally:
+        os.close(fd)
+
+
+def read_disk_identifier(disk_path, sector_size=None):
+    """Read the disk ID: the MBR's disk signature, or the GPT header's disk GUID.
+
+    Unlike read_partition_table(), I don't read the GPT entry array, so I
+    cost one or two sector-sized reads.
+
+    Args:
+        disk_path (:obj:`str`): The /dev entry (e.g. /dev/sda) or image path.
+        sector_size (int, optional): The logical sector size. If it is
+            unspecified, I'll work it out for myself.
+
+    Returns:
+        :obj:`str` or None: e.g. "0x1234abcd" or a GUID; None if I don't
+            recognize the partition table.
+
+    Raises:
+        OSError: The disk could not be opened or read.
+
+    """
+    if sector_size is None:
+        sector_size = _sector_size_of(disk_path)
+    fd = os.open(disk_path, os.O_RDONLY)
+    try:
+        try:
+            mbr = _pread_exactly(fd, _MBR_SIZE, 0)
+        except EOFError:
+            return None
+        if mbr[510:512] != _MBR_SIGNATURE:
+            return None
+        primaries = _mbr_entries(mbr)
+        if any(bootflag not in (0x00, 0x80) for bootflag, _, __, ___ in primaries):
+            return None
+        if not any(ptype == _MBR_PROTECTIVE_TYPE for _, ptype, __, ___ in primaries):
+            return "0x%08x" % struct.unpack_from("<I", mbr, _MBR_DISK_ID_OFFSET)[0]
+        for lba in (1, os.lseek(fd, 0, os.SEEK_END) // sector_size - 1):
+            hdr = _gpt_header(fd, lba, sector_size)
+            if hdr is not None:
+                return _gpt_guid(hdr["disk_guid"])
+        return None
+    finally:
+        os.close(fd)
+
+
+def read_table_fingerprint(disk_path, sector_size=None):
+    """Hash the parts of a disk that change whenever its partition table does.
+
+    I hash the MBR sector; if it's a protective MBR, the primary GPT
+    header's own CRC and its entry array's CRC; and if there's a DOS
+    extended partition, every EBR in its chain. That's a handful of
+    sector-sized reads -- a good deal cheaper than read_partition_table(),
+    which reads the whole GPT entry array and checks its CRC. I do not
+    check anything. If the table is corrupt, the hash still changes when
+    the table does.
+
+    Args:
+        disk_path (:obj:`str`): The /dev entry (e.g. /dev/sda) or image path.
+        sector_size (int, optional): The logical sector size. If it is
+            unspecified, I'll work it out for myself.
+
+    Returns:
+        bytes: A digest. Compare it with the last one you got.
+
+    Raises:
+        OSError: The disk could not be opened or read.
+
+    """
+    if sector_size is None:
+        sector_size = _sector_size_of(disk_path)
+    digest = hashlib.blake2b(digest_size=16)
+    fd = os.open(disk_path, os.O_RDONLY)
+    try:
+        try:
+            mbr = _pread_exactly(fd, _MBR_SIZE, 0)
+        except EOFError:
+            return digest.digest()
+        digest.update(mbr)
+        if mbr[510:512] != _MBR_SIGNATURE:
+            return digest.digest()
+        primaries = _mbr_entries(mbr)
+        if any(ptype == _MBR_PROTECTIVE_TYPE for _, ptype, __, ___ in primaries):
+            try:
+                header = _pread_exactly(fd, _GPT_MIN_HEADER_SIZE, sector_size)
+            except EOFError:
+                return digest.digest()
+            digest.update(header[:20])  # signature, revision, header size, header CRC
+            digest.update(header[88:92])  # entry array CRC
+            return digest.digest()
+        for ext in [r for r in primaries if r[1] in _MBR_EXTENDED_TYPES and r[3] > 0][:1]:
+            for _lba, ebr in _ebr_chain(fd, sector_size, ext[2]):
+                digest.update(ebr)
+        return digest.digest()
+    finally:
+        os.close(fd)
+
+
+def _gpt_attrs_value(attrs_str):
+    """The opposite of _gpt_attrs(): 'RequiredPartition GUID:60' -> 1 | (1 << 60)."""
+    value = 0
+    bits_by_name = {name: bit for bit, name in _GPT_ATTRIBUTE_NAMES.items()}
+    for word in (attrs_str or "").split():
+        if word.startswith("GUID:"):
+            for b in word[5:].split(","):
+                value |= 1 << int(b)
+        elif word in bits_by_name:
+            value |= 1 << bits_by_name[word]
+        else:
+            raise ValueError("I do not recognize the GPT attribute %s" % word)
+    return value
+
+
+def _chs(lba):
+    cylinder, rest = divmod(lba, _CHS_HEADS * _CHS_SECTORS)
+    if cylinder > _CHS_MAX[0]:
+        cylinder, head, sector = _CHS_MAX
+    else:
+        head, sector = divmod(rest, _CHS_SECTORS)
+        sector += 1
+    return bytes((head, ((cylinder >> 2) & 0xC0) | sector, cylinder & 0xFF))
+
+
+def _mbr_entry(bootflag, ptype, lba_start, nsectors):
+    if nsectors == 0:
+        return bytes(_MBR_ENTRY.size)
+    return _MBR_ENTRY.pack(
+        bootflag, _chs(lba_start), ptype, _chs(lba_start + nsectors - 1), lba_start, nsectors
+    )
+
+
+def _boot_sector(old_mbr, disk_id, entries):
+    """Build an MBR/EBR: the old boot code, a disk ID, four entries, and 55AA."""
+    sector = bytearray(_MBR_SIZE)
+    sector[:_MBR_DISK_ID_OFFSET] = old_mbr[:_MBR_DISK_ID_OFFSET]
+    struct.pack_into("<I", sector, _MBR_DISK_ID_OFFSET, disk_id)
+    for i, e in enumerate(entries):
+        offset = _MBR_ENTRIES_OFFSET + i * _MBR_ENTRY.size
+        sector[offset : offset + _MBR_ENTRY.size] = _mbr_entry(*e)
+    sector[510:512] = _MBR_SIGNATURE
+    return bytes(sector)
+
+
+def _pwrite_all(fd, data, offset):
+    while data:
+        written = os.pwrite(fd, data, offset)
+        data = data[written:]
+        offset += written
+
+
+def _write_dos(fd, table, sector_size, size_in_sectors):
+    partitions = {partno_of_node(p["node"]): p for p in table["partitions"]}
+    if any(partno < 1 for partno in partitions):
+        raise ValueError("A DOS partition table has no partition #0")
+    primaries = [(0, 0, 0, 0)] * 4
+    for partno, p in partitions.items():
+        if p["start"] + p["size"] > size_in_sectors:
+            raise ValueError("Partition #%d runs off the end of the disk" % partno)
+        if partno <= 4:
+            primaries[partno - 1] = (0x80 if p.get("bootable") else 0, int(p["type"], 16), p["start"], p["size"])
+    logicals = [partitions[partno] for partno in sorted(partitions) if partno >= 5]
+    if sorted(p for p in partitions if p >= 5) != list(range(5, 5 + len(logicals))):
+        raise ValueError("The logical partitions must be numbered 5, 6, 7...")
+    extended = [e for e in primaries if e[1] in _MBR_EXTENDED_TYPES]
+    if logicals and not extended:
+        raise ValueError("Logical partitions need an extended partition")
+    disk_id = int(table.get("id") or "0", 16)
+    old_mbr = os.pread(fd, _MBR_SIZE, 0).ljust(_MBR_SIZE, b"\0")
+    writes = [(0, _boot_sector(old_mbr, disk_id, primaries))]
+    if extended:
+        ext_start, ext_size = extended[0][2], extended[0][3]
+        ebr_lbas = [ext_start] + [prev["start"] + prev["size"] for prev in logicals[:-1]]
+        if not logicals:
+            writes.append((ext_start, _boot_sector(bytes(_MBR_SIZE), 0, [])))
+        for i, p in enumerate(logicals):
+            ebr_lba = ebr_lbas[i]
+            if not ext_start <= ebr_lba < p["start"] or p["start"] + p["size"] > ext_start + ext_size:
+                raise ValueError("Logical partition #%d does not fit in the extended partition" % (i + 5))
+            this_one = (0x80 if p.get("bootable") else 0, int(p["type"], 16), p["start"] - ebr_lba, p["size"])
+            if i + 1 < len(logicals):
+                following = logicals[i + 1]
+                next_one = (
+                    0,
+                    0x05,
+                    ebr_lbas[i + 1] - ext_start,
+                    following["start"] + following["size"] - ebr_lbas[i + 1],
+                )
+            else:
+                next_one = (0, 0, 0, 0)
+            writes.append((ebr_lba, _boot_sector(bytes(_MBR_SIZE), 0, [this_one, next_one])))
+    for lba, sector in writes:
+        _pwrite_all(fd, sector, lba * sector_size)
+
+
+def _gpt_header_bytes(sector_size, my_lba, alternate_lba, first_usable, last_usable,
+                      disk_guid, entries_lba, num_entries, entries_crc):
+    header = bytearray(sector_size)
+    fields = [
+        _GPT_SIGNATURE, _GPT_REVISION, _GPT_MIN_HEADER_SIZE, 0, 0, my_lba, alternate_lba,
+        first_usable, last_usable, disk_guid, entries_lba, num_entries, _GPT_ENTRY.size, entries_crc,
+    ]
+    _GPT_HEADER.pack_into(header, 0, *fields)
+    struct.pack_into("<I", header, 16, zlib.crc32(bytes(header[:_GPT_MIN_HEADER_SIZE])))
+    return bytes(header)
+
+
+def _write_gpt(fd, table, sector_size, size_in_sectors):
+    partitions = {partno_of_node(p["node"]): p for p in table["partitions"]}
+    num_entries = max([_GPT_DEFAULT_ENTRIES] + list(partitions))
+    if min(list(partitions) + [1]) < 1 or num_entries > _GPT_MAX_ENTRIES:
+        raise ValueError("A GPT partition table cannot have those partition#s")
+    entries_sectors = -(-num_entries * _GPT_ENTRY.size // sector_size)
+    first_usable = max(table.get("firstlba") or 0, 2 + entries_sectors)
+    last_usable = size_in_sectors - 2 - entries_sectors  # The backup goes at the (new) end.
+    array = bytearray(num_entries * _GPT_ENTRY.size)
+    for partno, p in partitions.items():
+        first, last = p["start"], p["start"] + p["size"] - 1
+        if first < first_usable or last > last_usable:
+            raise ValueError("Partition #%d lies outside sectors %d-%d" % (partno, first_usable, last_usable))
+        name = p.get("name", "").encode("utf-16-le")
+        if len(name) > 72:
+            raise ValueError("The name of partition #%d is too long" % partno)
+        _GPT_ENTRY.pack_into(
+            array,
+            (partno - 1) * _GPT_ENTRY.size,
+            uuid.UUID(p["type"]).bytes_le,
+            (uuid.UUID(p["uuid"]) if p.get("uuid") else uuid.uuid4()).bytes_le,
+            first,
+            last,
+            _gpt_attrs_value(p.get("attrs")),
+            name,
+        )
+    array = bytes(array)
+    entries_crc = zlib.crc32(array)
+    disk_guid = (uuid.UUID(table["id"]) if table.get("id") else uuid.uuid4()).bytes_le
+    backup_lba = size_in_sectors - 1
+    backup_entries_lba = backup_lba - entries_sectors
+    old_mbr = os.pread(fd, _MBR_SIZE, 0).ljust(_MBR_SIZE, b"\0")
+    protective = (0, _MBR_PROTECTIVE_TYPE, 1, min(size_in_sectors - 1, 0xFFFFFFFF))
+    _pwrite_all(fd, _boot_sector(old_mbr, 0, [protective]), 0)
+    _pwrite_all(fd, array, 2 * sector_size)
+    _pwrite_all(fd, array, backup_entries_lba * sector_size)
+    _pwrite_all(
+        fd,
+        _gpt_header_bytes(sector_size, backup_lba, 1, first_usable, last_usable,
+                          disk_guid, backup_entries_lba, num_entries, entries_crc),
+        backup_lba * sector_size,
+    )
+    _pwrite_all(  # The primary header goes last: until it's written, the old table is intact.
+        fd,
+        _gpt_header_bytes(sector_size, 1, backup_lba, first_usable, last_usable,
+                          disk_guid, 2, num_entries, entries_crc),
+        sector_size,
+    )
+
+
+def write_partition_table(disk_path, table_rec, sector_size=None):
+    """Write a whole partition table to a disk image (or disk) without calling sfdisk.
+
+    I take the same dictionary that read_partition_table() returns -- or
+    that sfdisk -J prints -- and write it to the disk. For a DOS table, I
+    write the MBR (keeping the old boot code) and one EBR per logical
+    partition: the first at the start of the extended partition, the rest
+    just after the previous logical partition. For a GPT table, I write a
+    protective MBR, the entry array twice, and both headers, with their
+    CRC32s. The backup header always goes in the disk's last sector, so an
+    image that has grown since it was partitioned has its backup header
+    moved to its new end (and its last usable sector moved with it).
+
+    Partitions without a GPT 'uuid' are given a random one; so is the disk,
+    if the table has no 'id'.
+
+    Note:
+        I do not tell the kernel. If `disk_path` is a block device, run
+        partprobe (or whatever) afterwards. If it's an image, don't bother.
+
+    Args:
+        disk_path (:obj:`str`): The image path (or /dev entry).
+        table_rec (dict): {'partitiontable': {'label': 'dos' or 'gpt',
+            'id': ..., 'partitions': [{'node': ..., 'start': ..., 'size': ...,
+            'type': ..., ...}, ...]}}. Each partition# comes from its node.
+        sector_size (int, optional): The logical sector size. If it is
+            unspecified, I'll work it out for myself.
+
+    Raises:
+        ValueError: The table is unworkable: a partition runs off the end of
+            the disk, a logical partition has nowhere to go, and so on. I
+            check all that before I write anything.
+        OSError: The disk could not be opened or written.
+
+    """
+    table = table_rec["partitiontable"]
+    if table["label"] not in (_DOS, _GPT):
+        raise ValueError("I can only write dos and gpt partition tables, not %s" % table["label"])
+    if sector_size is None:
+        sector_size = _sector_size_of(disk_path)
+    fd = os.open(disk_path, os.O_RDWR)
+    try:
+        size_in_sectors = os.lseek(fd, 0, os.SEEK_END) // sector_size
+        if table["label"] == _DOS:
+            _write_dos(fd, table, sector_size, size_in_sectors)
+        else:
+            _write_gpt(fd, table, sector_size, size_in_sectors)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _zero_ebrs(disk_path, sector_size):
+    """Zero each EBR in the DOS table's chain, so that nothing can find the old logical partitions."""
+    fd = os.open(disk_path, os.O_RDWR)
+    try:
+        mbr = _pread_exactly(fd, _MBR_SIZE, 0)
+        extended = [r for r in _mbr_entries(mbr) if r[1] in _MBR_EXTENDED_TYPES and r[3] > 0]
+        if not extended:
+            return
+        ebr_lbas = [ebr_lba for ebr_lba, _ebr in _ebr_chain(fd, sector_size, extended[0][2])]
+        for ebr_lba in ebr_lbas:  # I've followed the chain to its end before I break it.
+            _pwrite_all(fd, bytes(sector_size), ebr_lba * sector_size)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def wipe_partition_table(disk_path, sector_size=None):
+    """Delete every partition from a disk (or image) without calling sfdisk.
+
+    I read the table, empty it, and write it back (see
+    write_partition_table()): a DOS table keeps its boot code and disk
+    identifier but loses its four entries, and each EBR in its extended
+    partition is zeroed first, so that no stray logical partitions can be
+    found there later; a GPT table keeps its disk GUID
+    but has both of its entry arrays zeroed, and both headers rewritten to
+    match. The partitions' contents are left alone.
+
+    Note:
+        I do not tell the kernel.
+
+    Args:
+        disk_path (:obj:`str`): The /dev entry (e.g. /dev/sda) or image path.
+        sector_size (int, optional): The logical sector size. If it is
+            unspecified, I'll work it out for myself.
+
+    Returns:
+        bool: True if I wiped the table; False if there was no partition
+            table to wipe.
+
+    Raises:
+        ValueError: There's a partition table, but not one that I recognize.
+            Ask sfdisk instead.
+        OSError: The disk could not be opened, read or written.
+
+    """
+    if sector_size is None:
+        sector_size = _sector_size_of(disk_path)
+    table_rec = read_partition_table(disk_path, sector_size)
+    if table_rec is None:
+        fd = os.open(disk_path, os.O_RDONLY)
+        try:
+            mbr = os.pread(fd, _MBR_SIZE, 0)
+        finally:
+            os.close(fd)
+        if mbr[510:512] != _MBR_SIGNATURE:
+            return False
+        raise ValueError("I do not recognize the partition table of %s" % disk_path)
+    if table_rec["partitiontable"]["label"] == _DOS:
+        _zero_ebrs(disk_path, sector_size)
+    table_rec["partitiontable"]["partitions"] = []
+    write_partition_table(disk_path, table_rec, sector_size)
+    return True
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""my.disktools.probe
+
+Ask the kernel (not fdisk) how big a disk is and how it likes to be written.
+
+Created on Oct 17, 2026
+@author: Tom Blackshaw
+
+This module contains subroutines that probe a disk's geometry with the
+BLKGETSIZE64, BLKSSZGET, BLKPBSZGET, BLKIOMIN and BLKIOOPT ioctls, and
+read its disk identifier (the MBR disk signature or the GPT disk GUID)
+straight from the disk. Image files have no ioctls, so I stat() them and
+assume 512-byte sectors, as sfdisk does.
+
+The geometry of a disk does not change while the disk is plugged in, so I
+cache it for as long as the device lives: the cache is keyed on the block
+device's dev_t and its sysfs 'diskseq' (which changes whenever the medium
+does), or on an image file's inode and size. A kernel too old to have
+'diskseq' can't tell me when a card is swapped in the same reader, so on
+such a kernel I don't cache block devices at all. It is a ReadCache (see
+my.disktools.readcache), so it forgets the least recently used disks when
+it fills up. The disk identifier is NOT cached, because set_serno() can
+change it at any moment.
+
+A disk's fingerprint (see probe_fingerprint()) is a cheap way of telling
+whether anything about its partitions has changed since you last looked.
+
+Example:
+    $ probe_geometry('/dev/mmcblk0')
+    DiskGeometry(size_in_bytes=31914983424, size_in_sectors=62333952,
+        sector_size=512, physical_sector_size=512, io_min=512, io_opt=0)
+    $ probe_disk_identifier('/dev/mmcblk0')
+    '0x5452574f'
+
+Todo:
+    * Add more TODOs
+
+.. _Google Python Style Guide:
+   http://google.github.io/styleguide/pyguide.html
+
+"""
+
+from collections import namedtuple
+import fcntl
+import hashlib
+import os
+import stat
+import struct
+
+from my.disktools.parttable import read_disk_identifier, read_table_fingerprint
+from my.disktools.readcache import read_cache
+from my.disktools.sysfs import sysfs_partitions
+
+BLKSSZGET = 0x1268
+BLKIOMIN = 0x1278
+BLKIOOPT = 0x1279
+BLKPBSZGET = 0x127B
+BLKGETSIZE64 = 0x80081272
+
+_IMAGE_SECTOR_SIZE = 512
+_geometries = read_cache("geometry")
+
+DiskGeometry = namedtuple(
+    "DiskGeometry",
+    "size_in_bytes size_in_sectors sector_size physical_sector_size io_min io_opt",
+)
+
+
+def _ioctl_uint(fd, request, fmt="I"):
+    return struct.unpack(fmt, fcntl.ioctl(fd, request, struct.pack(fmt, 0)))[0]
+
+
+def _diskseq(st_rdev):
+    try:
+        with open(
+            "/sys/dev/block/%d:%d/diskseq" % (os.major(st_rdev), os.minor(st_rdev)),
+            "r",
+            encoding="utf-8",
+        ) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def _geometry_cache_key(disk_path):
+    st = os.stat(disk_path)
+    if stat.S_ISBLK(st.st_mode):
+        return ("blk", st.st_rdev, _diskseq(st.st_rdev))
+    return ("img", st.st_dev, st.st_ino, st.st_size)
+
+
+def probe_geometry(disk_path):
+    """Retrieve the size, sector sizes and I/O hints of the specified disk or image.
+
+    Args:
+        disk_path (:obj:`str`): The /dev entry (e.g. /dev/sda) or image path.
+
+    Returns:
+        DiskGeometry namedtuple (size_in_bytes, size_in_sectors, sector_size,
+            physical_sector_size, io_min, io_opt). Sizes are in bytes except
+            size_in_sectors, which is in (logical) sectors. io_opt is 0 if
+            the disk has no preference.
+
+    Raises:
+        OSError: The disk could not be opened or probed.
+
+    """
+    key = _geometry_cache_key(disk_path)
+    cache_key = None if key[0] == "blk" and key[2] is None else key  # No diskseq: no caching
+    return _geometries.lookup(os.path.realpath(disk_path), cache_key, lambda: _probe_geometry(disk_path, key))
+
+
+def _probe_geometry(disk_path, key):
+    if key[0] == "blk":
+        fd = os.open(disk_path, os.O_RDONLY)
+        try:
+            size_in_bytes = _ioctl_uint(fd, BLKGETSIZE64, "Q")
+            sector_size = _ioctl_uint(fd, BLKSSZGET, "i")
+            physical_sector_size = _ioctl_uint(fd, BLKPBSZGET)
+            io_min = _ioctl_uint(fd, BLKIOMIN)
+            io_opt = _ioctl_uint(fd, BLKIOOPT)
+        finally:
+            os.close(fd)
+    else:
+        size_in_bytes = key[3]
+        sector_size = physical_sector_size = io_min = _IMAGE_SECTOR_SIZE
+        io_opt = 0
+    return DiskGeometry(
+        size_in_bytes=size_in_bytes,
+        size_in_sectors=size_in_bytes // sector_size,
+        sector_size=sector_size,
+        physical_sector_size=physical_sector_size,
+        io_min=io_min,
+        io_opt=io_opt,
+    )
+
+
+def probe_disk_identifier(disk_path):
+    """Read the disk ID: the MBR's disk signature, or the GPT header's disk GUID.
+
+    Args:
+        disk_path (:obj:`str`): The /dev entry (e.g. /dev/sda) or image path.
+
+    Returns:
+        :obj:`str` or None: e.g. "0x1234abcd" (DOS) or
+            "A1B2C3D4-0000-4000-8000-0123456789AB" (GPT); or None if I don't
+            recognize the partition table.
+
+    Raises:
+        OSError: The disk could not be opened or read.
+
+    """
+    return read_disk_identifier(disk_path, probe_geometry(disk_path).sector_size)
+
+
+def probe_serno_and_geometry(disk_path):
+    """Retrieve the disk ID, disk size (bytes and sectors), and sector size.
+
+    Args:
+        disk_path (:obj:`str`): The /dev entry (e.g. /dev/sda) or image path.
+
+    Returns:
+        tuple (
+            :obj:`str` or None - the disk ID (see probe_disk_identifier()).
+            int - The maximum capacity of the disk, in bytes.
+            int - The maximum capacity of the disk, in sectors.
+            int - The size of each sector, in bytes.
+            )
+
+    Raises:
+        OSError: The disk could not be opened or probed.
+
+    """
+    geometry = probe_geometry(disk_path)
+    return (
+        read_disk_identifier(disk_path, geometry.sector_size),
+        geometry.size_in_bytes,
+        geometry.size_in_sectors,
+        geometry.sector_size,
+    )
+
+
+def probe_fingerprint(disk_path, topology=None):
+    """Fingerprint the specified disk's partition table, so that you can tell if it has changed.
+
+    The fingerprint covers the medium itself (see probe_geometry()'s cache
+    key), the partition table (see read_table_fingerprint()) and the list
+    of partitions that the kernel knows about (see sysfs_partitions()). If
+    none of those has changed, nothing that Disk.update() would find has
+    changed either. It costs a few sector-sized reads and no subprocesses.
+
+    Args:
+        disk_path (:obj:`str`): The /dev entry (e.g. /dev/sda) or image path.
+        topology (dict, optional): A block_topology() to consult. If it is
+            unspecified, I'll use the current one.
+
+    Returns:
+        :obj:`str`: A hex digest, e.g. '5d41402abc4b2a76b9719d911017c592'.
+
+    Raises:
+        OSError: The disk could not be opened or read.
+
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(_geometry_cache_key(disk_path)).encode())
+    digest.update(read_table_fingerprint(disk_path, probe_geometry(disk_path).sector_size))
+    digest.update(repr(sysfs_partitions(disk_path, topology)).encode())
+    return digest.hexdigest()
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""my.disktools.readcache
+
+Remember what a disk said, until it changes or somebody writes to it.
+
+Created on Oct 17, 2026
+@author: Tom Blackshaw
+
+sfdisk_output(), get_disk_partition_table() and probe_geometry() are asked
+the same questions about the same disks over and over -- by Disk.update(),
+by partition_exists(), by every DiskPartition -- and nothing has touched
+the disk in between. Each of them now keeps a ReadCache: one answer per
+disk, tagged with the disk's fingerprint at the time (see
+probe_fingerprint(), read_table_fingerprint()). A caller who sees the same
+fingerprint gets the remembered answer; a caller who sees a different one
+gets a fresh answer, which replaces the old one.
+
+A fingerprint covers the partition table, but not everything that fdisk
+or sfdisk might change. So every function in my.disktools.partitions and
+my.disktools.disks that writes to a disk -- adding, deleting or retyping a
+partition, setting the disk ID, resetting the table -- calls
+invalidate_disk_reads() when it's done, and the next reader asks the disk
+again. An answer that was being read while the write happened is not
+remembered.
+
+Each cache holds a few dozen disks, and forgets the least recently used
+one when it needs room. read_cache_stats() tells you how well they're
+doing.
+
+Example:
+    $ read_cache_stats()['sfdisk_output']
+    ReadCacheStats(hits=311, misses=19, evictions=0, invalidations=6, size=3, maxsize=64)
+
+Todo:
+    * Add more TODOs
+
+.. _Google Python Style Guide:
+   http://google.github.io/styleguide/pyguide.html
+
+"""
+
+from collections import OrderedDict, namedtuple
+import os
+import threading
+
+_READ_CACHE_SIZE = 64  # Disks per cache
+
+ReadCacheStats = namedtuple("ReadCacheStats", "hits misses evictions invalidations size maxsize")
+
+_read_caches = {}
+_read_caches_lock = threading.Lock()
+
+
+class ReadCache:
+    """One remembered answer per disk, tagged with the disk's fingerprint.
+
+    Args:
+        maxsize (int, optional): How many disks to remember. When I need
+            room, I forget the least recently used one.
+
+    Raises:
+        ValueError: `maxsize` is less than 1.
+
+    """
+
+    __slots__ = ("_lock", "_entries", "_maxsize", "_generation", "_hits", "_misses", "_evictions",
+                 "_invalidations")
+
+    def __init__(self, maxsize=_READ_CACHE_SIZE):
+        if maxsize < 1:
+            raise ValueError("A ReadCache must have room for at least one disk")
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._maxsize = maxsize
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def lookup(self, disk_path, fingerprint, func):
+        """Return what func() said about the disk when it last had this fingerprint, or call it now.
+
+        Args:
+            disk_path (:obj:`str`): The real path of the disk (see
+                os.path.realpath()).
+            fingerprint (hashable): The disk's current fingerprint. If it
+                is None -- e.g. the disk couldn't be read -- I call func()
+                and remember nothing.
+            func (func): Asks the disk. It should take no arguments.
+
+        Returns:
+            Whatever func() returned, now or earlier. Please don't modify it.
+
+        """
+        with self._lock:
+            entry = self._entries.get(disk_path)
+            if fingerprint is not None and entry is not None and entry[0] == fingerprint:
+                self._entries.move_to_end(disk_path)
+                self._hits += 1
+                return entry[1]
+            self._misses += 1
+            generation = self._generation
+        value = func()  # If it raises, there's nothing to remember.
+        if fingerprint is None:
+            return value
+        with self._lock:
+            if self._generation == generation:  # Nobody wrote to a disk while func() ran.
+                self._entries[disk_path] = (fingerprint, value)
+                self._entries.move_to_end(disk_path)
+                while len(self._entries) > self._maxsize:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+        return value
+
+    def invalidate(self, disk_path=None):
+        """Forget what I know about the specified disk (or, if it is unspecified, every disk)."""
+        with self._lock:
+            self._generation += 1
+            if disk_path is None:
+                self._invalidations += len(self._entries)
+                self._entries.clear()
+            elif self._entries.pop(disk_path, None) is not None:
+                self._invalidations += 1
+
+    def stats(self):
+        """ReadCacheStats: (hits, misses, evictions, invalidations, size, maxsize)."""
+        with self._lock:
+            return ReadCacheStats(self._hits, self._misses, self._evictions, self._invalidations,
+                                  len(self._entries), self._maxsize)
+
+    def clear(self):
+        """Forget everything, and zero my counters."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = self._invalidations = 0
+
+
+def read_cache(name, maxsize=_READ_CACHE_SIZE):
+    """Create a ReadCache, and register it under `name` so that writes to disks clear it.
+
+    Raises:
+        ValueError: There's a ReadCache by that name already.
+
+    """
+    with _read_caches_lock:
+        if name in _read_caches:
+            raise ValueError("There is already a read cache called %s" % name)
+        cache = _read_caches[name] = ReadCache(maxsize)
+    return cache
+
+
+def invalidate_disk_reads(disk_path=None):
+    """Forget every remembered answer about the specified disk. Call me after writing to it.
+
+    Args:
+        disk_path (:obj:`str`, optional): The disk. Any path that leads to
+            it will do. If it is unspecified, I forget about every disk.
+
+    Returns:
+        None.
+
+    """
+    from my.disktools.singleflight import forget_coalesced_disk_reads
+
+    realpath = None if disk_path is None else os.path.realpath(disk_path)
+    with _read_caches_lock:
+        caches = list(_read_caches.values())
+    for cache in caches:
+        cache.invalidate(realpath)
+    forget_coalesced_disk_reads()
+
+
+def read_cache_stats():
+    """Return {name: ReadCacheStats} for every registered cache."""
+    with _read_caches_lock:
+        caches = dict(_read_caches)
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
+def clear_read_caches():
+    """Empty every registered cache and zero its counters. Handy between provisioning runs."""
+    with _read_caches_lock:
+        caches = list(_read_caches.values())
+    for cache in caches:
+        cache.clear()
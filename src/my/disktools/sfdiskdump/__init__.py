@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""my.disktools.sfdiskdump
+
+A parsed, editable `sfdisk -d` dump.
+
+Created on Oct 17, 2026
+@author: Tom Blackshaw
+
+get_disk_partition_field_value(), partition_exists() and friends used to
+run `sfdisk -d` and pick the text apart with find() and split(','), every
+time they were called; set_disk_partition_field_value() ran sfdisk three
+times before it wrote anything. An SfdiskDump holds the same information,
+parsed: a header (label, label-id, device, unit, ...) and one dictionary
+per partition (node, start, size, type and, if present, uuid, name, attrs
+and bootable). You may edit it in memory and turn it back into text that
+sfdisk will accept -- or write it to the disk directly.
+
+sfdisk_dump() builds one per partition table and hands the same one to
+everyone who asks, until the table changes. I spot that by its fingerprint
+(see read_table_fingerprint()), which costs a few sector reads and no
+forks; and when somebody writes to the disk, I forget the dump (see
+my.disktools.readcache). The dump itself comes from read_partition_table() if possible, and
+from `sfdisk -d` if not.
+
+Example:
+    $ dump = sfdisk_dump('/dev/sda')
+    $ dump.get(1, 'type')
+    '83'
+    $ dump = dump.copy()
+    $ dump.set(1, 'type', 'c')
+    $ dump.write('/dev/sda')
+
+Todo:
+    * Add more TODOs
+
+.. _Google Python Style Guide:
+   http://google.github.io/styleguide/pyguide.html
+
+"""
+
+import copy
+import os
+import re
+
+from my.disktools.parttable import (
+    partno_of_node,
+    read_partition_table,
+    read_table_fingerprint,
+    write_partition_table,
+)
+from my.disktools.readcache import read_cache
+from my.exceptions import PartitionAttributeReadFailureError, PartitionTableWriteError
+from my.globals import call_binary
+
+# (key in sfdisk -J's dictionary, key in sfdisk -d's header, is it a number?)
+_HEADER_KEYS = (
+    ("label", "label", False),
+    ("id", "label-id", False),
+    ("device", "device", False),
+    ("unit", "unit", False),
+    ("firstlba", "first-lba", True),
+    ("lastlba", "last-lba", True),
+    ("sectorsize", "sector-size", True),
+)
+_NUMERIC_FIELDS = ("start", "size")
+_QUOTED_FIELDS = ("name", "attrs")
+_PARTITION_LINE_RX = re.compile(r"^\s*(\S+)\s*:\s*([\w-]+\s*=.*?)\s*$")
+_FIELD_RX = re.compile(r'\s*([\w-]+)\s*(?:=\s*("(?:[^"\\]|\\.)*"|[^,]*?))?\s*(?:,|$)')
+
+_sfdisk_dumps = read_cache("sfdisk_dump")
+
+
+class SfdiskDump:
+    """A partition table, as `sfdisk -d` would print it, parsed.
+
+    Args:
+        header (dict): e.g. {'label': 'dos', 'label-id': '0x1234abcd',
+            'device': '/dev/sda', 'unit': 'sectors'}. The keys are sfdisk's.
+        partitions (list of dict): One dictionary per partition, in the
+            order in which sfdisk lists them, e.g. {'node': '/dev/sda1',
+            'start': 2048, 'size': 8192, 'type': '83', 'bootable': True}.
+
+    """
+
+    __slots__ = ("header", "partitions")
+
+    def __init__(self, header, partitions):
+        self.header = header
+        self.partitions = partitions
+
+    def __repr__(self):
+        return "SfdiskDump(header=%r, partitions=%r)" % (self.header, self.partitions)
+
+    def __eq__(self, other):
+        if not isinstance(other, SfdiskDump):
+            return NotImplemented
+        return self.header == other.header and self.partitions == other.partitions
+
+    def __str__(self):
+        return self.dumps()
+
+    @classmethod
+    def loads(cls, text):
+        """Parse the output of `sfdisk -d`.
+
+        Raises:
+            ValueError: A line is neither a header line nor a partition line.
+
+        """
+        header, partitions = {}, []
+        for line in text.split("\n"):
+            if not line.strip():
+                continue
+            match = _PARTITION_LINE_RX.match(line)
+            if match:
+                partition_rec = {"node": match.group(1)}
+                for key, value in _FIELD_RX.findall(match.group(2)):
+                    if key == "bootable" and not value:
+                        partition_rec["bootable"] = True
+                    elif key in _NUMERIC_FIELDS:
+                        partition_rec[key] = int(value)
+                    elif value.startswith('"'):
+                        partition_rec[key] = value[1:-1].replace('\\"', '"')
+                    else:
+                        partition_rec[key] = value
+                partitions.append(partition_rec)
+            elif ":" in line:
+                key, value = line.split(":", 1)
+                header[key.strip()] = value.strip()
+            else:
+                raise ValueError("I do not understand this line of sfdisk's output: %s" % line)
+        return cls(header, partitions)
+
+    def dumps(self):
+        """Render me as an sfdisk script, in the format that `sfdisk -d` prints."""
+        lines = ["%s: %s" % (key, value) for key, value in self.header.items()]
+        lines.append("")
+        for p in self.partitions:
+            fields = [
+                "start=%12d" % p["start"],
+                "size=%12d" % p["size"],
+                "type=%s" % p["type"],
+            ]
+            if p.get("bootable"):
+                fields.append("bootable")
+            if "uuid" in p:
+                fields.append("uuid=%s" % p["uuid"])
+            for key in _QUOTED_FIELDS:
+                if key in p:
+                    fields.append('%s="%s"' % (key, p[key].replace('"', '\\"')))
+            lines.append("%s : %s" % (p["node"], ", ".join(fields)))
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def from_table(cls, table_rec):
+        """Build a dump from what read_partition_table() returns (or sfdisk -J prints)."""
+        table = table_rec["partitiontable"]
+        header = {}
+        for json_key, dump_key, _numeric in _HEADER_KEYS:
+            if table.get(json_key) is not None:
+                header[dump_key] = str(table[json_key])
+        partitions = [
+            {k: v for k, v in p.items() if k in ("node", "start", "size", "type", "uuid", "name", "attrs", "bootable")}
+            for p in table["partitions"]
+        ]
+        return cls(header, partitions)
+
+    def to_table(self):
+        """The inverse of from_table(): what write_partition_table() expects."""
+        table = {}
+        for json_key, dump_key, numeric in _HEADER_KEYS:
+            if dump_key in self.header:
+                table[json_key] = int(self.header[dump_key]) if numeric else self.header[dump_key]
+        table["partitions"] = copy.deepcopy(self.partitions)
+        return {"partitiontable": table}
+
+    def copy(self):
+        """Return a copy of me that you may edit without upsetting anyone else."""
+        return SfdiskDump(dict(self.header), copy.deepcopy(self.partitions))
+
+    def partition(self, partno):
+        """Return the dictionary of partition #`partno`, or None if there's no such partition."""
+        for p in self.partitions:
+            if partno_of_node(p["node"]) == partno:
+                return p
+        return None
+
+    def line(self, partno):
+        """Return partition #`partno`'s line of the dump, as `sfdisk -d` would print it.
+
+        Raises:
+            PartitionAttributeReadFailureError: There is no such partition.
+
+        """
+        return SfdiskDump({}, [self._partition_or_bust(partno)]).dumps().strip()
+
+    def get(self, partno, key):
+        """Return the `key` field (e.g. 'start', 'type', 'uuid') of partition #`partno`.
+
+        Returns:
+            The value -- an int for start and size, a str otherwise -- or None
+                if the partition does not have that field.
+
+        Raises:
+            PartitionAttributeReadFailureError: There is no such partition.
+
+        """
+        return self._partition_or_bust(partno).get(key)
+
+    def set(self, partno, key, value):
+        """Change the `key` field of partition #`partno` to `value`, in memory.
+
+        Raises:
+            PartitionAttributeReadFailureError: There is no such partition.
+
+        """
+        partition_rec = self._partition_or_bust(partno)
+        if key in _NUMERIC_FIELDS:
+            partition_rec[key] = int(value)
+        elif key == "bootable":
+            if value:
+                partition_rec[key] = True
+            else:
+                partition_rec.pop(key, None)
+        else:
+            partition_rec[key] = str(value)
+
+    def write(self, disk_path):
+        """Write me to the disk: natively if it's an image file, with one sfdisk call otherwise.
+
+        Note:
+            I do not tell the kernel.
+
+        Raises:
+            PartitionTableWriteError: The table could not be written.
+
+        """
+        disk_path = os.path.realpath(disk_path)
+        if os.path.isfile(disk_path):
+            try:
+                write_partition_table(disk_path, self.to_table())
+                return
+            except ValueError:
+                pass  # e.g. a GPT type alias that only sfdisk understands
+            except OSError as e:
+                raise PartitionTableWriteError(
+                    "Failed to write the new partition table to %s: %s" % (disk_path, str(e))
+                ) from e
+        retcode, _stdout_txt, stderr_txt = call_binary(
+            ["sfdisk", "-f", "--no-tell-kernel", disk_path], self.dumps()
+        )
+        if retcode != 0:
+            raise PartitionTableWriteError(
+                "Failed to write the new partition table to %s: %s" % (disk_path, stderr_txt)
+            )
+
+    def _partition_or_bust(self, partno):
+        partition_rec = self.partition(partno)
+        if partition_rec is None:
+            raise PartitionAttributeReadFailureError(
+                "Failed to retrieve info on partition#%d from %s" % (partno, self.header.get("device"))
+            )
+        return partition_rec
+
+
+def _read_sfdisk_dump(disk_path):
+    try:
+        table_rec = read_partition_table(disk_path)
+    except OSError:
+        table_rec = None
+    if table_rec is not None:
+        return SfdiskDump.from_table(table_rec)
+    retcode, stdout_txt, _stderr_txt = call_binary(["sfdisk", "-d", disk_path])
+    if retcode != 0:
+        return None
+    return SfdiskDump.loads(stdout_txt)
+
+
+def sfdisk_dump(disk_path):
+    """Return the parsed `sfdisk -d` of the specified disk, from the cache if it's current.
+
+    Everybody who asks about the same partition table gets the same
+    SfdiskDump. Don't edit it: edit a copy().
+
+    Args:
+        disk_path (:obj:`str`): The /dev entry of the disk (or an image file).
+
+    Returns:
+        SfdiskDump: The partition table.
+
+    Raises:
+        PartitionAttributeReadFailureError: The disk has no partition table
+            that I or sfdisk can read.
+
+    """
+    realpath = os.path.realpath(disk_path)
+    try:
+        fingerprint = read_table_fingerprint(realpath)
+    except OSError:
+        fingerprint = None
+    dump = _sfdisk_dumps.lookup(realpath, fingerprint, lambda: _read_sfdisk_dump(realpath))
+    if dump is None:
+        raise PartitionAttributeReadFailureError(
+            "Unable to retrieve disk partitiontable of %s" % disk_path
+        )
+    return dump
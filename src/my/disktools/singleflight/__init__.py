@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""my.disktools.singleflight
+
+Let concurrent readers of the same disk share one probe.
+
+Created on Oct 17, 2026
+@author: Tom Blackshaw
+
+When several threads ask disk_namedtuple(), sfdisk_output() or
+DiskPartition.update() about the same disk at the same moment -- a UI
+polling the status of every card reader, say -- each used to run its own
+probe (and, for a table that only sfdisk can read, its own sfdisk). Now the
+first caller runs the probe, and the others wait for it and share its
+result. For a short while afterwards -- the freshness window; see
+set_single_flight_freshness() -- latecomers may share it too.
+
+A probe is only shared by callers who see the same disk. The key includes
+the disk's fingerprint (see probe_fingerprint()) and the mtimes of the
+/dev/disk/by-____/ directories, which cost a few sector reads and stat()s
+to take. A caller who arrives after the partition table has changed --
+even while an older probe is still running -- starts a new probe, and
+never gets the old answer.
+
+If you give coalesced_disk_read() a ReadCache (see my.disktools.readcache),
+the answer is remembered for as long as the disk keeps the same fingerprint,
+and not just for the freshness window.
+
+Example:
+    $ set_single_flight_freshness(0.5)
+    $ rec = coalesced_disk_read('disk_namedtuple', '/dev/sda', lambda: _disk_namedtuple('/dev/sda'))
+
+Todo:
+    * Add more TODOs
+
+.. _Google Python Style Guide:
+   http://google.github.io/styleguide/pyguide.html
+
+"""
+
+import os
+import threading
+import time
+
+from my.disktools.both import _devdiskby_dir_mtimes
+from my.disktools.probe import probe_fingerprint
+
+_SINGLE_FLIGHT_FRESHNESS = 0.25  # seconds
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error", "landed")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.landed = None
+
+
+class SingleFlight:
+    """Run a function once per key, however many threads ask at the same time.
+
+    Args:
+        freshness (float, optional): For how many seconds after a call
+            finishes may newcomers share its result? If it is unspecified,
+            I use the module-wide setting (see set_single_flight_freshness()).
+            0 means that only callers who arrive while it runs share it.
+
+    """
+
+    __slots__ = ("_lock", "_flights", "_freshness")
+
+    def __init__(self, freshness=None):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._freshness = freshness
+
+    @property
+    def freshness(self):
+        """float: See above."""
+        return _SINGLE_FLIGHT_FRESHNESS if self._freshness is None else self._freshness
+
+    def do(self, key, func):
+        """Return func(), or the result of a call of it that is running (or has just run) under `key`.
+
+        If the call raises an exception, everybody who was waiting for it
+        gets the same exception; and the next caller tries again.
+
+        Args:
+            key (hashable): What the call is about.
+            func (func): The call itself. It should take no arguments.
+
+        Returns:
+            Whatever func() returned. Everybody gets the same object, so
+                please don't modify it.
+
+        """
+        freshness = self.freshness
+        now = time.monotonic()
+        with self._lock:
+            for k in [k for k, f in self._flights.items() if f.landed is not None and now - f.landed > freshness]:
+                del self._flights[k]
+            flight = self._flights.get(key)
+            joining = flight is not None and flight.error is None
+            if not joining:
+                flight = self._flights[key] = _Flight()
+        if joining:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = func()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                flight.landed = time.monotonic()
+                if (flight.error is not None or freshness <= 0) and self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def forget(self):
+        """Forget every result, so that the next caller runs a fresh call."""
+        with self._lock:
+            for k in [k for k, f in self._flights.items() if f.landed is not None]:
+                del self._flights[k]
+
+
+_disk_reads = SingleFlight()
+
+
+def single_flight_freshness():
+    """float: For how many seconds a finished disk probe may be shared with newcomers."""
+    return _SINGLE_FLIGHT_FRESHNESS
+
+
+def set_single_flight_freshness(seconds):
+    """Set for how many seconds a finished disk probe may be shared with newcomers.
+
+    Args:
+        seconds (float): 0 to share a probe only with those who arrive
+            while it's running.
+
+    Raises:
+        ValueError: `seconds` is negative.
+
+    """
+    global _SINGLE_FLIGHT_FRESHNESS  # pylint: disable=global-statement
+    if seconds < 0:
+        raise ValueError("The freshness window cannot be negative")
+    _SINGLE_FLIGHT_FRESHNESS = seconds
+    _disk_reads.forget()
+
+
+def forget_coalesced_disk_reads():
+    """Forget every finished disk probe, so that the next caller runs a fresh one.
+
+    invalidate_disk_reads() calls me after every write to a disk.
+    """
+    _disk_reads.forget()
+
+
+def coalesced_disk_read(what, disk_path, func, cache=None, topology=None):
+    """Run func() -- a read of the specified disk -- unless someone else is already doing so.
+
+    Args:
+        what (:obj:`str`): What sort of read it is, e.g. 'sfdisk_output'.
+        disk_path (:obj:`str`): The disk that it reads.
+        func (func): The read itself. It should take no arguments.
+        cache (ReadCache, optional): Where to remember the answer, keyed on
+            the disk's fingerprint (see my.disktools.readcache).
+        topology (dict, optional): A block_topology() to consult when I
+            fingerprint the disk. If it is unspecified, I'll use the current one.
+
+    Returns:
+        Whatever func() returned -- or whatever it returned for someone else
+            who asked the same question about the same disk, in the same
+            state, at the same time. Please don't modify it.
+
+    """
+    realpath = os.path.realpath(disk_path)
+    try:
+        fingerprint = probe_fingerprint(realpath, topology)
+    except OSError:
+        fingerprint = None
+    key = (what, realpath, fingerprint, _devdiskby_dir_mtimes())
+    if cache is None:
+        return _disk_reads.do(key, func)
+    return cache.lookup(realpath, None if fingerprint is None else key[2:], lambda: _disk_reads.do(key, func))
@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+"""my.disktools.sysfs
+
+Find out how disks and partitions are related, courtesy of sysfs.
+
+Created on Oct 17, 2026
+@author: Tom Blackshaw
+
+The kernel already knows which partitions belong to which disk. Every
+block device has a directory in /sys/class/block; a partition's directory
+is a softlink into its disk's directory (/sys/devices/.../block/sda/sda1)
+and contains a file called 'partition', which holds its partition#. This
+module reads all of that once, caches it as a topology map, and answers
+parent/partition#/sibling questions from the map.
+
+The map is rebuilt whenever the list of entries in /sys/class/block changes.
+
+The same attributes -- 'partition', 'size', 'ro', 'removable' and, for loop
+devices, 'loop/backing_file' -- also tell me whether a block device is a
+disk or a partition, without my having to run sfdisk on it.
+
+Example:
+    $ sysfs_parentnode('/dev/mmcblk0p2')
+    '/dev/mmcblk0'
+    $ sysfs_partno('/dev/mmcblk0p2')
+    2
+    $ sysfs_partitions('/dev/mmcblk0')
+    ['/dev/mmcblk0p1', '/dev/mmcblk0p2']
+
+Todo:
+    * Add more TODOs
+
+.. _Google Python Style Guide:
+   http://google.github.io/styleguide/pyguide.html
+
+"""
+
+from collections import namedtuple
+import os
+import threading
+
+from my.disktools.parttable import partition_node, read_partition_table
+
+_SYSFS_CLASS_BLOCK = "/sys/class/block"
+_topology = None
+_topology_key = None
+_topology_lock = threading.Lock()
+_is_a_disk_memo = {}
+
+BlockAttributes = namedtuple(
+    "BlockAttributes", "name dev partition size ro removable backing_file"
+)
+QueueLimits = namedtuple(
+    "QueueLimits", "physical_block_size optimal_io_size discard_granularity preferred_erase_size"
+)
+
+
+def _read_sysfs_int(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return int(f.read().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _read_sysfs_str(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def block_attributes(name):
+    """Read the sysfs attributes of the specified block device.
+
+    Args:
+        name (:obj:`str`): The device's name, e.g. sda, mmcblk0p1 or loop5.
+
+    Returns:
+        BlockAttributes namedtuple (name, dev, partition, size, ro, removable,
+            backing_file), or None if sysfs has never heard of the device.
+            `dev` is the 'major:minor' string; `partition` is the partition#
+            (or None if it's not a partition); `size` is in 512-byte sectors;
+            `backing_file` is None unless it's a bound loop device.
+
+    """
+    sysdir = os.path.join(_SYSFS_CLASS_BLOCK, name)
+    dev = _read_sysfs_str(os.path.join(sysdir, "dev"))
+    if dev is None:
+        return None
+    return BlockAttributes(
+        name=name,
+        dev=dev,
+        partition=_read_sysfs_int(os.path.join(sysdir, "partition")),
+        size=_read_sysfs_int(os.path.join(sysdir, "size")) or 0,
+        ro=bool(_read_sysfs_int(os.path.join(sysdir, "ro"))),
+        removable=bool(_read_sysfs_int(os.path.join(sysdir, "removable"))),
+        backing_file=_read_sysfs_str(os.path.join(sysdir, "loop", "backing_file")),
+    )
+
+
+def _has_legible_parttable(name):
+    try:
+        return read_partition_table("/dev/%s" % name) is not None
+    except OSError:
+        return False
+
+
+def sysfs_is_a_disk(node, topology=None):
+    """Figure out from sysfs whether the supplied /dev entry is a disk (True) or not (False).
+
+    A partition is not a disk; nor is a zram device; nor is an unbound loop
+    device. An sdX, vdX, hdX or mmcblkN device is a disk, as is anything
+    else that has partitions. Otherwise -- a bound loop device, say -- it's
+    a disk if it contains a partition table that I can read. I never call
+    sfdisk. I remember the answer, keyed on the device's major:minor, its
+    size and its backing file, so that I don't have to work it out again.
+
+    Args:
+        node (:obj:`str`): The /dev entry (or a softlink to it).
+        topology (dict, optional): A block_topology() to consult. If it is
+            unspecified, I'll use the current one.
+
+    Returns:
+        bool or None: True if a disk, False if not, None if sysfs has never
+            heard of `node`.
+
+    """
+    name = _sysfs_name(node)
+    attrs = None if name is None else block_attributes(name)
+    if attrs is None:
+        return None
+    memo_key = (attrs.dev, attrs.size, attrs.backing_file)
+    if _is_a_disk_memo.get(name, (None, None))[0] == memo_key:
+        return _is_a_disk_memo[name][1]
+    if topology is None:
+        topology = block_topology()
+    if attrs.partition is not None or name.startswith("zram"):
+        is_a_disk = False
+    elif name.startswith("mmc") or (len(name) >= 2 and name[1] == "d"):
+        is_a_disk = True
+    elif name.startswith("loop") and attrs.backing_file is None:
+        is_a_disk = False
+    elif sysfs_partitions("/dev/%s" % name, topology):
+        is_a_disk = True
+    elif attrs.size > 0 and _has_legible_parttable(name):
+        is_a_disk = True
+    else:
+        return False  # Don't remember this one. Someone may write a partition table to it.
+    _is_a_disk_memo[name] = (memo_key, is_a_disk)
+    return is_a_disk
+
+
+def sysfs_disk_paths(topology=None, map_func=map):
+    """Derive a complete list of disks (not partitions) from /sys/class/block.
+
+    Args:
+        topology (dict, optional): A block_topology() to consult. If it is
+            unspecified, I'll use the current one.
+        map_func (func, optional): How to run sysfs_is_a_disk() over the
+            candidates -- e.g. a thread pool's map(). See scan_disk_paths().
+
+    Returns:
+        list of strings, e.g. ['/dev/sda', '/dev/mmcblk0', '/dev/sdb'], in
+            major:minor order (as /proc/partitions would list them); or None
+            if there is no /sys/class/block to read.
+
+    """
+    if not os.path.isdir(_SYSFS_CLASS_BLOCK):
+        return None
+    if topology is None:
+        topology = block_topology()
+    candidates = []
+    for name in topology:
+        attrs = block_attributes(name)
+        if attrs is None or attrs.size == 0 or not os.path.exists("/dev/%s" % name):
+            continue
+        candidates.append((tuple(int(i) for i in attrs.dev.split(":")), "/dev/%s" % name))
+    verdicts = map_func(lambda candidate: sysfs_is_a_disk(candidate[1], topology), candidates)
+    return [node for (_dev, node), is_a_disk in sorted(zip(candidates, verdicts)) if is_a_disk]
+
+
+def block_topology():
+    """Return the topology map of all block devices, rebuilding it if it is stale.
+
+    Returns:
+        dict: {name: (parent name or None, partno or None)}, e.g.
+            {'sda': (None, None), 'sda1': ('sda', 1), 'sda2': ('sda', 2)}.
+            Please do not modify it.
+
+    """
+    global _topology, _topology_key  # pylint: disable=global-statement
+    with _topology_lock:
+        try:
+            names = tuple(sorted(os.listdir(_SYSFS_CLASS_BLOCK)))
+        except FileNotFoundError:
+            names = ()
+        if names != _topology_key:
+            topology = {}
+            for name in names:
+                partno = _read_sysfs_int(os.path.join(_SYSFS_CLASS_BLOCK, name, "partition"))
+                if partno is None:
+                    topology[name] = (None, None)
+                else:
+                    parent = os.path.basename(
+                        os.path.dirname(os.path.realpath(os.path.join(_SYSFS_CLASS_BLOCK, name)))
+                    )
+                    topology[name] = (parent, partno)
+            _topology = topology
+            _topology_key = names
+        return _topology
+
+
+def _sysfs_name(node):
+    """Turn /dev/sda1 (or a softlink to it) into sda1. Return None if it isn't in /dev."""
+    if node in (None, ""):
+        return None
+    realnode = os.path.realpath(node)
+    if not realnode.startswith("/dev/"):
+        return None
+    return os.path.basename(realnode)
+
+
+def sysfs_parentnode(node, topology=None):
+    """Return the /dev entry of the disk that the specified partition belongs to.
+
+    Args:
+        node (:obj:`str`): The /dev entry of the partition, e.g. /dev/sda1.
+        topology (dict, optional): A block_topology() to consult. If it is
+            unspecified, I'll use the current one.
+
+    Returns:
+        :obj:`str` or None: The disk's /dev entry, e.g. /dev/sda; or None if
+            sysfs does not know `node` or if `node` is not a partition.
+
+    """
+    if topology is None:
+        topology = block_topology()
+    parent, _partno = topology.get(_sysfs_name(node), (None, None))
+    return None if parent is None else "/dev/%s" % parent
+
+
+def sysfs_partno(node, topology=None):
+    """Return the partition# of the specified partition, or None if sysfs can't say."""
+    if topology is None:
+        topology = block_topology()
+    return topology.get(_sysfs_name(node), (None, None))[1]
+
+
+def sysfs_partitions(disk_node, topology=None):
+    """Return the /dev entries of the specified disk's partitions, in partition# order.
+
+    Args:
+        disk_node (:obj:`str`): The /dev entry of the disk, e.g. /dev/sda.
+        topology (dict, optional): A block_topology() to consult. If it is
+            unspecified, I'll use the current one.
+
+    Returns:
+        list of strings, e.g. ['/dev/sda1', '/dev/sda2']. If sysfs does not
+            know `disk_node`, the list is empty.
+
+    """
+    if topology is None:
+        topology = block_topology()
+    disk_name = _sysfs_name(disk_node)
+    if disk_name is None:
+        return []
+    return [
+        "/dev/%s" % name
+        for name, (parent, partno) in sorted(topology.items(), key=lambda kv: kv[1][1] or 0)
+        if parent == disk_name
+    ]
+
+
+def sysfs_has_partition(disk_node, partno):
+    """Does the kernel know about partition #`partno` of the specified disk?
+
+    I look for /sys/class/block/<disk>/<partition>, e.g. .../sda/sda1 or
+    .../mmcblk0/mmcblk0p1. That's a stat() or two: I don't build a topology.
+
+    Args:
+        disk_node (:obj:`str`): The /dev entry of the disk, e.g. /dev/sda.
+        partno (int): The partition#.
+
+    Returns:
+        True or False; or None if sysfs has never heard of `disk_node` (e.g.
+            it's an image file).
+
+    """
+    disk_name = _sysfs_name(disk_node)
+    if disk_name is None or not os.path.isdir(os.path.join(_SYSFS_CLASS_BLOCK, disk_name)):
+        return None
+    partition_name = os.path.basename(partition_node("/dev/%s" % disk_name, partno))
+    return os.path.isdir(os.path.join(_SYSFS_CLASS_BLOCK, disk_name, partition_name))
+
+
+def sysfs_queue_limits(disk_node):
+    """Read the I/O boundaries that the specified disk would like partitions to respect.
+
+    Args:
+        disk_node (:obj:`str`): The /dev entry of the disk, e.g. /dev/mmcblk0.
+
+    Returns:
+        QueueLimits namedtuple (physical_block_size, optimal_io_size,
+            discard_granularity, preferred_erase_size), all in bytes, from
+            queue/* and (for SD cards and eMMC) device/preferred_erase_size.
+            A boundary that the disk doesn't report is 0. If sysfs has
+            never heard of `disk_node` (e.g. it's an image file), None.
+
+    """
+    disk_name = _sysfs_name(disk_node)
+    if disk_name is None:
+        return None
+    sysdir = os.path.join(_SYSFS_CLASS_BLOCK, disk_name)
+    if not os.path.isdir(sysdir):
+        return None
+    return QueueLimits(
+        physical_block_size=_read_sysfs_int(os.path.join(sysdir, "queue", "physical_block_size")) or 0,
+        optimal_io_size=_read_sysfs_int(os.path.join(sysdir, "queue", "optimal_io_size")) or 0,
+        discard_granularity=_read_sysfs_int(os.path.join(sysdir, "queue", "discard_granularity")) or 0,
+        preferred_erase_size=_read_sysfs_int(os.path.join(sysdir, "device", "preferred_erase_size")) or 0,
+    )
+
+
+def sysfs_partition_extents(disk_node, topology=None):
+    """Return where the kernel thinks each of the specified disk's partitions lies.
+
+    Args:
+        disk_node (:obj:`str`): The /dev entry of the disk, e.g. /dev/sda.
+        topology (dict, optional): A block_topology() to consult. If it is
+            unspecified, I'll use the current one.
+
+    Returns:
+        dict: {partno: (start, size)}, in 512-byte sectors (whatever the
+            disk's sector size), e.g. {1: (8192, 2097152)}. Note that the
+            kernel thinks a DOS extended partition is only a sector or two
+            long.
+
+    """
+    if topology is None:
+        topology = block_topology()
+    extents = {}
+    for node in sysfs_partitions(disk_node, topology):
+        sysdir = os.path.join(_SYSFS_CLASS_BLOCK, _sysfs_name(node))
+        start = _read_sysfs_int(os.path.join(sysdir, "start"))
+        size = _read_sysfs_int(os.path.join(sysdir, "size"))
+        if start is not None and size is not None:
+            extents[sysfs_partno(node, topology)] = (start, size)
+    return extents
+
+
+def sysfs_siblings(node, topology=None):
+    """Return the /dev entries of the other partitions on the specified partition's disk."""
+    if topology is None:
+        topology = block_topology()
+    parentnode = sysfs_parentnode(node, topology)
+    if parentnode is None:
+        return []
+    realnode = os.path.realpath(node)
+    return [p for p in sysfs_partitions(parentnode, topology) if p != realnode]
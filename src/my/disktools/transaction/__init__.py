@@ -0,0 +1,642 @@
+# -*- coding: utf-8 -*-
+"""my.disktools.transaction
+
+Batch up changes to a disk's partitions and write them all at once.
+
+Created on Oct 17, 2026
+@author: Tom Blackshaw
+
+Each call to add_partition() or delete_partition() writes the partition
+table, pokes the kernel, waits for the kernel to catch up, and re-reads
+the disk. If you're laying out four partitions, that's four of each. A
+DiskTransaction collects the adds, deletes and fstype changes in memory
+instead -- checking each one against the layout as it stands so far -- and
+then writes the lot at once: straight into the file, if the disk is an
+image, or as a single sfdisk script otherwise. Disk.transaction() tells
+the kernel once (if there is a kernel to tell).
+
+Partitions that you don't touch keep their bootable flags and, on GPT,
+their PARTUUIDs, names and attributes.
+
+Example:
+    $ with disk.transaction() as t:
+    $     t.delete_all_partitions()
+    $     t.add_partition(partno=1, start=8192, size_in_MiB=512)
+    $     t.add_partition(partno=2)
+
+apply_layout() is the declarative version: you say what you want, and I
+work out the fewest adds, deletes, resizes and retypes that will get you
+there (see plan_layout_changes()). If the disk already matches, I change
+nothing, and Disk.transaction() writes nothing.
+
+Todo:
+    * Add more TODOs
+
+.. _Google Python Style Guide:
+   http://google.github.io/styleguide/pyguide.html
+
+"""
+
+import os
+import sys
+import uuid
+
+from my.disktools.alignment import aligned_end, resolve_alignment
+from my.disktools.layout import (
+    CREATE,
+    DELETE,
+    RENAME,
+    RESIZE,
+    REST,
+    RETYPE,
+    Layout,
+    LayoutChange,
+    LayoutEntry,
+    layout_from_record,
+    layout_overlaps,
+    plan_layout_changes,
+)
+from my.disktools.parttable import partition_node, write_partition_table
+from my.disktools.sfdiskdump import SfdiskDump
+from my.exceptions import (
+    ExistentPriorPartitionError,
+    MissingPriorPartitionError,
+    PartitionAttributeWriteFailureError,
+    PartitionDeletionError,
+    PartitionsOverlapError,
+    PartitionTableWriteError,
+    StartEndAssBackwardsError,
+    WeNeedAnExtendedPartitionError,
+)
+from my.globals import call_binary, _DOS, _DOS_DEFAULT, _DOS_EXTENDED_TYPES, _GPT, _GPT_DEFAULT
+
+_MiB = 1024 * 1024
+_DOS_MAX_PRIMARY = 4
+_FIRST_LOGICAL_PARTNO = 5
+_GPT_LINUX_FILESYSTEM = "0FC63DAF-8483-4772-8E79-3D69D8477DE4"
+_GPT_MAX_PARTNO = 128
+_GPT_ENTRY_SIZE = 128
+_GPT_DEFAULT_FIRSTLBA = 34
+
+# sfdisk's shortcuts (see sfdisk(8)), and the DOS codes that they stand for.
+_DOS_FSTYPE_ALIASES = {"L": "83", "S": "82", "EX": "5", "X": "85", "U": "ef", "R": "fd", "V": "8e"}
+_GPT_FSTYPE_ALIASES = {
+    "L": _GPT_LINUX_FILESYSTEM,
+    "S": "0657FD6D-A4AB-43C4-84E5-0933C84B4F4F",
+    "H": "933AC7E1-2EB4-4F13-B844-0E14E2AEF915",
+    "U": "C12A7328-F81F-11D2-BA4B-00A0C93EC93B",
+    "R": "A19D880F-05FC-4D3B-A006-743F0F84911E",
+    "V": "E6D6D379-F507-44C2-A23C-238F2A3DF928",
+    _GPT_DEFAULT: _GPT_LINUX_FILESYSTEM,  # fdisk's menu number for 'Linux filesystem'
+}
+
+
+def normalized_fstype(fstype, partitiontable_type):
+    """Turn an fstype alias into the type that the partition table actually holds.
+
+    Args:
+        fstype (:obj:`str`): A DOS hex code (e.g. "83", "0x83"), a GPT type
+            GUID, one of sfdisk's shortcuts (L, S, Ex, X, H, U, R, V), or
+            _GPT_DEFAULT. On a GPT disk, the DOS code that a shortcut stands
+            for (e.g. "83" for L) will do too.
+        partitiontable_type (:obj:`str`): _DOS or _GPT.
+
+    Returns:
+        :obj:`str`: e.g. "83" or "c" on a DOS disk, or an uppercase GUID on
+            a GPT disk, as sfdisk -J would report it.
+
+    Raises:
+        ValueError: `fstype` means nothing on this sort of partition table.
+
+    """
+    alias = str(fstype).strip().upper()
+    if partitiontable_type == _GPT:
+        dos_code = alias[2:].lower() if alias.startswith("0X") else alias.lower()
+        alias = next((k for k, v in _DOS_FSTYPE_ALIASES.items() if v == dos_code), alias)
+        if alias in _GPT_FSTYPE_ALIASES:
+            return _GPT_FSTYPE_ALIASES[alias]
+        try:
+            return str(uuid.UUID(alias)).upper()
+        except ValueError:
+            raise ValueError("%s is not a GPT partition type" % fstype) from None
+    try:
+        code = int(_DOS_FSTYPE_ALIASES.get(alias, alias), 16)
+    except ValueError:
+        raise ValueError("%s is not a DOS partition type" % fstype) from None
+    if not 0 < code <= 0xFF:
+        raise ValueError("%s is not a DOS partition type" % fstype)
+    return "%x" % code
+
+
+class DiskTransaction:
+    """A set of pending changes to one disk's partition table.
+
+    Please don't instantiate me yourself. Use Disk.transaction() instead.
+
+    Args:
+        disk_rec (DiskRecord): The disk's current record (see
+            disk_namedtuple()). I start from the layout that it describes.
+        sfdisk_rec (dict, optional): The disk's partition table, as
+            sfdisk_output() returns it. I take the bootable flags and the
+            GPT partition GUIDs, names and attributes from here, because
+            disk_rec's 'uuid' fields have been replaced by /dev/disk/by-uuid
+            softlinks. If it is unspecified, I keep only the bootable flags.
+
+    """
+
+    __slots__ = (
+        "_node",
+        "_partitiontable_type",
+        "_label_id",
+        "_sector_size",
+        "_size_in_sectors",
+        "_firstlba",
+        "_lastlba",
+        "_entries",
+        "_extras",
+        "_changed",
+    )
+
+    def __init__(self, disk_rec, sfdisk_rec=None):
+        pt = disk_rec.partitiontable
+        self._node = pt.node
+        self._partitiontable_type = pt.partitiontable_type
+        self._label_id = pt.id
+        self._sector_size = pt.sector_size or 512
+        self._size_in_sectors = pt.size_in_sectors
+        if self._partitiontable_type == _GPT:
+            self._firstlba = pt.firstlba or _GPT_DEFAULT_FIRSTLBA
+            # Not pt.lastlba: if the disk has grown since the table was written,
+            # that's stale. The backup table goes at the end of the disk as it is now.
+            entries_sectors = -(-_GPT_MAX_PARTNO * _GPT_ENTRY_SIZE // self._sector_size)
+            self._lastlba = self._size_in_sectors - 2 - entries_sectors
+        else:
+            self._firstlba = 1
+            self._lastlba = self._size_in_sectors - 1
+        if sfdisk_rec is None:
+            raw_partitions = {p.node: {"bootable": p.bootable} for p in pt.partitions}
+        else:
+            raw_partitions = {p["node"]: p for p in sfdisk_rec["partitiontable"]["partitions"]}
+        self._entries = {}
+        self._extras = {}
+        for entry, partition_rec in zip(layout_from_record(disk_rec).partitions, pt.partitions):
+            raw = raw_partitions.get(partition_rec.node, {})
+            self._entries[entry.partno] = entry
+            self._extras[entry.partno] = {
+                k: raw[k] for k in ("bootable", "uuid", "name", "attrs") if raw.get(k) is not None
+            }
+        self._changed = False
+
+    def __repr__(self):
+        return 'DiskTransaction(node="%s")' % self._node
+
+    @property
+    def node(self):
+        """str: the /dev path (or image path) of the disk."""
+        return self._node
+
+    @property
+    def changed(self):
+        """bool: True if anything has been added, deleted or changed."""
+        return self._changed
+
+    @property
+    def layout(self):
+        """Layout: the partition table as it will be, if I am committed."""
+        return Layout(
+            partitiontable_type=self._partitiontable_type,
+            partitions=tuple(self._entries[partno] for partno in sorted(self._entries)),
+        )
+
+    def _is_logical(self, partno):
+        return self._partitiontable_type == _DOS and partno >= _FIRST_LOGICAL_PARTNO
+
+    def _extended(self):
+        if self._partitiontable_type != _DOS:
+            return None
+        for partno in sorted(self._entries):
+            if self._entries[partno].fstype in _DOS_EXTENDED_TYPES:
+                return self._entries[partno]
+        return None
+
+    def _neighbours(self, partno):
+        """The partitions that share a container (the disk, or the extended partition) with partno."""
+        return [e for e in self._entries.values() if self._is_logical(e.partno) == self._is_logical(partno)]
+
+    def _would_overlap(self, partno, start, end):
+        """Would partno, at start-end, overlap a neighbour or stray out of the extended partition?
+
+        This is what layout_overlaps() would say about the pending layout
+        plus the new partition, if the pending layout doesn't overlap
+        already (validate() checks that) -- but I don't rebuild and sort
+        the layout each time a partition is added.
+        """
+        if self._is_logical(partno):
+            container = self._extended()
+            if start < container.start or end > container.end:
+                return True
+        return any(e.start <= end and start <= e.end for e in self._neighbours(partno))
+
+    def _alignment(self):
+        return max(1, _MiB // self._sector_size)
+
+    def _first_free_sector(self, partno, align=None):
+        if self._is_logical(partno):
+            # Leave room for each logical partition's EBR.
+            floor = max([e.end + 2 for e in self._neighbours(partno)] + [self._extended().start + 1])
+        else:
+            floor = max([e.end + 1 for e in self._neighbours(partno)] + [self._firstlba])
+        alignment = align or self._alignment()
+        return -(-floor // alignment) * alignment
+
+    def _last_free_sector(self, partno, start):
+        limit = self._extended().end if self._is_logical(partno) else self._lastlba
+        return min([e.start - 1 for e in self._neighbours(partno) if e.start > start] + [limit])
+
+    def _end_for_size(self, partno, start, size, alignment):
+        end = start + size - 1
+        if alignment and (not self._is_logical(partno) or self._extended() is not None):
+            end = aligned_end(start, end, alignment, self._last_free_sector(partno, start))
+        return end
+
+    def add_partition(self, partno=None, start=None, end=None, fstype=None, size_in_MiB=None, align=None):
+        """Add a partition to the pending layout.
+
+        Args:
+            partno (int, optional): The partition#. If it is unspecified, the
+                one after the last partition.
+            start (int, optional): The first sector of the partition. If it
+                is unspecified, the first MiB-aligned sector after the last
+                partition (or, for a logical partition, after the last
+                logical partition's EBR).
+            end (int, optional): The final sector of the partition. If it is
+                unspecified, the sector before the next partition, or the last
+                usable sector of the disk (or of the extended partition).
+            fstype (:obj:`str`, optional): The partition type, or an alias
+                for it (see normalized_fstype()). By default, _DOS_DEFAULT on
+                a DOS disk, 'Linux filesystem' on a GPT disk.
+            size_in_MiB (int, optional): The size of the partition in MiB.
+                Specify this or `end`, not both.
+            align (int or :obj:`str`, optional): A number of sectors, or
+                ALIGN_AUTO to choose one from the disk's erase block size and
+                so on (see my.disktools.alignment). If `start` is unspecified,
+                I round it up to a multiple of this; if `size_in_MiB` is
+                specified, I round the size up (or, if there's no room, down)
+                to a multiple of it too. By default, I round `start` up to a
+                multiple of 1 MiB and leave the size alone.
+
+        Returns:
+            LayoutEntry: The partition as it will be, with the blanks filled in.
+
+        Raises:
+            ValueError: Bad parameters supplied.
+            PartitionsOverlapError: The partition would overlap another one.
+            StartEndAssBackwardsError: The start and end numbers are backwards.
+            MissingPriorPartitionError: We can't create #N if #(N-1) is missing.
+            ExistentPriorPartitionError: We can't create an existing partition.
+            WeNeedAnExtendedPartitionError: A logical partition needs an
+                extended partition to live in.
+
+        """
+        if end is not None and size_in_MiB is not None:
+            raise ValueError("Specify either end=... or size_in_MIB... but don't specify both")
+        if partno is None:
+            partno = max(self._entries) + 1 if self._entries else 1
+        if partno in self._entries:
+            raise ExistentPriorPartitionError(
+                "Partition #%d of %s already exists" % (partno, self._node)
+            )
+        if self._partitiontable_type == _DOS:
+            if partno < 1 or _DOS_MAX_PRIMARY < partno < _FIRST_LOGICAL_PARTNO:
+                raise ValueError("%s cannot have a partition #%d" % (self._node, partno))
+            if partno >= _FIRST_LOGICAL_PARTNO and self._extended() is None:
+                raise WeNeedAnExtendedPartitionError(
+                    "I cannot add logical partition #%d to %s: it has no extended partition" % (partno, self._node)
+                )
+            if partno > _FIRST_LOGICAL_PARTNO and partno - 1 not in self._entries:
+                raise MissingPriorPartitionError(
+                    "Because partition #%d of %s does not exist, I cannot create #%d."
+                    % (partno - 1, self._node, partno)
+                )
+            if fstype is None:
+                fstype = _DOS_DEFAULT
+        else:
+            if not 1 <= partno <= _GPT_MAX_PARTNO:
+                raise ValueError("%s cannot have a partition #%d" % (self._node, partno))
+            if fstype is None:
+                fstype = _GPT_LINUX_FILESYSTEM
+        fstype = normalized_fstype(fstype, self._partitiontable_type)
+        alignment = resolve_alignment(self._node, self._sector_size, align)
+        if start is None:
+            start = self._first_free_sector(partno, alignment)
+        if size_in_MiB is not None:
+            end = self._end_for_size(partno, start, size_in_MiB * _MiB // self._sector_size, alignment)
+        elif end is None:
+            end = self._last_free_sector(partno, start)
+        if end <= start:
+            raise StartEndAssBackwardsError("The partition must end after it starts")
+        if start < self._firstlba or end > self._lastlba:
+            raise ValueError(
+                "Partition #%d (%d-%d) would not fit on %s (%d-%d)"
+                % (partno, start, end, self._node, self._firstlba, self._lastlba)
+            )
+        if self._would_overlap(partno, start, end):
+            raise PartitionsOverlapError("We would overlap if we tried to make this partition")
+        entry = LayoutEntry(partno=partno, start=start, end=end, fstype=fstype)
+        self._entries[partno] = entry
+        self._extras[partno] = {}
+        self._changed = True
+        return entry
+
+    def delete_partition(self, partno):
+        """Remove a partition from the pending layout.
+
+        If it's a DOS extended partition, its logical partitions go too.
+
+        Args:
+            partno (int): The partition# to be deleted.
+
+        Raises:
+            PartitionDeletionError: Deleting it would renumber the logical
+                partitions that follow it.
+
+        """
+        if partno not in self._entries:
+            sys.stderr.write(
+                "No need to delete partition #%d from %s --- that partition does not exist\r"
+                % (partno, self._node)
+            )
+            return
+        if self._is_logical(partno) and partno + 1 in self._entries:
+            raise PartitionDeletionError(
+                "Partition #%d of %s exists. I'm sorry, but I can't delete #%d w/o screwing up \
+the order of the logical partitions." % (partno + 1, self._node, partno)
+            )
+        doomed = [partno]
+        if self._extended() == self._entries[partno]:
+            doomed += [p for p in self._entries if self._is_logical(p)]
+        for p in doomed:
+            del self._entries[p]
+            del self._extras[p]
+        self._changed = True
+
+    def delete_all_partitions(self):
+        """Remove every partition from the pending layout."""
+        if self._entries:
+            self._entries.clear()
+            self._extras.clear()
+            self._changed = True
+
+    def set_fstype(self, partno, fstype):
+        """Change the type of a partition in the pending layout.
+
+        Raises:
+            ValueError: `fstype` means nothing on this disk (see
+                normalized_fstype()).
+            PartitionAttributeWriteFailureError: There is no such partition,
+                or the change would turn an extended partition into an
+                ordinary one (or vice versa).
+
+        """
+        entry = self._entries.get(partno)
+        if entry is None:
+            raise PartitionAttributeWriteFailureError(
+                "Unable to change fstype of partno#%d of %s: no such partition" % (partno, self._node)
+            )
+        fstype = normalized_fstype(fstype, self._partitiontable_type)
+        if self._partitiontable_type == _DOS and (entry.fstype in _DOS_EXTENDED_TYPES) != (
+            fstype in _DOS_EXTENDED_TYPES
+        ):
+            raise PartitionAttributeWriteFailureError(
+                "Unable to change fstype of partno#%d of %s from %s to %s" % (partno, self._node, entry.fstype, fstype)
+            )
+        self._entries[partno] = entry._replace(fstype=fstype)
+        self._changed = True
+
+    def resize_partition(self, partno, end):
+        """Move the final sector of a partition in the pending layout.
+
+        Its start, type, PARTUUID and so on stay as they are.
+
+        Raises:
+            PartitionAttributeWriteFailureError: There is no such partition.
+            StartEndAssBackwardsError: The partition would end before it starts.
+            PartitionsOverlapError: The partition would overlap another one.
+
+        """
+        entry = self._entries.get(partno)
+        if entry is None:
+            raise PartitionAttributeWriteFailureError(
+                "Unable to resize partno#%d of %s: no such partition" % (partno, self._node)
+            )
+        if end <= entry.start:
+            raise StartEndAssBackwardsError("The partition must end after it starts")
+        if end > self._lastlba:
+            raise ValueError("Partition #%d would run off the end of %s" % (partno, self._node))
+        others = Layout(
+            partitiontable_type=self._partitiontable_type,
+            partitions=tuple(e for e in self.layout.partitions if e.partno != partno),
+        )
+        if layout_overlaps(others, [partno, entry.start, end, entry.fstype]):
+            raise PartitionsOverlapError("We would overlap if we resized partition #%d" % partno)
+        self._entries[partno] = entry._replace(end=end)
+        self._changed = True
+
+    def set_name(self, partno, name):
+        """Change the name of a GPT partition in the pending layout.
+
+        Raises:
+            PartitionAttributeWriteFailureError: There is no such partition,
+                or the disk's partition table is not a GPT one.
+
+        """
+        if partno not in self._entries or self._partitiontable_type != _GPT:
+            raise PartitionAttributeWriteFailureError(
+                "Unable to name partno#%d of %s" % (partno, self._node)
+            )
+        self._extras[partno]["name"] = name
+        self._changed = True
+
+    def _scratch(self):
+        """An empty copy of me, for working out where things would go."""
+        scratch = object.__new__(DiskTransaction)
+        for attr in DiskTransaction.__slots__:
+            setattr(scratch, attr, getattr(self, attr))
+        scratch._entries, scratch._extras = {}, {}
+        return scratch
+
+    def desired_layout(self, specs):
+        """Turn a list of PartitionSpecs into the Layout that they describe.
+
+        I lay the partitions out in partition# order, on an empty disk, with
+        the same rules as add_partition(): a partition with no `start` goes
+        at the first free sector after the previous partition, rounded up to
+        a multiple of `align` (sectors, or ALIGN_AUTO); a partition with an
+        `align` has its `size` rounded to a multiple of it too; and a
+        partition whose `size` is REST (or unspecified) runs up to the next
+        partition, or to the end of the disk. A partition whose `fstype` is
+        None keeps the type that it has now, if it exists already, or gets
+        the default type if it doesn't. Nothing is changed.
+
+        Args:
+            specs (list of PartitionSpec): (partno, start, size, fstype, name,
+                align). `size` is in sectors.
+
+        Returns:
+            Layout: Where the partitions would go.
+
+        """
+        scratch = self._scratch()
+        for spec in sorted(specs, key=lambda sp: sp.partno):
+            alignment = resolve_alignment(self._node, self._sector_size, spec.align)
+            start = spec.start
+            if start is None:
+                start = scratch._first_free_sector(spec.partno, alignment)
+            end = None
+            if spec.size not in (None, REST):
+                end = scratch._end_for_size(spec.partno, start, spec.size, alignment)
+            fstype = spec.fstype
+            if fstype is None and spec.partno in self._entries:
+                fstype = self._entries[spec.partno].fstype
+            scratch.add_partition(partno=spec.partno, start=start, end=end, fstype=fstype)
+        return scratch.layout
+
+    def apply_layout(self, specs):
+        """Make the pending layout look like `specs`, with as few changes as possible.
+
+        See desired_layout() and plan_layout_changes(). Partitions that are
+        resized or retyped keep their PARTUUIDs. A spec whose `fstype` is
+        None leaves the partition's type alone, and one whose `name` is None
+        leaves its name alone.
+
+        Args:
+            specs (list of PartitionSpec): The partitions that you want.
+
+        Returns:
+            list of LayoutChange namedtuples: What I did. If it's empty, the
+                layout already matched and I've changed nothing.
+
+        """
+        changes = plan_layout_changes(self.layout, self.desired_layout(specs))
+        for change in changes:
+            if change.op == DELETE:
+                if change.partno in self._entries:  # Its extended partition may have taken it already
+                    self.delete_partition(change.partno)
+            elif change.op == RESIZE:
+                self.resize_partition(change.partno, change.entry.end)
+            elif change.op == RETYPE:
+                self.set_fstype(change.partno, change.entry.fstype)
+            elif change.op == CREATE:
+                e = change.entry
+                self.add_partition(partno=e.partno, start=e.start, end=e.end, fstype=e.fstype)
+        for spec in specs:
+            if spec.name is not None and self._extras[spec.partno].get("name") != spec.name:
+                self.set_name(spec.partno, spec.name)
+                changes.append(LayoutChange(RENAME, spec.partno, self._entries[spec.partno]))
+        return changes
+
+    def validate(self):
+        """Check the pending layout as a whole.
+
+        Raises:
+            PartitionsOverlapError: Two or more partitions overlap.
+            MissingPriorPartitionError: There's a gap in the logical partitions.
+            WeNeedAnExtendedPartitionError: There are logical partitions but
+                no extended partition.
+
+        """
+        if layout_overlaps(self.layout):
+            raise PartitionsOverlapError("The partitions in the new layout of %s overlap" % self._node)
+        logicals = sorted(p for p in self._entries if self._is_logical(p))
+        if logicals and self._extended() is None:
+            raise WeNeedAnExtendedPartitionError("%s would have logical partitions but no extended one" % self._node)
+        if logicals != list(range(_FIRST_LOGICAL_PARTNO, _FIRST_LOGICAL_PARTNO + len(logicals))):
+            raise MissingPriorPartitionError("The logical partitions of %s would not be contiguous" % self._node)
+
+    def table(self):
+        """Render the pending layout as an sfdisk -J-style dictionary.
+
+        Returns:
+            dict: {'partitiontable': {...}}, as read_partition_table() returns
+                and write_partition_table() expects.
+
+        """
+        partitions = []
+        for entry in self.layout.partitions:
+            partition_rec = {
+                "node": partition_node(self._node, entry.partno),
+                "start": entry.start,
+                "size": entry.end - entry.start + 1,
+                "type": entry.fstype,
+            }
+            partition_rec.update(self._extras[entry.partno])
+            partitions.append(partition_rec)
+        table = {
+            "label": self._partitiontable_type,
+            "device": self._node,
+            "unit": "sectors",
+            "partitions": partitions,
+        }
+        if self._label_id:
+            table["id"] = self._label_id
+        if self._partitiontable_type == _GPT:
+            table["firstlba"] = self._firstlba
+            table["lastlba"] = self._lastlba
+        return {"partitiontable": table}
+
+    def sfdisk_script(self):
+        """Render the pending layout as an sfdisk script.
+
+        Returns:
+            :obj:`str`: The script, in the format that `sfdisk -d` prints.
+
+        """
+        return SfdiskDump.from_table(self.table()).dumps()
+
+    def write(self):
+        """Validate the pending layout and write it to the disk in one go.
+
+        If the disk is an image file, I write the table myself (see
+        write_partition_table()): no sfdisk, no loop device. Otherwise --
+        or if the table has something in it that only sfdisk understands --
+        I feed sfdisk one script. Either way, I do not tell the kernel;
+        Disk.transaction() does that, once, if there's a kernel to tell.
+
+        Raises:
+            PartitionTableWriteError: The new table could not be written.
+
+        """
+        if self.write_natively():
+            return
+        retcode, _stdout_txt, stderr_txt = call_binary(
+            ["sfdisk", "-f", "--no-tell-kernel", self._node], self.sfdisk_script()
+        )
+        if retcode != 0:
+            raise PartitionTableWriteError(
+                "Failed to write the new partition table to %s: %s" % (self._node, stderr_txt)
+            )
+
+    def write_natively(self):
+        """Validate the pending layout and, if the disk is an image file, write it myself.
+
+        Returns:
+            bool: True if I wrote it; False if the job needs sfdisk (see
+                write()), because the disk is a device or the table has
+                something in it that only sfdisk understands.
+
+        Raises:
+            PartitionTableWriteError: The new table could not be written.
+
+        """
+        self.validate()
+        if not os.path.isfile(self._node):
+            return False
+        try:
+            write_partition_table(self._node, self.table(), self._sector_size)
+            return True
+        except ValueError:
+            return False  # e.g. a GPT type alias that only sfdisk understands
+        except OSError as e:
+            raise PartitionTableWriteError(
+                "Failed to write the new partition table to %s: %s" % (self._node, str(e))
+            ) from e
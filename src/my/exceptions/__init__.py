@@ -335,6 +335,27 @@ class PartitionTableCannotReadError(PartitionModificationError):
         self.code = code
 
 
+class PartitionTableWriteError(PartitionModificationError):
+    """Raised if we cannot write a whole new partition table to a disk.
+
+    Note:
+        None.
+
+    Args:
+        msg (str): Human readable string describing the exception.
+        code (:obj:`int`, optional): Error code.
+
+    Attributes:
+        msg (str): Human readable string describing the exception.
+        code (int): Exception error code.
+
+    """
+
+    def __init__(self, msg, code=None):  # pylint: disable=super-init-not-called
+        self.msg = msg
+        self.code = code
+
+
 class SernoSettingFailureError(MyDisktoolsOtherException):
     """Raised if set_serno() failed to set the serial number of the disk.
 
@@ -15,18 +15,33 @@ Todo:
 
 """
 
+import asyncio
+from contextlib import contextmanager
+import ctypes
+import functools
+import os
 import subprocess
 import random
+import select
+import selectors
 import string
+import threading
 import time
 
+from my.calllog import CallRecord, record_call
 
 _DOS = 'dos'
 _GPT = 'gpt'
 _DOS_EXTENDED = "5" 
+_DOS_EXTENDED_TYPES = (_DOS_EXTENDED, "f", "85")  # CHS, LBA and Linux extended partitions
 _DOS_DEFAULT = "83"
 _GPT_DEFAULT = "20"
 
+_PAUSE_WATCH_PATHS = ("/dev", "/sys/class/block")
+_PAUSE_FIRST_INTERVAL = 0.005
+_PAUSE_MAX_INTERVAL = 0.25
+_INOTIFY_MASK = 0x4 | 0x40 | 0x80 | 0x100 | 0x200  # IN_ATTRIB|IN_MOVED_FROM|IN_MOVED_TO|IN_CREATE|IN_DELETE
+
 
 
 def generate_random_string(length):
@@ -62,6 +77,10 @@ def call_binary(param_lst, input_str=None):
         retcode_int, stdout_txt, stderr_txt, stdout_txt = call_binary(['fdisk', '/dev/sda'], '''l
 q
 ''')
+    Note:
+        I record what I ran, and what it cost, in the call log (see
+            my.calllog and call_log_summary()).
+
     Raises:
         FileNotFoundError: Binary not found.
 
@@ -76,38 +95,216 @@ q
             "call_binary()'s first parameter should be a list or tuple, \
 e.g. ['fdisk', '/dev/sda']."
         )
+    input_bytes = bytes(input_str, "ascii")
+    started = time.time()
+    began = time.perf_counter()
     proc = subprocess.Popen(
         param_lst, stderr=subprocess.PIPE, stdin=subprocess.PIPE, stdout=subprocess.PIPE
     )
-    res_pair = proc.communicate(bytes(input_str, "ascii"))
+    res_pair = (b"", b"")
+    try:
+        res_pair = _exchange_with_child(proc, input_bytes)
+    finally:
+        # Whatever happened, reap the child (closing its pipes first, so that it can't block on them) and log it.
+        for f in (proc.stdin, proc.stdout, proc.stderr):
+            try:
+                f.close()
+            except OSError:
+                pass
+        _pid, status, rusage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        record_call(
+            CallRecord(
+                binary=os.path.basename(str(param_lst[0])),
+                argv=[str(i) for i in param_lst],
+                returncode=proc.returncode,
+                started=started,
+                wall_time=time.perf_counter() - began,
+                user_time=rusage.ru_utime,
+                system_time=rusage.ru_stime,
+                max_rss=rusage.ru_maxrss,
+                stdout_bytes=len(res_pair[0]),
+                stderr_bytes=len(res_pair[1]),
+            )
+        )
     to_be_returned = (
         proc.returncode,
-        (None if res_pair[0] is None else res_pair[0].decode("UTF-8")),
-        (None if res_pair[1] is None else res_pair[1].decode("UTF-8")),
+        res_pair[0].decode("UTF-8"),
+        res_pair[1].decode("UTF-8"),
     )
-    with open('/tmp/call_binary.txt', 'a+') as f:
-        for i in param_lst:
-            f.write('%s ' % i)
-        f.write('    ==> %d\n' % to_be_returned[0]) 
     return to_be_returned
 
 
+async def async_call_binary(param_lst, input_str=None):
+    """Do what call_binary() does, without blocking the event loop.
+
+    I run the binary with asyncio.create_subprocess_exec(), so one event
+    loop can run sfdisk on dozens of disks at once, with no thread per disk.
+
+    Note:
+        I record the call in the call log (see my.calllog), as call_binary()
+            does. asyncio reaps the child, not me, so I can't record its
+            CPU time or memory use: those fields are None.
+
+    Args:
+        param_lst (list of str): The binary and its parameters, e.g.
+            ['sfdisk', '-J', '/dev/sda'].
+        input_str (:obj:`str`, optional): What to send to its stdin.
+
+    Returns:
+        tuple (int, :obj:`str`, :obj:`str`): The return code, stdout and stderr.
+
+    Example:
+        retcode, stdout_txt, stderr_txt = await async_call_binary(['sfdisk', '-J', '/dev/sda'])
+
+    Raises:
+        ValueError: `param_lst` is not a list or tuple.
+        FileNotFoundError: Binary not found.
+
+    """
+    if input_str is None:
+        input_str = ""
+    if type(param_lst) not in (list, tuple):
+        raise ValueError(
+            "async_call_binary()'s first parameter should be a list or tuple, \
+e.g. ['fdisk', '/dev/sda']."
+        )
+    started = time.time()
+    began = time.perf_counter()
+    proc = await asyncio.create_subprocess_exec(
+        *param_lst, stderr=subprocess.PIPE, stdin=subprocess.PIPE, stdout=subprocess.PIPE
+    )
+    stdout_bytes, stderr_bytes = await proc.communicate(bytes(input_str, "ascii"))
+    record_call(
+        CallRecord(
+            binary=os.path.basename(str(param_lst[0])),
+            argv=[str(i) for i in param_lst],
+            returncode=proc.returncode,
+            started=started,
+            wall_time=time.perf_counter() - began,
+            user_time=None,
+            system_time=None,
+            max_rss=None,
+            stdout_bytes=len(stdout_bytes),
+            stderr_bytes=len(stderr_bytes),
+        )
+    )
+    return proc.returncode, stdout_bytes.decode("UTF-8"), stderr_bytes.decode("UTF-8")
+
+
+def _exchange_with_child(proc, input_bytes):
+    """Do what proc.communicate() does, but leave the child unreaped.
+
+    That way, call_binary() can reap it with os.wait4() and find out how
+    much CPU time and memory it used.
+
+    Returns:
+        tuple (bytes, bytes): What the child wrote to stdout and stderr.
+
+    """
+    output = {proc.stdout: [], proc.stderr: []}
+    pending = memoryview(input_bytes)
+    with selectors.DefaultSelector() as selector:
+        for f in output:
+            selector.register(f, selectors.EVENT_READ)
+        if pending:
+            selector.register(proc.stdin, selectors.EVENT_WRITE)
+        else:
+            proc.stdin.close()
+        while selector.get_map():
+            for key, _events in selector.select():
+                if key.fileobj is proc.stdin:
+                    try:
+                        pending = pending[os.write(key.fd, pending[:select.PIPE_BUF]):]
+                    except BrokenPipeError:
+                        pending = pending[:0]
+                    if not pending:
+                        selector.unregister(proc.stdin)
+                        proc.stdin.close()
+                else:
+                    chunk = os.read(key.fd, 65536)
+                    if chunk:
+                        output[key.fileobj].append(chunk)
+                    else:
+                        selector.unregister(key.fileobj)
+                        key.fileobj.close()
+    return b"".join(output[proc.stdout]), b"".join(output[proc.stderr])
+
+
+class _DirectoryWatcher:
+    """Wake up early when something is created, deleted or changed in one of `paths`.
+
+    I use inotify, courtesy of libc. If that isn't available -- or none of
+    the paths can be watched -- then wait() simply sleeps.
+    """
+
+    def __init__(self, paths):
+        self._fd = None
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return
+        if fd < 0:
+            return
+        watches = [libc.inotify_add_watch(fd, os.fsencode(p), _INOTIFY_MASK) for p in paths]
+        if any(w >= 0 for w in watches):
+            self._fd = fd
+        else:
+            os.close(fd)
+
+    def __enter__(self):
+        return self
 
-def pause_until_true(timeout, test_func, nudge_func=None):
-    """Pause until test_func() returns True. Run tryme_func() every 1s, if specified.
+    def __exit__(self, *exc_info):
+        self.close()
 
-    This subroutine runs test_func() once per second, starting immediately, to see
-    if it returns True yet. If it doesn't: (i) wait for one second, (ii) run the
-    nudge_func() if it was specified, and (iii) check again. If, after {timeout}
-    loops, the condition still isn't True, raise TimeoutError. Otherwise, return.
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def wait(self, seconds):
+        """Wait for up to `seconds`, or until something happens. True if something did."""
+        if self._fd is None:
+            time.sleep(seconds)
+            return False
+        readable, _, __ = select.select([self._fd], [], [], seconds)
+        if not readable:
+            return False
+        try:
+            while os.read(self._fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+
+def pause_until_true(timeout, test_func, nudge_func=None, min_nudge_interval=1.0,
+                     watch_paths=_PAUSE_WATCH_PATHS):
+    """Pause until test_func() returns True. Run nudge_func() now and then, if specified.
+
+    This subroutine runs test_func() immediately, to see if it returns True yet.
+    If it doesn't, I wait -- briefly at first, then for longer and longer, up
+    to a quarter of a second -- and check again. I wake up early if anything
+    appears in, vanishes from or changes in /dev or /sys/class/block, so
+    that a new partition is usually spotted within milliseconds of the
+    kernel creating it. Meanwhile, I run nudge_func() (e.g. partprobe), but
+    no more often than once every {min_nudge_interval} seconds. If, after
+    {timeout} seconds, the condition still isn't True, raise TimeoutError.
+    Otherwise, return.
 
     Args:
-        timeout (int): How many loops (one second each) should we do before raising
-            a TimeoutError exception?
+        timeout (float): How many seconds should we wait before raising a
+            TimeoutError exception? Fractions of a second are fine.
         test_func (func): Run this function -- probably a lambda -- to get a result.
             If it returns True, return. Else, loop again.
-        nudge_func (func, optional): Run this function after a one-second delay, if
-            test_func() returns False.
+        nudge_func (func, optional): Run this function every so often, while
+            test_func() is returning False.
+        min_nudge_interval (float, optional): How many seconds must pass
+            between one nudge and the next. The first nudge comes this long
+            after I start.
+        watch_paths (tuple of str, optional): The folders to watch for changes.
 
     Returns:
         None.
@@ -123,12 +320,175 @@ def pause_until_true(timeout, test_func, nudge_func=None):
         * Add more TODOs
 
     """
-    while timeout > 0 and not test_func():
-        timeout = timeout - 1
-        time.sleep(1)
-        if nudge_func:
-            nudge_func()
-    if timeout <= 0:
-        raise TimeoutError("pause_until_true() timed out")
+    started = time.monotonic()
+    deadline = started + timeout
+    next_nudge = started + min_nudge_interval
+    interval = _PAUSE_FIRST_INTERVAL
+    if test_func():
+        return
+    with _DirectoryWatcher(watch_paths) as watcher:
+        while time.monotonic() < deadline:
+            watcher.wait(max(0, min(interval, deadline - time.monotonic())))
+            interval = min(interval * 2, _PAUSE_MAX_INTERVAL)
+            if test_func():
+                return
+            if nudge_func and time.monotonic() >= next_nudge:
+                nudge_func()
+                next_nudge = time.monotonic() + min_nudge_interval
+    raise TimeoutError("pause_until_true() timed out")
+
+
+async def async_pause_until_true(timeout, test_func, nudge_func=None, min_nudge_interval=1.0):
+    """Do what pause_until_true() does, without blocking the event loop.
+
+    I check test_func() with the same back-off -- 5ms at first, doubling up
+    to a quarter of a second -- but I sleep with asyncio.sleep() and don't
+    watch /dev for changes. test_func() and nudge_func() may be ordinary
+    functions or coroutine functions.
+
+    Args:
+        timeout (float): How many seconds should we wait before raising a
+            TimeoutError exception?
+        test_func (func): If it returns True, return. Else, loop again.
+        nudge_func (func, optional): Run this function every so often, while
+            test_func() is returning False.
+        min_nudge_interval (float, optional): How many seconds must pass
+            between one nudge and the next.
+
+    Returns:
+        None.
+
+    Raises:
+        TimeoutError: After {timeout} seconds, test_func() still is returning False.
+
+    """
+
+    async def _run(func):
+        result = func()
+        if asyncio.iscoroutine(result):
+            result = await result
+        return result
+
+    started = time.monotonic()
+    deadline = started + timeout
+    next_nudge = started + min_nudge_interval
+    interval = _PAUSE_FIRST_INTERVAL
+    if await _run(test_func):
+        return
+    while time.monotonic() < deadline:
+        await asyncio.sleep(max(0, min(interval, deadline - time.monotonic())))
+        interval = min(interval * 2, _PAUSE_MAX_INTERVAL)
+        if await _run(test_func):
+            return
+        if nudge_func and time.monotonic() >= next_nudge:
+            await _run(nudge_func)
+            next_nudge = time.monotonic() + min_nudge_interval
+    raise TimeoutError("async_pause_until_true() timed out")
+
+
+class ReadWriteLock:
+    """A lock that many threads may hold for reading, or one thread for writing.
+
+    A thread that holds the lock for writing may take it again, for reading
+    or for writing, as often as it likes: Disk.add_partition() calls
+    Disk.update(), which reads Disk.partitions, and so on. A thread that
+    holds the lock for reading may take it for reading again, but it may
+    not upgrade to writing; that would deadlock, so I raise RuntimeError
+    instead. Writers take precedence over newly-arriving readers, so that
+    a stream of readers cannot starve a writer.
+
+    Example:
+        $ lock = ReadWriteLock()
+        $ with lock.reading():
+        $     print(d.partitions)
+
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = {}
+        self._writer = None
+        self._writer_depth = 0
+        self._writers_waiting = 0
+
+    def acquire_read(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me and me not in self._readers:
+                while self._writer is not None or self._writers_waiting:
+                    self._cond.wait()
+            self._readers[me] = self._readers.get(me, 0) + 1
+
+    def release_read(self):
+        me = threading.get_ident()
+        with self._cond:
+            if me not in self._readers:
+                raise RuntimeError("release_read() without acquire_read()")
+            self._readers[me] -= 1
+            if self._readers[me] == 0:
+                del self._readers[me]
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writer_depth += 1
+                return
+            if me in self._readers:
+                raise RuntimeError("I cannot upgrade a read lock to a write lock")
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._writer_depth = 1
+
+    def release_write(self):
+        with self._cond:
+            if self._writer != threading.get_ident():
+                raise RuntimeError("release_write() without acquire_write()")
+            self._writer_depth -= 1
+            if self._writer_depth == 0:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def reading(self):
+        self.acquire_read()
+        try:
+            yield self
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def writing(self):
+        self.acquire_write()
+        try:
+            yield self
+        finally:
+            self.release_write()
+
+
+def read_locked(method):
+    """Decorate a method so that it runs while holding self._rwlock for reading."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._rwlock.reading():  # pylint: disable=protected-access
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def write_locked(method):
+    """Decorate a method so that it runs while holding self._rwlock for writing."""
 
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._rwlock.writing():  # pylint: disable=protected-access
+            return method(self, *args, **kwargs)
 
+    return wrapper
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""test_alignment test module
+
+Created on Oct 17, 2026
+
+@author: Tom Blackshaw
+
+These tests check that my.disktools.alignment chooses sensible partition
+boundaries from a (fake) sysfs tree, and that DiskTransaction honours them.
+They need no test disk.
+
+Usage:-
+    $ python3 -m unittest test.test_disktools.test_alignment
+    $ python3 -m unittest test.test_disktools.test_alignment.TestAlignmentFromLimits
+
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import my.disktools.alignment
+import my.disktools.sysfs
+import my.disktools.transaction
+from my.disktools.alignment import (
+    ALIGN_AUTO,
+    aligned_end,
+    alignment_from_limits,
+    disk_alignment,
+    resolve_alignment,
+)
+from my.disktools.disks import disk_namedtuple, sfdisk_output
+from my.disktools.layout import LayoutEntry, PartitionSpec
+from my.disktools.sysfs import QueueLimits, sysfs_queue_limits
+from my.disktools.transaction import DiskTransaction
+from test.test_disktools.test_parttable import MY_IMGSIZE_IN_SECTORS, make_blank_image, write_sector
+from test.test_disktools.test_sysfs_topology import make_fake_sysfs_block_device
+
+MiB = 1024 * 1024
+
+
+class TestAlignmentFromLimits(unittest.TestCase):
+    def testName(self):
+        self.assertEqual(alignment_from_limits(None), MiB)
+        self.assertEqual(alignment_from_limits(QueueLimits(512, 0, 0, 0)), MiB)
+        self.assertEqual(alignment_from_limits(QueueLimits(4096, 0, 512, 4 * MiB)), 4 * MiB)
+        self.assertEqual(alignment_from_limits(QueueLimits(512, 0, 0, 12 * MiB)), 12 * MiB)
+        self.assertEqual(alignment_from_limits(QueueLimits(4096, 3 * MiB, 0, 8 * MiB)), 24 * MiB)
+        self.assertEqual(alignment_from_limits(QueueLimits(512, 7 * MiB, 0, 13 * MiB)), 13 * MiB)
+
+    def testAlignedEnd(self):
+        self.assertEqual(aligned_end(8192, 9000, 8192, 100000), 16383)
+        self.assertEqual(aligned_end(8192, 16383, 8192, 100000), 16383)
+        self.assertEqual(aligned_end(8192, 30000, 8192, 30000), 24575)
+        self.assertEqual(aligned_end(8192, 9000, 8192, 9000), 9000)
+
+    def testResolve(self):
+        self.assertIsNone(resolve_alignment("/tmp/foo.img", 512, None))
+        self.assertEqual(resolve_alignment("/tmp/foo.img", 512, 4096), 4096)
+        with self.assertRaises(ValueError):
+            resolve_alignment("/tmp/foo.img", 512, "huge")
+
+
+class TestSysfsQueueLimits(unittest.TestCase):
+    def setUp(self):
+        self.old_root = my.disktools.sysfs._SYSFS_CLASS_BLOCK
+        self.tmpdir = tempfile.mkdtemp(prefix=".fofta.test.")
+        os.makedirs(os.path.join(self.tmpdir, "class", "block"))
+        my.disktools.sysfs._SYSFS_CLASS_BLOCK = os.path.join(self.tmpdir, "class", "block")
+        make_fake_sysfs_block_device(self.tmpdir, "mmcblk0")
+        devdir = os.path.join(self.tmpdir, "class", "block", "mmcblk0")
+        os.makedirs(os.path.join(devdir, "queue"))
+        os.makedirs(os.path.join(devdir, "device"))
+        for attr, value in (("queue/physical_block_size", 512), ("queue/optimal_io_size", 0),
+                            ("queue/discard_granularity", 4 * MiB), ("device/preferred_erase_size", 4 * MiB)):
+            with open(os.path.join(devdir, attr), "w", encoding="utf-8") as f:
+                f.write("%d\n" % value)
+
+    def tearDown(self):
+        my.disktools.sysfs._SYSFS_CLASS_BLOCK = self.old_root
+        shutil.rmtree(self.tmpdir)
+
+    def testName(self):
+        self.assertEqual(sysfs_queue_limits("/dev/mmcblk0"), QueueLimits(512, 0, 4 * MiB, 4 * MiB))
+        self.assertIsNone(sysfs_queue_limits("/dev/sdq"))
+        self.assertIsNone(sysfs_queue_limits("/tmp/foo.img"))
+        self.assertEqual(disk_alignment("/dev/mmcblk0", 512), 8192)
+        self.assertEqual(disk_alignment("/dev/mmcblk0", 4096), 1024)
+
+
+class TestAlignedTransaction(unittest.TestCase):
+    def setUp(self):
+        self.fname = make_blank_image()
+        write_sector(self.fname, 0, [])
+        self.txn = DiskTransaction(disk_namedtuple(self.fname), sfdisk_output(self.fname))
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testName(self):
+        with mock.patch.object(my.disktools.alignment, "sysfs_queue_limits") as limits:
+            self.assertEqual(disk_alignment(self.fname, 512), 2048)
+        self.assertFalse(limits.called)
+        self.assertEqual(self.txn.add_partition(partno=1, start=100, end=3000), LayoutEntry(1, 100, 3000, "83"))
+        self.assertEqual(self.txn.add_partition(partno=2, size_in_MiB=3, align=4096),
+                         LayoutEntry(2, 4096, 12287, "83"))
+        self.assertEqual(self.txn.add_partition(partno=3, size_in_MiB=1, align=ALIGN_AUTO),
+                         LayoutEntry(3, 12288, 14335, "83"))
+
+    def testAutoOnACard(self):
+        with mock.patch.object(my.disktools.transaction, "resolve_alignment", return_value=8192):
+            self.assertEqual(self.txn.add_partition(partno=1, size_in_MiB=1, align=ALIGN_AUTO),
+                             LayoutEntry(1, 8192, 16383, "83"))
+            layout = self.txn.desired_layout([PartitionSpec(partno=1, size=3000, align=ALIGN_AUTO),
+                                              PartitionSpec(partno=2, align=ALIGN_AUTO)])
+        self.assertEqual(layout.partitions, (LayoutEntry(1, 8192, 16383, "83"),
+                                             LayoutEntry(2, 16384, MY_IMGSIZE_IN_SECTORS - 1, "83")))
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    sys.path.append(os.getcwd())
+    unittest.main()
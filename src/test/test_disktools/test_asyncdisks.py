@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""test_asyncdisks test module
+
+Created on Oct 17, 2026
+
+@author: Tom Blackshaw
+
+These tests drive AsyncDisk and AsyncDiskPartition from one event loop,
+against hand-made GPT disk images in /tmp, and check async_call_binary()
+and async_pause_until_true(). They need no test disk.
+
+Usage:-
+    $ python3 -m unittest test.test_disktools.test_asyncdisks
+    $ python3 -m unittest test.test_disktools.test_asyncdisks.TestAsyncDisk
+
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+import uuid
+from unittest import mock
+
+import my.disktools.asyncdisks
+from my.calllog import recent_calls
+from my.disktools.asyncdisks import (
+    AsyncDisk,
+    AsyncDiskPartition,
+    async_disk_namedtuple,
+    async_update_kernel_partitions,
+)
+from my.disktools.layout import REST, LayoutEntry, PartitionSpec
+from my.disktools.transaction import DiskTransaction
+from my.exceptions import ExistentPriorPartitionError, PartitionTableWriteError
+from my.globals import async_call_binary, async_pause_until_true
+from test.test_disktools.test_parttable import LINUX_FS_GUID, MY_IMGSIZE_IN_SECTORS, make_gpt_image
+
+
+class TestAsyncCallBinary(unittest.TestCase):
+    def testName(self):
+        retcode, stdout_txt, stderr_txt = asyncio.run(async_call_binary(["sh", "-c", "cat; echo oops >&2; exit 2"], "hello"))
+        self.assertEqual((retcode, stdout_txt, stderr_txt), (2, "hello", "oops\n"))
+        call_rec = recent_calls("sh")[-1]
+        self.assertEqual((call_rec.returncode, call_rec.stdout_bytes, call_rec.user_time), (2, 5, None))
+        with self.assertRaises(ValueError):
+            asyncio.run(async_call_binary("ls"))
+        with self.assertRaises(FileNotFoundError):
+            asyncio.run(async_call_binary(["lsd123"]))
+
+    def testManyAtOnce(self):
+        async def main():
+            return await asyncio.gather(*[async_call_binary(["sleep", "0.2"]) for _ in range(10)])
+
+        began = time.monotonic()
+        results = asyncio.run(main())
+        self.assertLess(time.monotonic() - began, 1.5)
+        self.assertEqual([r[0] for r in results], [0] * 10)
+
+
+class TestAsyncPauseUntilTrue(unittest.TestCase):
+    def testName(self):
+        ready_at = time.monotonic() + 0.1
+        nudges = []
+
+        async def is_ready():
+            return time.monotonic() >= ready_at
+
+        async def nudge():
+            nudges.append(1)
+
+        asyncio.run(async_pause_until_true(timeout=2, test_func=is_ready, nudge_func=nudge, min_nudge_interval=0.05))
+        self.assertGreaterEqual(len(nudges), 1)
+        with self.assertRaises(TimeoutError):
+            asyncio.run(async_pause_until_true(timeout=0.05, test_func=lambda: False))
+
+
+class TestAsyncDisk(unittest.TestCase):
+    def setUp(self):
+        self.fnames = [make_gpt_image([], str(uuid.uuid4()).upper()) for _ in range(3)]
+
+    def tearDown(self):
+        for fname in self.fnames:
+            os.unlink(fname)
+
+    def testName(self):
+        async def main():
+            disk = await AsyncDisk.open(self.fnames[0])
+            self.assertEqual(disk.partitions, [])
+            self.assertEqual(await disk.add_partition(partno=1, size_in_MiB=4), LayoutEntry(1, 2048, 10239, LINUX_FS_GUID))
+            await disk.add_partition(partno=2, size_in_MiB=4)
+            await disk.add_partition(partno=3)
+            self.assertEqual([p.partno for p in disk.partitions], [1, 2, 3])
+            self.assertIsInstance(disk.partition(3), AsyncDiskPartition)
+            self.assertEqual(disk.partition(3).end, MY_IMGSIZE_IN_SECTORS - 34)
+            with self.assertRaises(ExistentPriorPartitionError):
+                await disk.add_partition(partno=2)
+            await disk.delete_partition(2)
+            self.assertEqual([p.partno for p in disk.partitions], [1, 3])
+            with self.assertRaises(AttributeError):
+                disk.partition(2)
+            p1 = disk.partition(1)
+            await disk.apply_layout([PartitionSpec(partno=1, start=2048, size=2048), PartitionSpec(partno=2, size=REST)])
+            self.assertEqual((p1.start, p1.end), (2048, 10239))
+            await p1.async_update()
+            self.assertEqual((p1.start, p1.end), (2048, 4095))
+            self.assertEqual([(p.partno, p.start) for p in disk.partitions], [(1, 2048), (2, 4096)])
+            self.assertIsNone(await async_update_kernel_partitions(disk.node))
+            await disk.delete_all_partitions()
+            self.assertEqual(disk.partitions, [])
+
+        asyncio.run(main())
+
+    def testSeveralDisksAtOnce(self):
+        async def provision(fname):
+            disk = await AsyncDisk.open(fname)
+            await disk.apply_layout([PartitionSpec(partno=1, size=8192), PartitionSpec(partno=2, size=REST)])
+            return [(p.partno, p.start, p.size) for p in disk.partitions]
+
+        async def main():
+            return await asyncio.gather(*[provision(fname) for fname in self.fnames])
+
+        expected = [(1, 2048, 8192), (2, 10240, MY_IMGSIZE_IN_SECTORS - 34 - 10240 + 1)]
+        self.assertEqual(asyncio.run(main()), [expected] * len(self.fnames))
+
+    def testEnhancingTheRecordDoesNotBlock(self):
+        threads = []
+
+        def enhance(disk_path, json_rec):
+            threads.append(threading.get_ident())
+
+        async def main():
+            with mock.patch.object(my.disktools.asyncdisks, "enhance_the_sfdisk_output", side_effect=enhance):
+                await async_disk_namedtuple(self.fnames[0])
+            return threading.get_ident()
+
+        self.assertNotIn(asyncio.run(main()), threads)
+        self.assertEqual(len(threads), 1)
+
+    def testAFailedWriteKeepsItsException(self):
+        async def main():
+            disk = await AsyncDisk.open(self.fnames[0])
+            with mock.patch.object(DiskTransaction, "write_natively", side_effect=PartitionTableWriteError("full")), \
+                    mock.patch.object(AsyncDisk, "update", side_effect=OSError("gone")) as update, \
+                    mock.patch("sys.stderr"):
+                with self.assertRaises(PartitionTableWriteError):
+                    await disk.add_partition(partno=1, size_in_MiB=4)
+            self.assertEqual(update.call_count, 1)
+
+        asyncio.run(main())
+
+    def testNeedsARecord(self):
+        with self.assertRaises(ValueError):
+            AsyncDiskPartition("/dev/sdq1")
+        self.assertFalse(asyncio.iscoroutinefunction(AsyncDiskPartition.update))
+
+    def testCreatingMeDoesNotBlock(self):
+        with mock.patch.object(my.disktools.asyncdisks, "is_this_a_disk", return_value=False) as is_a_disk:
+            disk = AsyncDisk("/dev/sdq")
+            self.assertFalse(is_a_disk.called)
+            with self.assertRaises(ValueError):
+                asyncio.run(disk.update())
+            with self.assertRaises(ValueError):
+                asyncio.run(AsyncDisk.open("/dev/sdq"))
+        self.assertEqual(is_a_disk.call_count, 2)
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    sys.path.append(os.getcwd())
+    unittest.main()
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""test_calllog test module
+
+Created on Oct 17, 2026
+
+@author: Tom Blackshaw
+
+These tests check that call_binary() records what it runs -- and what that
+costs -- in the call log, that the log file is written in batches and kept
+small, and that call_log_summary() adds the calls up correctly. They need
+no test disk.
+
+Usage:-
+    $ python3 -m unittest test.test_disktools.test_calllog
+    $ python3 -m unittest test.test_disktools.test_calllog.TestCallLogSummary
+
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import my.calllog
+from my.calllog import (
+    CallRecord,
+    call_log_summary,
+    clear_call_log,
+    flush_call_log,
+    recent_calls,
+    record_call,
+)
+import my.globals
+from my.globals import call_binary
+
+
+def fake_call(binary, wall_time, returncode=0):
+    return CallRecord(binary, [binary], returncode, 0.0, wall_time, 0.01, 0.02, 1000, 0, 0)
+
+
+class TestCallBinaryIsLogged(unittest.TestCase):
+    def setUp(self):
+        clear_call_log()
+
+    def testName(self):
+        retcode, stdout_txt, stderr_txt = call_binary(["sh", "-c", "echo hello; echo oops >&2; exit 3"])
+        self.assertEqual((retcode, stdout_txt, stderr_txt), (3, "hello\n", "oops\n"))
+        call_rec = recent_calls("sh")[-1]
+        self.assertEqual(call_rec.argv, ["sh", "-c", "echo hello; echo oops >&2; exit 3"])
+        self.assertEqual((call_rec.returncode, call_rec.stdout_bytes, call_rec.stderr_bytes), (3, 6, 5))
+        self.assertGreater(call_rec.wall_time, 0)
+        self.assertGreater(call_rec.max_rss, 0)
+        self.assertGreaterEqual(call_rec.user_time + call_rec.system_time, 0)
+
+    def testBigInputAndOutputDoNotDeadlock(self):
+        text = "0123456789abcdef\n" * 20000
+        retcode, stdout_txt, stderr_txt = call_binary(["sh", "-c", "cat; cat >&2 </dev/null"], text)
+        self.assertEqual((retcode, stdout_txt, stderr_txt), (0, text, ""))
+        self.assertEqual(recent_calls("sh")[-1].stdout_bytes, len(text))
+
+    def testSignalledChild(self):
+        self.assertEqual(call_binary(["sh", "-c", "kill -9 $$"])[0], -9)
+
+    def testChildIsReapedEvenIfTheExchangeFails(self):
+        pids = []
+
+        def broken_exchange(proc, _input_bytes):
+            pids.append(proc.pid)
+            raise BrokenPipeError("stdin went away")
+
+        with mock.patch.object(my.globals, "_exchange_with_child", side_effect=broken_exchange):
+            with self.assertRaises(BrokenPipeError):
+                call_binary(["sh", "-c", "cat; exit 4"], "hello")
+        with self.assertRaises(ChildProcessError):
+            os.waitpid(pids[0], os.WNOHANG)  # No zombie left behind
+        self.assertEqual(recent_calls("sh")[-1].returncode, 4)
+
+
+class CallLogTestCase(unittest.TestCase):
+    """Send the log file to a directory of my own, starting with an empty log."""
+
+    def setUp(self):
+        flush_call_log()
+        clear_call_log()
+        self.tmpdir = tempfile.mkdtemp(prefix=".fofta.test.")
+        self.path = os.path.join(self.tmpdir, "calls.jsonl")
+        patcher = mock.patch.object(my.calllog, "_CALL_LOG_PATH", self.path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        flush_call_log()
+        clear_call_log()
+        shutil.rmtree(self.tmpdir)
+
+
+class TestCallLogSummary(CallLogTestCase):
+    def testName(self):
+        for i in range(1, 101):
+            record_call(fake_call("sfdisk", i / 100.0, returncode=1 if i % 25 == 0 else 0))
+        record_call(fake_call("partprobe", 2.0))
+        summary = call_log_summary()
+        self.assertEqual(sorted(summary), ["partprobe", "sfdisk"])
+        sfdisk = summary["sfdisk"]
+        self.assertEqual((sfdisk.count, sfdisk.failures), (100, 4))
+        self.assertEqual((sfdisk.p50, sfdisk.p90, sfdisk.p99, sfdisk.max_wall_time), (0.5, 0.9, 0.99, 1.0))
+        self.assertAlmostEqual(sfdisk.total_wall_time, 50.5)
+        self.assertAlmostEqual(sfdisk.user_time, 1.0)
+        self.assertEqual(summary["partprobe"].p99, 2.0)
+        self.assertEqual(len(recent_calls("partprobe")), 1)
+
+
+class TestCallLogFile(CallLogTestCase):
+    def testName(self):
+        for i in range(3):
+            record_call(fake_call("fdisk", 0.1 * i))
+        self.assertEqual(flush_call_log(), 3)
+        self.assertEqual(flush_call_log(), 0)
+        with open(self.path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual([line["binary"] for line in lines], ["fdisk"] * 3)
+        self.assertEqual(lines[2]["wall_time"], 0.2)
+
+    def testRotation(self):
+        with mock.patch.object(my.calllog, "_CALL_LOG_MAX_BYTES", 100):
+            for _ in range(3):
+                record_call(fake_call("fdisk", 0.1))
+                flush_call_log()
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 1)
+        self.assertTrue(os.path.exists(self.path + ".1"))
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    sys.path.append(os.getcwd())
+    unittest.main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""test_devdiskby_index test module
+
+Created on Oct 17, 2026
+
+@author: Tom Blackshaw
+
+These tests point my.disktools.both at a fake /dev/disk tree, in /tmp,
+and check that the reverse index of its softlinks stays up to date.
+
+Usage:-
+    $ python3 -m unittest test.test_disktools.test_devdiskby_index
+    $ python3 -m unittest test.test_disktools.test_devdiskby_index.TestDevdiskbyIndex
+
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import my.disktools.both
+from my.disktools.both import (
+    devdiskbyxxxx_index,
+    devdiskbyxxxx_path,
+    devdiskbyxxxx_paths,
+)
+
+
+class TestDevdiskbyIndex(unittest.TestCase):
+    def setUp(self):
+        self.old_root = my.disktools.both._DEVDISKBY_ROOT
+        self.tmpdir = tempfile.mkdtemp(prefix=".fofta.test.")
+        my.disktools.both._DEVDISKBY_ROOT = os.path.join(self.tmpdir, "disk")
+        self.dev_a = os.path.join(self.tmpdir, "sdx")
+        self.dev_a1 = os.path.join(self.tmpdir, "sdx1")
+        for dev in (self.dev_a, self.dev_a1):
+            open(dev, "w").close()
+        for searchby in ("id", "partuuid", "uuid"):
+            os.makedirs(os.path.join(self.tmpdir, "disk", "by-%s" % searchby))
+        os.symlink(self.dev_a, os.path.join(self.tmpdir, "disk", "by-id", "usb-Foo-0:0"))
+        os.symlink(self.dev_a1, os.path.join(self.tmpdir, "disk", "by-id", "usb-Foo-0:0-part1"))
+        os.symlink(self.dev_a1, os.path.join(self.tmpdir, "disk", "by-partuuid", "abcd1234-01"))
+
+    def tearDown(self):
+        my.disktools.both._DEVDISKBY_ROOT = self.old_root
+        shutil.rmtree(self.tmpdir)
+
+    def testName(self):
+        self.assertEqual(
+            devdiskbyxxxx_paths(self.dev_a1),
+            {
+                "id": os.path.join(self.tmpdir, "disk", "by-id", "usb-Foo-0:0-part1"),
+                "label": None,
+                "partuuid": os.path.join(self.tmpdir, "disk", "by-partuuid", "abcd1234-01"),
+                "path": None,
+                "uuid": None,
+            },
+        )
+        self.assertEqual(
+            devdiskbyxxxx_path(self.dev_a, "id"),
+            os.path.join(self.tmpdir, "disk", "by-id", "usb-Foo-0:0"),
+        )
+        self.assertIsNone(devdiskbyxxxx_path(self.dev_a, "partuuid"))
+        with self.assertRaises(ValueError):
+            devdiskbyxxxx_path(self.dev_a, "label")
+        with self.assertRaises(ValueError):
+            devdiskbyxxxx_path(self.dev_a + "9", "id")
+
+    def testStaleIndexIsRebuilt(self):
+        before = devdiskbyxxxx_index()
+        self.assertIs(before, devdiskbyxxxx_index())
+        self.assertIsNone(devdiskbyxxxx_paths(self.dev_a1)["uuid"])
+        newlink = os.path.join(self.tmpdir, "disk", "by-uuid", "2bcf1a74")
+        os.symlink(self.dev_a1, newlink)
+        self.assertEqual(devdiskbyxxxx_paths(self.dev_a1)["uuid"], newlink)
+        os.makedirs(os.path.join(self.tmpdir, "disk", "by-label"))
+        os.symlink(self.dev_a1, os.path.join(self.tmpdir, "disk", "by-label", "ROOTFS"))
+        self.assertEqual(
+            devdiskbyxxxx_path(self.dev_a1, "label"),
+            os.path.join(self.tmpdir, "disk", "by-label", "ROOTFS"),
+        )
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    sys.path.append(os.getcwd())
+    unittest.main()
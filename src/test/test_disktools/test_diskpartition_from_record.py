@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""test_diskpartition_from_record test module
+
+Created on Oct 17, 2026
+
+@author: Tom Blackshaw
+
+These tests check that a DiskPartition can be filled in from its disk's
+record, and that doing so tells the same story as probing the partition
+from scratch. They use a hand-made disk image in /tmp.
+
+Usage:-
+    $ python3 -m unittest test.test_disktools.test_diskpartition_from_record
+    $ python3 -m unittest test.test_disktools.test_diskpartition_from_record.TestDiskPartitionFromRecord
+
+"""
+import os
+import sys
+import unittest
+
+from my.disktools.disks import disk_namedtuple
+from my.disktools.partitions import DiskPartition
+from test.test_disktools.test_parttable import make_dos_image, write_sector, mbr_entry
+
+
+class TestDiskPartitionFromRecord(unittest.TestCase):
+    def setUp(self):
+        self.fname = make_dos_image()
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testName(self):
+        rec = disk_namedtuple(self.fname)
+        for partition_rec in rec.partitiontable.partitions:
+            from_rec = DiskPartition(partition_rec.node, partition_rec=partition_rec, parentnode=self.fname)
+            from_scratch = DiskPartition(partition_rec.node)
+            self.assertEqual(str(from_rec), str(from_scratch))
+            self.assertEqual(from_rec.parentnode, self.fname)
+
+    def testUpdateRereadsTheParentDisk(self):
+        rec = disk_namedtuple(self.fname)
+        p = DiskPartition(rec.partitiontable.partitions[1].node,
+                          partition_rec=rec.partitiontable.partitions[1], parentnode=self.fname)
+        self.assertEqual((p.start, p.end, p.fstype), (10240, 18431, "83"))
+        write_sector(
+            self.fname,
+            0,
+            [mbr_entry(0x80, 0x0C, 2048, 8192), mbr_entry(0, 0x83, 10240, 4096), mbr_entry(0, 0x05, 20480, 40960)],
+            disk_id=0x1234ABCD,
+        )
+        p.update()
+        self.assertEqual((p.start, p.end, p.fstype), (10240, 14335, "83"))
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    sys.path.append(os.getcwd())
+    unittest.main()
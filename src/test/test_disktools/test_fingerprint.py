@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""test_fingerprint test module
+
+Created on Oct 17, 2026
+
+@author: Tom Blackshaw
+
+These tests check that a disk's fingerprint changes when (and only when)
+its partition table does, and that Disk.refresh_if_changed() relies on it.
+They use hand-made disk images in /tmp.
+
+Usage:-
+    $ python3 -m unittest test.test_disktools.test_fingerprint
+    $ python3 -m unittest test.test_disktools.test_fingerprint.TestProbeFingerprint
+
+"""
+import os
+import shutil
+import sys
+import unittest
+import uuid
+
+from my.disktools.probe import probe_fingerprint
+from test.test_disktools.test_parttable import (
+    LINUX_FS_GUID,
+    make_blank_image,
+    make_dos_image,
+    make_gpt_image,
+    mbr_entry,
+    write_sector,
+)
+
+
+class TestProbeFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.fname = make_dos_image()
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testName(self):
+        before = probe_fingerprint(self.fname)
+        self.assertEqual(before, probe_fingerprint(self.fname))
+        with open(self.fname, "r+b") as f:
+            f.seek(30000 * 512)
+            f.write(b"data, not a partition table")
+        self.assertEqual(before, probe_fingerprint(self.fname))
+
+    def testLogicalPartitionChanges(self):
+        before = probe_fingerprint(self.fname)
+        write_sector(self.fname, 40960, [mbr_entry(0, 0x83, 2048, 4096)])
+        self.assertNotEqual(before, probe_fingerprint(self.fname))
+
+    def testPrimaryPartitionChanges(self):
+        before = probe_fingerprint(self.fname)
+        write_sector(
+            self.fname,
+            0,
+            [mbr_entry(0x80, 0x0C, 2048, 8192), mbr_entry(0, 0x83, 10240, 4096), mbr_entry(0, 0x05, 20480, 40960)],
+            disk_id=0x1234ABCD,
+        )
+        self.assertNotEqual(before, probe_fingerprint(self.fname))
+
+    def testBlankDisk(self):
+        fname = make_blank_image()
+        try:
+            self.assertEqual(probe_fingerprint(fname), probe_fingerprint(fname))
+        finally:
+            os.unlink(fname)
+
+
+class TestGptFingerprint(unittest.TestCase):
+    def testName(self):
+        disk_guid = str(uuid.uuid4()).upper()
+        part_guid = str(uuid.uuid4()).upper()
+        fnameA = make_gpt_image([(0, LINUX_FS_GUID, part_guid, 2048, 10239, 0, "boot")], disk_guid)
+        fnameB = make_gpt_image([(0, LINUX_FS_GUID, part_guid, 2048, 10239, 0, "root")], disk_guid)
+        try:
+            with open(fnameA, "rb") as f:
+                imageA = f.read()
+            before = probe_fingerprint(fnameA)
+            with open(fnameB, "rb") as f:
+                imageB = f.read()
+            with open(fnameA, "r+b") as f:
+                f.write(imageB)
+            self.assertNotEqual(before, probe_fingerprint(fnameA))
+            with open(fnameA, "r+b") as f:
+                f.write(imageA)
+            self.assertEqual(before, probe_fingerprint(fnameA))
+        finally:
+            os.unlink(fnameA)
+            os.unlink(fnameB)
+
+
+@unittest.skipIf(shutil.which("partprobe") is None, "partprobe is not installed")
+class TestRefreshIfChanged(unittest.TestCase):
+    def setUp(self):
+        self.fname = make_dos_image()
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testName(self):
+        from my.disktools.disks import Disk
+
+        d = Disk(self.fname)
+        self.assertFalse(d.refresh_if_changed())
+        write_sector(self.fname, 40960, [mbr_entry(0, 0x83, 2048, 2048)])
+        self.assertTrue(d.refresh_if_changed())
+        self.assertEqual(d.partition(6).size, 2048)
+        self.assertFalse(d.refresh_if_changed())
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    sys.path.append(os.getcwd())
+    unittest.main()
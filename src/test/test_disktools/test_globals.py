@@ -25,11 +25,17 @@ Todo:
 
 import os
 import random
+import shutil
 import sys
+import tempfile
+import threading
+import time
 from test import MY_TESTDISK_PATH
 from my.globals import _DOS, _GPT
 import unittest
-from my.globals import call_binary, generate_random_string, pause_until_true
+from unittest import mock
+import my.globals
+from my.globals import _DirectoryWatcher, call_binary, generate_random_string, pause_until_true
 
 
 class TestCallBinary(unittest.TestCase):
@@ -112,6 +118,56 @@ class TestPauseUntilTrue(unittest.TestCase):
                          nudge_func = lambda: os.system('sync'))
 
 
+class TestPauseUntilTrueQuickly(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix=".fofta.test.")
+        self.fname = os.path.join(self.tmpdir, generate_random_string(16))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def testFractionalTimeout(self):
+        t = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            pause_until_true(timeout=0.3, test_func=lambda: False)
+        self.assertLess(time.monotonic() - t, 0.9)
+        pause_until_true(timeout=0, test_func=lambda: True)
+
+    def testWokenByInotify(self):
+        with _DirectoryWatcher((self.tmpdir,)) as watcher:
+            if watcher._fd is None:
+                self.skipTest("inotify is unavailable here")
+        # With polling this slow, only inotify can wake me in time.
+        with mock.patch.object(my.globals, "_PAUSE_FIRST_INTERVAL", 30), \
+                mock.patch.object(my.globals, "_PAUSE_MAX_INTERVAL", 30):
+            threading.Timer(0.1, lambda: open(self.fname, "w").close()).start()
+            t = time.monotonic()
+            pause_until_true(timeout=5, test_func=lambda x=self.fname: os.path.exists(x),
+                             watch_paths=(self.tmpdir,))
+            self.assertLess(time.monotonic() - t, 0.9)
+
+    def testNotWokenWithoutInotify(self):
+        # The control case: the same wait, with inotify unavailable, sleeps until its deadline.
+        with mock.patch.object(my.globals, "_PAUSE_FIRST_INTERVAL", 30), \
+                mock.patch.object(my.globals, "_PAUSE_MAX_INTERVAL", 30), \
+                mock.patch.object(my.globals.ctypes, "CDLL", side_effect=OSError("no libc")):
+            threading.Timer(0.1, lambda: open(self.fname, "w").close()).start()
+            t = time.monotonic()
+            pause_until_true(timeout=1.5, test_func=lambda x=self.fname: os.path.exists(x),
+                             watch_paths=(self.tmpdir,))
+            self.assertGreaterEqual(time.monotonic() - t, 1.4)
+
+    def testNudgesAreRateLimited(self):
+        nudges = []
+        with self.assertRaises(TimeoutError):
+            pause_until_true(timeout=1, test_func=lambda: False,
+                             nudge_func=lambda: nudges.append(time.monotonic()),
+                             min_nudge_interval=0.3)
+        self.assertIn(len(nudges), (2, 3))
+        for a, b in zip(nudges, nudges[1:]):
+            self.assertGreaterEqual(b - a, 0.3)
+
+
 if __name__ == "__main__":
     # import sys;sys.argv = ['', 'Test.testName']
     sys.path.append(os.getcwd())
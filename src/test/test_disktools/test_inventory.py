@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""test_inventory test module
+
+Created on Oct 17, 2026
+
+@author: Tom Blackshaw
+
+These tests check that scan_disks() probes several disks at once, hands
+back each one's record as soon as it's ready, and gives every probe the
+same snapshot of the /dev/disk/by-____/ index. They use hand-made disk
+images in /tmp, and need no test disk.
+
+Usage:-
+    $ python3 -m unittest test.test_disktools.test_inventory
+    $ python3 -m unittest test.test_disktools.test_inventory.TestScanDisks
+
+"""
+import os
+import sys
+import time
+import unittest
+import uuid
+from unittest import mock
+
+import my.disktools.disks
+import my.disktools.inventory
+import my.disktools.sysfs
+from my.disktools.disks import all_disk_paths, disk_namedtuple
+from my.disktools.inventory import scan_disk_paths, scan_disks
+from my.disktools.sysfs import block_topology, sysfs_disk_paths
+from test.test_disktools.test_parttable import make_dos_image, make_gpt_image
+
+SLOW_PROBE = 0.2
+
+
+class TestScanDisks(unittest.TestCase):
+    def setUp(self):
+        self.fnames = [make_dos_image() for _ in range(4)] + [make_gpt_image([], str(uuid.uuid4()).upper())]
+
+    def tearDown(self):
+        for fname in self.fnames:
+            os.unlink(fname)
+
+    def testName(self):
+        results = list(scan_disks(self.fnames + ["/tmp/no.such.fofta.disk.img"]))
+        self.assertEqual(sorted(r.node for r in results), sorted(self.fnames + ["/tmp/no.such.fofta.disk.img"]))
+        by_node = {r.node: r for r in results}
+        for fname in self.fnames:
+            self.assertIsNone(by_node[fname].error)
+            self.assertEqual(by_node[fname].record, disk_namedtuple(fname))
+        self.assertIsNone(by_node["/tmp/no.such.fofta.disk.img"].record)
+        self.assertIsInstance(by_node["/tmp/no.such.fofta.disk.img"].error, ValueError)
+        self.assertEqual(list(scan_disks([])), [])
+
+    def testProbesRunConcurrently(self):
+        sfdisk_output = my.disktools.disks.sfdisk_output
+
+        def slow_sfdisk_output(disk_path, topology=None):
+            time.sleep(SLOW_PROBE if disk_path != self.fnames[0] else 3 * SLOW_PROBE)
+            return sfdisk_output(disk_path, topology)
+
+        with mock.patch.object(my.disktools.disks, "sfdisk_output", side_effect=slow_sfdisk_output):
+            began = time.monotonic()
+            order = [r.node for r in scan_disks(self.fnames)]
+            elapsed = time.monotonic() - began
+        self.assertLess(elapsed, 2 * len(self.fnames) * SLOW_PROBE)
+        self.assertEqual(order[-1], self.fnames[0])  # The slowest disk comes last, not first.
+
+    def testOneSnapshotOfTheIndex(self):
+        with mock.patch.object(my.disktools.inventory, "devdiskbyxxxx_index", return_value={}) as index, \
+                mock.patch.object(my.disktools.disks, "devdiskbyxxxx_index") as per_disk_index:
+            self.assertEqual(len(list(scan_disks(self.fnames))), len(self.fnames))
+        self.assertEqual(index.call_count, 1)
+        self.assertFalse(per_disk_index.called)
+
+    def testOneSnapshotOfTheTopology(self):
+        topology = block_topology()
+        with mock.patch.object(my.disktools.inventory, "block_topology", return_value=topology) as snapshot, \
+                mock.patch.object(my.disktools.sysfs, "block_topology") as per_disk_topology:
+            self.assertEqual(len(list(scan_disks(self.fnames))), len(self.fnames))
+        self.assertEqual(snapshot.call_count, 1)
+        self.assertFalse(per_disk_topology.called)
+
+
+class TestScanDiskPaths(unittest.TestCase):
+    def testName(self):
+        self.assertEqual(scan_disk_paths(), sysfs_disk_paths())
+        self.assertEqual(scan_disk_paths(max_workers=1), all_disk_paths())
+
+    def testThePoolIsShared(self):
+        with mock.patch.object(my.disktools.inventory, "ThreadPoolExecutor",
+                               wraps=my.disktools.inventory.ThreadPoolExecutor) as executor:
+            for _ in range(3):
+                scan_disk_paths()
+        self.assertLessEqual(executor.call_count, 1)
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    sys.path.append(os.getcwd())
+    unittest.main()
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""test_kernel test module
+
+Created on Oct 17, 2026
+
+@author: Tom Blackshaw
+
+These tests check that my.disktools.kernel works out the right BLKPG
+operations from a partition table and a (fake) sysfs tree. They issue no
+ioctls and need no test disk.
+
+Usage:-
+    $ python3 -m unittest test.test_disktools.test_kernel
+    $ python3 -m unittest test.test_disktools.test_kernel.TestKernelPartitionChanges
+
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import my.disktools.sysfs
+from my.disktools.kernel import (
+    BLKPG_ADD_PARTITION,
+    BLKPG_DEL_PARTITION,
+    BLKPG_RESIZE_PARTITION,
+    _BLKPG_PARTITION,
+    _wanted_extents,
+    kernel_partition_changes,
+    update_kernel_partitions,
+)
+from my.disktools.parttable import read_partition_table
+from my.disktools.sysfs import sysfs_partition_extents
+from my.globals import _DOS, _GPT
+from test.test_disktools.test_parttable import make_dos_image
+from test.test_disktools.test_sysfs_topology import make_fake_sysfs_block_device
+
+
+class TestBlkpgPartition(unittest.TestCase):
+    def testName(self):
+        # The kernel copies all of sizeof(struct blkpg_partition), including its tail padding.
+        self.assertEqual(_BLKPG_PARTITION.size, 152)
+
+
+class TestKernelPartitionChanges(unittest.TestCase):
+    def testNothingToDo(self):
+        extents = {1: (2048, 8192), 2: (10240, 8192)}
+        self.assertEqual(kernel_partition_changes(extents, dict(extents)), [])
+
+    def testName(self):
+        current = {1: (2048, 8192), 2: (10240, 8192), 3: (18432, 4096), 4: (30000, 100)}
+        wanted = {1: (2048, 8192), 2: (10240, 16384), 3: (20480, 4096), 5: (40000, 100)}
+        self.assertEqual(
+            kernel_partition_changes(wanted, current),
+            [
+                (BLKPG_DEL_PARTITION, 3, 18432, 4096),
+                (BLKPG_DEL_PARTITION, 4, 30000, 100),
+                (BLKPG_RESIZE_PARTITION, 2, 10240, 16384),
+                (BLKPG_ADD_PARTITION, 3, 20480, 4096),
+                (BLKPG_ADD_PARTITION, 5, 40000, 100),
+            ],
+        )
+
+
+class TestWantedExtents(unittest.TestCase):
+    def setUp(self):
+        self.fname = make_dos_image()
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testDosExtendedIsShort(self):
+        extents = _wanted_extents(read_partition_table(self.fname))
+        self.assertEqual(
+            extents,
+            {1: (2048, 8192), 2: (10240, 8192), 3: (20480, 2), 5: (22528, 4096), 6: (43008, 4096)},
+        )
+
+    def testLargeSectors(self):
+        table_rec = {
+            "partitiontable": {
+                "label": _GPT,
+                "sectorsize": 4096,
+                "partitions": [{"node": "/dev/sdq1", "start": 256, "size": 1024, "type": "x"}],
+            }
+        }
+        self.assertEqual(_wanted_extents(table_rec), {1: (2048, 8192)})
+        table_rec["partitiontable"]["label"] = _DOS
+        table_rec["partitiontable"]["partitions"][0]["type"] = "5"
+        self.assertEqual(_wanted_extents(table_rec), {1: (2048, 8)})
+
+    def testImageFilesAreLeftAlone(self):
+        self.assertIsNone(update_kernel_partitions(self.fname))
+
+
+class TestSysfsPartitionExtents(unittest.TestCase):
+    def setUp(self):
+        self.old_root = my.disktools.sysfs._SYSFS_CLASS_BLOCK
+        self.tmpdir = tempfile.mkdtemp(prefix=".fofta.test.")
+        os.makedirs(os.path.join(self.tmpdir, "class", "block"))
+        my.disktools.sysfs._SYSFS_CLASS_BLOCK = os.path.join(self.tmpdir, "class", "block")
+        make_fake_sysfs_block_device(self.tmpdir, "mmcblk0")
+        for partno, start in ((1, 8192), (2, 532480)):
+            make_fake_sysfs_block_device(self.tmpdir, "mmcblk0p%d" % partno, "mmcblk0", partno, size=524288)
+            with open(os.path.join(self.tmpdir, "class", "block", "mmcblk0p%d" % partno, "start"), "w") as f:
+                f.write("%d\n" % start)
+
+    def tearDown(self):
+        my.disktools.sysfs._SYSFS_CLASS_BLOCK = self.old_root
+        shutil.rmtree(self.tmpdir)
+
+    def testName(self):
+        self.assertEqual(
+            sysfs_partition_extents("/dev/mmcblk0"),
+            {1: (8192, 524288), 2: (532480, 524288)},
+        )
+        self.assertEqual(sysfs_partition_extents("/dev/sdq"), {})
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    sys.path.append(os.getcwd())
+    unittest.main()
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""test_layout test module
+
+Created on Oct 17, 2026
+
+@author: Tom Blackshaw
+
+These tests check the in-memory overlap checker and the change planner in
+my.disktools.layout. They need no disk at all, except for the one test
+that reads a hand-made disk image in /tmp.
+
+Usage:-
+    $ python3 -m unittest test.test_disktools.test_layout
+    $ python3 -m unittest test.test_disktools.test_layout.TestLayoutOverlaps
+
+"""
+import os
+import sys
+import unittest
+
+from my.globals import _DOS, _GPT
+from my.disktools.disks import disk_namedtuple
+from my.disktools.layout import (
+    CREATE,
+    DELETE,
+    RESIZE,
+    RETYPE,
+    Layout,
+    LayoutChange,
+    LayoutEntry,
+    layout_from_record,
+    layout_overlaps,
+    plan_layout_changes,
+)
+from my.disktools.partitions import overlapping
+from test.test_disktools.test_parttable import make_dos_image
+
+GPT_LINUX_FS = "0FC63DAF-8483-4772-8E79-3D69D8477DE4"
+
+
+class CountingEntry(LayoutEntry):
+    """A LayoutEntry that counts how often anybody reads its start."""
+
+    __slots__ = ()
+    reads = 0
+
+    @property
+    def start(self):
+        CountingEntry.reads += 1
+        return tuple.__getitem__(self, 1)
+
+
+def gpt_layout(how_many, size=2048, gap=0):
+    return Layout(
+        partitiontable_type=_GPT,
+        partitions=tuple(
+            LayoutEntry(i + 1, 2048 + i * (size + gap), 2048 + i * (size + gap) + size - 1, GPT_LINUX_FS)
+            for i in range(how_many)
+        ),
+    )
+
+
+class TestLayoutFromRecord(unittest.TestCase):
+    def setUp(self):
+        self.fname = make_dos_image()
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testName(self):
+        layout = layout_from_record(disk_namedtuple(self.fname))
+        self.assertEqual(layout.partitiontable_type, _DOS)
+        self.assertEqual(
+            layout.partitions,
+            (
+                LayoutEntry(1, 2048, 10239, "c"),
+                LayoutEntry(2, 10240, 18431, "83"),
+                LayoutEntry(3, 20480, 61439, "5"),
+                LayoutEntry(5, 22528, 26623, "83"),
+                LayoutEntry(6, 43008, 47103, "82"),
+            ),
+        )
+        self.assertFalse(layout_overlaps(layout))
+        self.assertFalse(overlapping(self.fname))
+        self.assertTrue(overlapping(self.fname, [4, 18000, 19000, "83"]))
+        self.assertFalse(overlapping(self.fname, [7, 50000, 51000, "83"]))
+        self.assertTrue(overlapping(self.fname, [7, 60000, 62000, "83"]))  # strays out of #3
+        self.assertTrue(overlapping(self.fname, [7, 25000, 26000, "83"]))  # clashes with #5
+
+
+class TestLayoutOverlaps(unittest.TestCase):
+    def testEmptyAndSingle(self):
+        self.assertFalse(layout_overlaps(Layout(_GPT, ())))
+        self.assertFalse(layout_overlaps(Layout(_GPT, ()), [1, None, None, None]))
+        self.assertFalse(layout_overlaps(gpt_layout(1)))
+
+    def testHypotheticalDefaults(self):
+        layout = gpt_layout(2)
+        self.assertFalse(layout_overlaps(layout, [None, None, None, GPT_LINUX_FS]))
+        self.assertTrue(layout_overlaps(layout, [None, 2048, None, GPT_LINUX_FS]))
+
+    def testContainedAndAbutting(self):
+        layout = Layout(_GPT, (LayoutEntry(1, 2048, 99999, "x"), LayoutEntry(2, 100000, 100100, "x")))
+        self.assertFalse(layout_overlaps(layout))
+        self.assertTrue(layout_overlaps(layout, [3, 4096, 8191, "x"]))
+        self.assertTrue(layout_overlaps(layout, [3, 100100, 100200, "x"]))
+        self.assertFalse(layout_overlaps(layout, [3, 100101, 100200, "x"]))
+
+    def testPrimaryMustNotOverlapTheExtendedPartition(self):
+        layout = Layout(_DOS, (LayoutEntry(1, 2048, 4095, "83"), LayoutEntry(2, 4096, 9999, "5")))
+        self.assertTrue(layout_overlaps(layout, [3, 5000, 6000, "83"]))
+        self.assertFalse(layout_overlaps(layout, [5, 5000, 6000, "83"]))
+
+    def testHypotheticalLogicalStaysInsideTheExtendedPartition(self):
+        layout = Layout(_DOS, (LayoutEntry(1, 2048, 10239, "83"), LayoutEntry(2, 10240, 51199, "5")))
+        self.assertFalse(layout_overlaps(layout, [5, None, None, "83"]))
+        self.assertFalse(layout_overlaps(layout, [5, None, None, "83"], size_in_sectors=20480))
+        self.assertFalse(layout_overlaps(layout, [5, 12288, None, "83"], size_in_sectors=20480))
+        self.assertTrue(layout_overlaps(layout, [5, None, None, "83"], size_in_sectors=99999))
+        layout = Layout(_DOS, layout.partitions + (LayoutEntry(5, 12288, 32767, "83"),))
+        self.assertFalse(layout_overlaps(layout, [6, None, None, "83"], size_in_sectors=8192))
+        self.assertTrue(layout_overlaps(layout, [6, None, None, "83"], size_in_sectors=20000))
+
+    def testLargeTableIsLinear(self):
+        for how_many in (16, 128):
+            layout = Layout(_GPT, tuple(CountingEntry(*e) for e in gpt_layout(how_many, gap=1).partitions))
+            CountingEntry.reads = 0
+            self.assertFalse(layout_overlaps(layout, [None, None, None, GPT_LINUX_FS]))
+            # Sorting reads each start once, and sweeping reads it once more. Pairwise would be n^2.
+            self.assertLessEqual(CountingEntry.reads, 2 * how_many + 2)
+
+
+class TestPlanLayoutChanges(unittest.TestCase):
+    def setUp(self):
+        self.dos = Layout(
+            _DOS,
+            (
+                LayoutEntry(1, 2048, 10239, "c"),
+                LayoutEntry(2, 10240, 20479, "83"),
+                LayoutEntry(3, 20480, 61439, "5"),
+                LayoutEntry(5, 22528, 26623, "83"),
+                LayoutEntry(6, 43008, 47103, "82"),
+            ),
+        )
+
+    def testNothingToDo(self):
+        self.assertEqual(plan_layout_changes(self.dos, self.dos), [])
+        self.assertEqual(plan_layout_changes(gpt_layout(128), gpt_layout(128)), [])
+        lowercase = Layout(_GPT, tuple(e._replace(fstype=e.fstype.lower()) for e in gpt_layout(4).partitions))
+        self.assertEqual(plan_layout_changes(gpt_layout(4), lowercase), [])
+
+    def testName(self):
+        desired = Layout(
+            _DOS,
+            (
+                LayoutEntry(1, 2048, 10239, "83"),
+                LayoutEntry(2, 10240, 16383, "83"),
+                LayoutEntry(3, 20480, 61439, "5"),
+                LayoutEntry(5, 22528, 26623, "83"),
+                LayoutEntry(6, 43008, 47103, "82"),
+                LayoutEntry(7, 49152, 53247, "83"),
+            ),
+        )
+        self.assertEqual(
+            plan_layout_changes(self.dos, desired),
+            [
+                LayoutChange(RESIZE, 2, desired.partitions[1]),
+                LayoutChange(RETYPE, 1, desired.partitions[0]),
+                LayoutChange(CREATE, 7, desired.partitions[5]),
+            ],
+        )
+
+    def testMovingALogicalMovesTheOnesAfterIt(self):
+        desired = Layout(_DOS, self.dos.partitions[:3] + (LayoutEntry(5, 24576, 26623, "83"),) + self.dos.partitions[4:])
+        self.assertEqual(
+            [(c.op, c.partno) for c in plan_layout_changes(self.dos, desired)],
+            [(DELETE, 6), (DELETE, 5), (CREATE, 5), (CREATE, 6)],
+        )
+
+    def testExtendedPartitionTakesItsLogicalsWithIt(self):
+        desired = Layout(_DOS, self.dos.partitions[:2] + (LayoutEntry(3, 20480, 61439, "83"),))
+        self.assertEqual(
+            [(c.op, c.partno) for c in plan_layout_changes(self.dos, desired)],
+            [(DELETE, 6), (DELETE, 5), (DELETE, 3), (CREATE, 3)],
+        )
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    sys.path.append(os.getcwd())
+    unittest.main()
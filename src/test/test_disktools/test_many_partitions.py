@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""test_many_partitions test module
+
+Created on Oct 17, 2026
+
+@author: Tom Blackshaw
+
+These tests fill a GPT disk image with 128 partitions -- as some of our lab
+images do, for their A/B slots -- and check that Disk can create, list and
+refresh them without rebuilding the layout or probing each partition as
+they go, so that the cost grows linearly with the number of partitions. They use hand-made disk images in /tmp, and need no binaries.
+
+Usage:-
+    $ python3 -m unittest test.test_disktools.test_many_partitions
+    $ python3 -m unittest test.test_disktools.test_many_partitions.TestPartitionCountScaling
+
+"""
+import bisect
+import os
+import sys
+import unittest
+import uuid
+from unittest import mock
+
+import my.disktools.disks
+import my.disktools.partitions
+import my.disktools.transaction
+from my.disktools.disks import Disk
+from my.disktools.layout import Layout, layout_overlaps
+from test.test_disktools.test_parttable import make_gpt_image
+
+SECTORS_PER_MiB = 2048
+MAX_GPT_PARTITIONS = 128
+
+
+def make_gpt_disk(how_many_partitions):
+    """Return a Disk whose image has room for that many 1 MiB partitions, and none yet."""
+    fname = make_gpt_image([], str(uuid.uuid4()).upper(),
+                           size_in_sectors=SECTORS_PER_MiB * (how_many_partitions + 2))
+    return Disk(fname)
+
+
+def count_create_list_and_refresh(how_many_partitions):
+    """Return how often creating, listing and refreshing that many partitions does the expensive things.
+
+    Creating should never rebuild the layout or check all of it for overlaps
+    -- until the transaction is written, once. Listing should bisect once per
+    lookup. Refreshing should never ask sysfs (or the node) for a partition#.
+    """
+    disk = make_gpt_disk(how_many_partitions)
+    try:
+        with mock.patch.object(my.disktools.transaction, "Layout", wraps=Layout) as layouts, \
+                mock.patch.object(my.disktools.transaction, "layout_overlaps", wraps=layout_overlaps) as checks:
+            with disk.transaction() as txn:
+                for partno in range(1, how_many_partitions + 1):
+                    txn.add_partition(partno=partno, size_in_MiB=1)
+                created = layouts.call_count + checks.call_count
+        with mock.patch.object(my.disktools.disks.bisect, "bisect_right", wraps=bisect.bisect_right) as bisects:
+            for partno in range(1, how_many_partitions + 1):
+                disk.partition(partno)
+                disk.partition_at(partno * SECTORS_PER_MiB)
+        listed = bisects.call_count
+        with mock.patch.object(my.disktools.partitions, "sysfs_partno") as sysfs_partno, \
+                mock.patch.object(my.disktools.partitions, "deduce_partno") as deduce_partno:
+            disk.update(partprobe=False)
+            [p.partno for p in disk.partitions]
+        refreshed = sysfs_partno.call_count + deduce_partno.call_count
+    finally:
+        os.unlink(disk.node)
+    return created, listed, refreshed
+
+
+class TestManyGptPartitions(unittest.TestCase):
+    def setUp(self):
+        self.disk = make_gpt_disk(MAX_GPT_PARTITIONS)
+
+    def tearDown(self):
+        os.unlink(self.disk.node)
+
+    def testName(self):
+        with self.disk.transaction() as txn:
+            for partno in range(1, MAX_GPT_PARTITIONS + 1):
+                txn.add_partition(partno=partno, size_in_MiB=1)
+        self.assertEqual(len(self.disk.partitions), MAX_GPT_PARTITIONS)
+        self.assertFalse(self.disk.overlapping)
+        last = self.disk.partition(MAX_GPT_PARTITIONS)
+        self.assertEqual((last.partno, last.start), (MAX_GPT_PARTITIONS, MAX_GPT_PARTITIONS * SECTORS_PER_MiB))
+        self.assertIs(self.disk.partition_at(last.start), last)
+        self.assertIs(self.disk.partition_at(last.end), last)
+        self.assertIs(self.disk.partition_at(last.start - 1), self.disk.partition(MAX_GPT_PARTITIONS - 1))
+        self.assertIsNone(self.disk.partition_at(100))
+        self.assertIsNone(self.disk.partition_at(last.end + 1))
+        with self.assertRaises(AttributeError):
+            self.disk.partition(MAX_GPT_PARTITIONS + 1)
+        with self.assertRaises(ValueError):
+            self.disk.add_partition(partno=MAX_GPT_PARTITIONS + 1)
+
+    def testPartitionNumbersAreIndexed(self):
+        with self.disk.transaction() as txn:
+            txn.add_partition(partno=64, size_in_MiB=1)
+            txn.add_partition(partno=100, size_in_MiB=1)
+        self.assertEqual([p.partno for p in self.disk.partitions], [64, 100])
+        self.assertEqual(self.disk.partition(100).start, 2 * SECTORS_PER_MiB)
+        with self.assertRaises(ValueError):
+            self.disk.add_partition(partno=64)
+
+
+class TestPartitionCountScaling(unittest.TestCase):
+    def testName(self):
+        small, large = 16, MAX_GPT_PARTITIONS
+        self.assertEqual(count_create_list_and_refresh(small), (0, small, 0))
+        self.assertEqual(count_create_list_and_refresh(large), (0, large, 0))
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    sys.path.append(os.getcwd())
+    unittest.main()
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""test_parttable test module
+
+Created on Oct 17, 2026
+
+@author: Tom Blackshaw
+
+These tests build small disk images by hand, in /tmp, and check that the
+pure-Python partition table reader makes the same sense of them that
+sfdisk would. They need no test disk and no sfdisk.
+
+Usage:-
+    $ python3 -m unittest test.test_disktools.test_parttable
+    $ python3 -m unittest test.test_disktools.test_parttable.TestReadDosTable
+
+"""
+import os
+import struct
+import sys
+import unittest
+import uuid
+import zlib
+
+from my.globals import _DOS, _GPT, generate_random_string
+from my.disktools.parttable import (
+    partition_node,
+    read_disk_identifier,
+    read_partition_table,
+)
+
+MY_IMGSIZE_IN_SECTORS = 65536
+LINUX_FS_GUID = "0FC63DAF-8483-4772-8E79-3D69D8477DE4"
+
+
+def make_blank_image(size_in_sectors=MY_IMGSIZE_IN_SECTORS):
+    fname = "/tmp/.fofta.test.%s.img" % generate_random_string(16)
+    with open(fname, "wb") as f:
+        f.truncate(size_in_sectors * 512)
+    return fname
+
+
+def mbr_entry(bootflag, ptype, start, size):
+    return struct.pack("<B3sB3sII", bootflag, b"\0\0\0", ptype, b"\0\0\0", start, size)
+
+
+def write_sector(fname, lba, entries, disk_id=None):
+    sector = bytearray(512)
+    if disk_id is not None:
+        struct.pack_into("<I", sector, 440, disk_id)
+    for i, e in enumerate(entries):
+        sector[446 + i * 16 : 446 + (i + 1) * 16] = e
+    sector[510:512] = b"\x55\xaa"
+    with open(fname, "r+b") as f:
+        f.seek(lba * 512)
+        f.write(bytes(sector))
+
+
+def make_dos_image():
+    """Two primaries, an extended partition, and two logicals."""
+    fname = make_blank_image()
+    write_sector(
+        fname,
+        0,
+        [
+            mbr_entry(0x80, 0x0C, 2048, 8192),
+            mbr_entry(0, 0x83, 10240, 8192),
+            mbr_entry(0, 0x05, 20480, 40960),
+        ],
+        disk_id=0x1234ABCD,
+    )
+    # EBR #1 -> logical #5 at 22528, next EBR at ext+20480
+    write_sector(fname, 20480, [mbr_entry(0, 0x83, 2048, 4096), mbr_entry(0, 0x05, 20480, 8192)])
+    # EBR #2 -> logical #6 at 40960+2048
+    write_sector(fname, 40960, [mbr_entry(0, 0x82, 2048, 4096)])
+    return fname
+
+
+def make_gpt_image(entries, disk_guid, num_entries=128, size_in_sectors=MY_IMGSIZE_IN_SECTORS):
+    """entries is a list of (slot#, type guid, part guid, first, last, attrs, name)."""
+    fname = make_blank_image(size_in_sectors)
+    write_sector(fname, 0, [mbr_entry(0, 0xEE, 1, size_in_sectors - 1)])
+    array = bytearray(num_entries * 128)
+    for slot, type_guid, part_guid, first, last, attrs, name in entries:
+        struct.pack_into(
+            "<16s16sQQQ72s",
+            array,
+            slot * 128,
+            uuid.UUID(type_guid).bytes_le,
+            uuid.UUID(part_guid).bytes_le,
+            first,
+            last,
+            attrs,
+            name.encode("utf-16-le"),
+        )
+    header = bytearray(512)
+    struct.pack_into(
+        "<8sIIIIQQQQ16sQIII",
+        header,
+        0,
+        b"EFI PART",
+        0x00010000,
+        92,
+        0,
+        0,
+        1,
+        size_in_sectors - 1,
+        34,
+        size_in_sectors - 34,
+        uuid.UUID(disk_guid).bytes_le,
+        2,
+        num_entries,
+        128,
+        zlib.crc32(bytes(array)),
+    )
+    struct.pack_into("<I", header, 16, zlib.crc32(bytes(header[:92])))
+    with open(fname, "r+b") as f:
+        f.seek(512)
+        f.write(bytes(header))
+        f.write(bytes(array))
+    return fname
+
+
+class TestPartitionNode(unittest.TestCase):
+    def testName(self):
+        self.assertEqual(partition_node("/dev/sda", 1), "/dev/sda1")
+        self.assertEqual(partition_node("/dev/mmcblk0", 2), "/dev/mmcblk0p2")
+        self.assertEqual(partition_node("/dev/loop5", 12), "/dev/loop5p12")
+        self.assertEqual(partition_node("/root/foo.img", 3), "/root/foo.img3")
+
+
+class TestReadDosTable(unittest.TestCase):
+    def setUp(self):
+        self.fname = make_dos_image()
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testName(self):
+        rec = read_partition_table(self.fname)["partitiontable"]
+        self.assertEqual(rec["label"], _DOS)
+        self.assertEqual(rec["id"], "0x1234abcd")
+        self.assertEqual(rec["device"], self.fname)
+        self.assertEqual(rec["unit"], "sectors")
+        self.assertEqual(
+            [(p["node"], p["start"], p["size"], p["type"]) for p in rec["partitions"]],
+            [
+                (self.fname + "1", 2048, 8192, "c"),
+                (self.fname + "2", 10240, 8192, "83"),
+                (self.fname + "3", 20480, 40960, "5"),
+                (self.fname + "5", 22528, 4096, "83"),
+                (self.fname + "6", 43008, 4096, "82"),
+            ],
+        )
+        self.assertTrue(rec["partitions"][0]["bootable"])
+        self.assertNotIn("bootable", rec["partitions"][1])
+
+    def testDiskIdentifier(self):
+        self.assertEqual(read_disk_identifier(self.fname), "0x1234abcd")
+
+
+class TestReadGptTable(unittest.TestCase):
+    def setUp(self):
+        self.disk_guid = str(uuid.uuid4()).upper()
+        self.part_guids = [str(uuid.uuid4()).upper() for _ in range(2)]
+        self.fname = make_gpt_image(
+            [
+                (0, LINUX_FS_GUID, self.part_guids[0], 2048, 10239, 0, "boot"),
+                (2, LINUX_FS_GUID, self.part_guids[1], 10240, 20479, 1 | (1 << 60), ""),
+            ],
+            self.disk_guid,
+        )
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testName(self):
+        rec = read_partition_table(self.fname)["partitiontable"]
+        self.assertEqual(rec["label"], _GPT)
+        self.assertEqual(rec["id"], self.disk_guid)
+        self.assertEqual(rec["firstlba"], 34)
+        self.assertEqual(rec["lastlba"], MY_IMGSIZE_IN_SECTORS - 34)
+        p1, p3 = rec["partitions"]
+        self.assertEqual((p1["node"], p1["start"], p1["size"]), (self.fname + "1", 2048, 8192))
+        self.assertEqual((p1["type"], p1["uuid"], p1["name"]), (LINUX_FS_GUID, self.part_guids[0], "boot"))
+        self.assertNotIn("attrs", p1)
+        self.assertEqual((p3["node"], p3["start"], p3["size"]), (self.fname + "3", 10240, 10240))
+        self.assertEqual(p3["attrs"], "RequiredPartition GUID:60")
+        self.assertNotIn("name", p3)
+        self.assertEqual(read_disk_identifier(self.fname), self.disk_guid)
+
+    def testCorruptHeaderIsNotTrusted(self):
+        with open(self.fname, "r+b") as f:
+            f.seek(512 + 40)
+            f.write(b"\xff")
+        self.assertIsNone(read_partition_table(self.fname))
+
+
+class TestUnrecognizedTables(unittest.TestCase):
+    def setUp(self):
+        self.fname = make_blank_image()
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testName(self):
+        self.assertIsNone(read_partition_table(self.fname))
+        self.assertIsNone(read_disk_identifier(self.fname))
+        write_sector(self.fname, 0, [])
+        self.assertEqual(read_partition_table(self.fname)["partitiontable"]["partitions"], [])
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    sys.path.append(os.getcwd())
+    unittest.main()
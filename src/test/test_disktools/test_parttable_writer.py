@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""test_parttable_writer test module
+
+Created on Oct 17, 2026
+
+@author: Tom Blackshaw
+
+These tests write partition tables into hand-made disk images in /tmp with
+write_partition_table(), and check that read_partition_table() reads back
+what was written. They need no test disk, no fdisk and no sfdisk.
+
+Usage:-
+    $ python3 -m unittest test.test_disktools.test_parttable_writer
+    $ python3 -m unittest test.test_disktools.test_parttable_writer.TestWriteGptTable
+
+"""
+import os
+import sys
+import unittest
+import uuid
+
+from my.disktools.disks import disk_namedtuple, sfdisk_output
+from my.disktools.partitions import add_partition_SUB, delete_all_partitions, set_partition_fstype
+from my.disktools.parttable import read_partition_table, wipe_partition_table, write_partition_table
+from my.disktools.transaction import DiskTransaction
+from test.test_disktools.test_parttable import (
+    LINUX_FS_GUID,
+    MY_IMGSIZE_IN_SECTORS,
+    make_blank_image,
+    make_dos_image,
+    make_gpt_image,
+)
+
+
+def strip_device(rec):
+    del rec["partitiontable"]["device"]
+    return rec
+
+
+class TestWriteDosTable(unittest.TestCase):
+    def setUp(self):
+        self.fname = make_dos_image()
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testName(self):
+        original = read_partition_table(self.fname)
+        with open(self.fname, "r+b") as f:
+            f.write(b"BOOTCODE")
+        fnameB = make_blank_image()
+        try:
+            write_partition_table(fnameB, original)
+            self.assertEqual(read_partition_table(fnameB)["partitiontable"]["partitions"],
+                             [dict(p, node=p["node"].replace(self.fname, fnameB))
+                              for p in original["partitiontable"]["partitions"]])
+            write_partition_table(self.fname, original)
+            self.assertEqual(read_partition_table(self.fname), original)
+            with open(self.fname, "rb") as f:
+                self.assertEqual(f.read(8), b"BOOTCODE")
+        finally:
+            os.unlink(fnameB)
+
+    def testMoreLogicals(self):
+        rec = read_partition_table(self.fname)
+        rec["partitiontable"]["partitions"].append(
+            {"node": self.fname + "7", "start": 49152, "size": 2048, "type": "83"}
+        )
+        write_partition_table(self.fname, rec)
+        self.assertEqual(read_partition_table(self.fname), rec)
+
+    def testUnworkableTablesAreNotWritten(self):
+        with open(self.fname, "rb") as f:
+            before = f.read()
+        for p in (
+            {"node": self.fname + "7", "start": 60000, "size": 4096, "type": "83"},  # sticks out of #3
+            {"node": self.fname + "8", "start": 49152, "size": 2048, "type": "83"},  # no #7
+            {"node": self.fname + "4", "start": 63000, "size": 4096, "type": "83"},  # off the end
+        ):
+            rec = read_partition_table(self.fname)
+            rec["partitiontable"]["partitions"].append(p)
+            with self.assertRaises(ValueError):
+                write_partition_table(self.fname, rec)
+        with open(self.fname, "rb") as f:
+            self.assertEqual(before, f.read())
+
+
+class TestWriteGptTable(unittest.TestCase):
+    def setUp(self):
+        self.disk_guid = str(uuid.uuid4()).upper()
+        self.part_guid = str(uuid.uuid4()).upper()
+        self.fname = make_gpt_image(
+            [(0, LINUX_FS_GUID, self.part_guid, 2048, 10239, 1 | (1 << 60), "boot")], self.disk_guid
+        )
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testName(self):
+        rec = read_partition_table(self.fname)
+        rec["partitiontable"]["partitions"].append(
+            {"node": self.fname + "4", "start": 10240, "size": 8192, "type": LINUX_FS_GUID, "name": "root"}
+        )
+        write_partition_table(self.fname, rec)
+        readback = read_partition_table(self.fname)["partitiontable"]
+        self.assertEqual(readback["id"], self.disk_guid)
+        p1, p4 = readback["partitions"]
+        self.assertEqual((p1["uuid"], p1["name"], p1["attrs"]), (self.part_guid, "boot", "RequiredPartition GUID:60"))
+        self.assertEqual((p4["node"], p4["start"], p4["size"], p4["name"]), (self.fname + "4", 10240, 8192, "root"))
+        uuid.UUID(p4["uuid"])
+        # The backup header and array must be good too: break the primary header.
+        with open(self.fname, "r+b") as f:
+            f.seek(512)
+            f.write(b"\0" * 512)
+        self.assertEqual(read_partition_table(self.fname)["partitiontable"]["partitions"], [p1, p4])
+
+    def testGrownImage(self):
+        rec = read_partition_table(self.fname)
+        with open(self.fname, "r+b") as f:
+            f.truncate(MY_IMGSIZE_IN_SECTORS * 2 * 512)
+        write_partition_table(self.fname, rec)
+        readback = read_partition_table(self.fname)["partitiontable"]
+        self.assertEqual(readback["lastlba"], MY_IMGSIZE_IN_SECTORS * 2 - 34)
+        self.assertEqual(readback["partitions"], rec["partitiontable"]["partitions"])
+        with open(self.fname, "r+b") as f:
+            f.seek(512)
+            f.write(b"\0" * 512)
+        self.assertEqual(read_partition_table(self.fname)["partitiontable"]["lastlba"], MY_IMGSIZE_IN_SECTORS * 2 - 34)
+
+    def testProtectiveMbr(self):
+        fname = make_blank_image()
+        try:
+            write_partition_table(fname, {"partitiontable": {"label": "gpt", "partitions": []}})
+            with open(fname, "rb") as f:
+                mbr = f.read(512)
+            self.assertEqual(mbr[446 + 4], 0xEE)
+            self.assertEqual(mbr[510:], b"\x55\xaa")
+            self.assertEqual(read_partition_table(fname)["partitiontable"]["partitions"], [])
+        finally:
+            os.unlink(fname)
+
+
+class TestWipePartitionTable(unittest.TestCase):
+    def testDos(self):
+        fname = make_dos_image()
+        try:
+            with open(fname, "r+b") as f:
+                f.write(b"BOOTCODE")
+            self.assertTrue(wipe_partition_table(fname))
+            readback = read_partition_table(fname)["partitiontable"]
+            self.assertEqual((readback["id"], readback["partitions"]), ("0x1234abcd", []))
+            with open(fname, "rb") as f:
+                mbr = f.read(512)
+            self.assertEqual(mbr[:8], b"BOOTCODE")
+            self.assertEqual(mbr[446:510], bytes(64))
+            with open(fname, "rb") as f:
+                for ebr_lba in (20480, 40960):  # See make_dos_image()
+                    f.seek(ebr_lba * 512)
+                    self.assertEqual(f.read(512), bytes(512), "The EBR at sector %d was left behind" % ebr_lba)
+        finally:
+            os.unlink(fname)
+
+    def testGpt(self):
+        disk_guid = str(uuid.uuid4()).upper()
+        fname = make_gpt_image([(0, LINUX_FS_GUID, str(uuid.uuid4()), 2048, 10239, 0, "boot")], disk_guid)
+        try:
+            self.assertTrue(wipe_partition_table(fname))
+            with open(fname, "rb") as f:
+                f.seek(1024)
+                self.assertEqual(f.read(128 * 128), bytes(128 * 128))
+                f.seek((MY_IMGSIZE_IN_SECTORS - 33) * 512)
+                self.assertEqual(f.read(128 * 128), bytes(128 * 128))
+            readback = read_partition_table(fname)["partitiontable"]
+            self.assertEqual((readback["id"], readback["partitions"]), (disk_guid, []))
+            with open(fname, "r+b") as f:
+                f.seek(512)
+                f.write(b"\0" * 512)
+            self.assertEqual(read_partition_table(fname)["partitiontable"]["id"], disk_guid)
+        finally:
+            os.unlink(fname)
+
+    def testNothingToWipe(self):
+        fname = make_blank_image()
+        try:
+            self.assertFalse(wipe_partition_table(fname))
+            delete_all_partitions(fname)
+            self.assertIsNone(read_partition_table(fname))
+            with open(fname, "r+b") as f:
+                f.seek(446 + 4)
+                f.write(b"\xee")
+                f.seek(510)
+                f.write(b"\x55\xaa")
+            with self.assertRaises(ValueError):
+                wipe_partition_table(fname)
+        finally:
+            os.unlink(fname)
+
+
+class TestImagesNeedNoBinaries(unittest.TestCase):
+    def setUp(self):
+        self.fname = make_dos_image()
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testName(self):
+        txn = DiskTransaction(disk_namedtuple(self.fname), sfdisk_output(self.fname))
+        txn.delete_partition(2)
+        txn.add_partition(partno=4, start=61440, end=65535, fstype="7")
+        txn.write()
+        partitions = read_partition_table(self.fname)["partitiontable"]["partitions"]
+        self.assertEqual([p["node"][-1] for p in partitions], ["1", "3", "4", "5", "6"])
+        self.assertTrue(partitions[0]["bootable"])
+        set_partition_fstype(self.fname, 4, "83")
+        add_partition_SUB(self.fname, 2, 10240, 12287, "82")
+        partitions = read_partition_table(self.fname)["partitiontable"]["partitions"]
+        self.assertEqual([(p["node"][-1], p["type"]) for p in partitions][:4],
+                         [("1", "c"), ("2", "82"), ("3", "5"), ("4", "83")])
+        delete_all_partitions(self.fname)
+        self.assertEqual(read_partition_table(self.fname)["partitiontable"]["partitions"], [])
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    sys.path.append(os.getcwd())
+    unittest.main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""test_probe test module
+
+Created on Oct 17, 2026
+
+@author: Tom Blackshaw
+
+These tests probe the geometry and disk ID of hand-made disk images in
+/tmp and, if losetup works here, of a loop device bound to one of them.
+
+Usage:-
+    $ python3 -m unittest test.test_disktools.test_probe
+    $ python3 -m unittest test.test_disktools.test_probe.TestProbeImage
+
+"""
+import os
+import sys
+import unittest
+from unittest import mock
+
+import my.disktools.disks
+import my.disktools.probe
+from my.globals import call_binary
+from my.disktools.probe import (
+    probe_disk_identifier,
+    probe_geometry,
+    probe_serno_and_geometry,
+)
+from my.disktools.disks import get_serno, serno_sizeinbytes_sizeinsectors_and_sectorsize
+from test.test_disktools.test_parttable import MY_IMGSIZE_IN_SECTORS, make_dos_image
+
+
+class TestProbeImage(unittest.TestCase):
+    def setUp(self):
+        self.fname = make_dos_image()
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testName(self):
+        geometry = probe_geometry(self.fname)
+        self.assertEqual(geometry.size_in_bytes, MY_IMGSIZE_IN_SECTORS * 512)
+        self.assertEqual(geometry.size_in_sectors, MY_IMGSIZE_IN_SECTORS)
+        self.assertEqual(geometry.sector_size, 512)
+        self.assertEqual(probe_disk_identifier(self.fname), "0x1234abcd")
+        self.assertEqual(get_serno(self.fname), "0x1234abcd")
+        self.assertEqual(
+            serno_sizeinbytes_sizeinsectors_and_sectorsize(self.fname),
+            ("0x1234abcd", MY_IMGSIZE_IN_SECTORS * 512, MY_IMGSIZE_IN_SECTORS, 512),
+        )
+
+    def testResizedImageIsReprobed(self):
+        self.assertIs(probe_geometry(self.fname), probe_geometry(self.fname))
+        with open(self.fname, "r+b") as f:
+            f.truncate(MY_IMGSIZE_IN_SECTORS * 512 * 2)
+        self.assertEqual(probe_geometry(self.fname).size_in_sectors, MY_IMGSIZE_IN_SECTORS * 2)
+
+
+class TestProbeWithoutDiskseq(unittest.TestCase):
+    def testName(self):
+        # Without a diskseq, a swapped card looks like the old one: I mustn't cache it.
+        geometry = my.disktools.probe.DiskGeometry(1024, 2, 512, 512, 512, 0)
+        with mock.patch.object(my.disktools.probe, "_geometry_cache_key", return_value=("blk", 0xB300, None)), \
+                mock.patch.object(my.disktools.probe, "_probe_geometry", return_value=geometry) as probe:
+            probe_geometry("/dev/mmcblk0")
+            probe_geometry("/dev/mmcblk0")
+        self.assertEqual(probe.call_count, 2)
+
+
+class TestSernoOfAnUnfamiliarTable(unittest.TestCase):
+    def setUp(self):
+        self.fname = make_dos_image()
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testName(self):
+        sfdisk_l = "Disk %s: 32 MiB, 33554432 bytes, 65536 sectors\nDisklabel type: sun\n" \
+                   "Disk identifier: 0xfeedface\n" % self.fname
+        with mock.patch.object(my.disktools.disks, "probe_disk_identifier", return_value=None), \
+                mock.patch.object(my.disktools.disks, "probe_serno_and_geometry",
+                                  return_value=(None, MY_IMGSIZE_IN_SECTORS * 512, MY_IMGSIZE_IN_SECTORS, 512)), \
+                mock.patch.object(my.disktools.disks, "call_binary", return_value=(0, sfdisk_l, "")):
+            self.assertEqual(get_serno(self.fname), "0xfeedface")
+            self.assertEqual(serno_sizeinbytes_sizeinsectors_and_sectorsize(self.fname)[0], "0xfeedface")
+
+
+class TestProbeLoopdev(unittest.TestCase):
+    def setUp(self):
+        self.fname = make_dos_image()
+        try:
+            retcode, stdout_txt, _stderr_txt = call_binary(["losetup", "-f", "--show", self.fname])
+        except FileNotFoundError:
+            retcode = -1
+        if retcode != 0:
+            os.unlink(self.fname)
+            self.skipTest("I cannot losetup a loop device here")
+        self.loopdev = stdout_txt.strip()
+
+    def tearDown(self):
+        call_binary(["losetup", "-d", self.loopdev])
+        os.unlink(self.fname)
+
+    def testName(self):
+        self.assertEqual(
+            probe_serno_and_geometry(self.loopdev),
+            ("0x1234abcd", MY_IMGSIZE_IN_SECTORS * 512, MY_IMGSIZE_IN_SECTORS, 512),
+        )
+        geometry = probe_geometry(self.loopdev)
+        self.assertGreaterEqual(geometry.physical_sector_size, geometry.sector_size)
+        self.assertGreater(geometry.io_min, 0)
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    sys.path.append(os.getcwd())
+    unittest.main()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""test_readcache test module
+
+Created on Oct 17, 2026
+
+@author: Tom Blackshaw
+
+These tests check that a ReadCache remembers one answer per disk for as
+long as the disk's fingerprint stays the same, forgets the least recently
+used disk when it's full, and counts its hits and misses; and that
+sfdisk_output() and get_disk_partition_table() answer from their caches
+until somebody writes to the disk. They use hand-made disk images in /tmp,
+and need no test disk.
+
+Usage:-
+    $ python3 -m unittest test.test_disktools.test_readcache
+    $ python3 -m unittest test.test_disktools.test_readcache.TestWritesInvalidate
+
+"""
+import os
+import sys
+import unittest
+from unittest import mock
+
+import my.disktools.disks
+from my.disktools.disks import sfdisk_output
+from my.disktools.partitions import get_disk_partition_table, set_partition_fstype
+from my.disktools.probe import probe_geometry
+from my.disktools.readcache import (
+    ReadCache,
+    clear_read_caches,
+    invalidate_disk_reads,
+    read_cache,
+    read_cache_stats,
+)
+from my.disktools.sfdiskdump import sfdisk_dump
+from test.test_disktools.test_parttable import make_dos_image
+
+
+class TestReadCache(unittest.TestCase):
+    def testName(self):
+        cache = ReadCache()
+        self.assertEqual(cache.lookup("/dev/sda", "fp1", lambda: "one"), "one")
+        self.assertEqual(cache.lookup("/dev/sda", "fp1", lambda: "two"), "one")
+        self.assertEqual(cache.lookup("/dev/sda", "fp2", lambda: "three"), "three")
+        self.assertEqual(cache.lookup("/dev/sda", "fp2", lambda: "four"), "three")
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.size), (2, 2, 1))
+
+    def testLeastRecentlyUsedIsEvicted(self):
+        cache = ReadCache(maxsize=2)
+        cache.lookup("/dev/sda", "fp", lambda: "a")
+        cache.lookup("/dev/sdb", "fp", lambda: "b")
+        cache.lookup("/dev/sda", "fp", lambda: "not me")
+        cache.lookup("/dev/sdc", "fp", lambda: "c")
+        self.assertEqual(cache.stats().evictions, 1)
+        self.assertEqual(cache.lookup("/dev/sda", "fp", lambda: "not me"), "a")
+        self.assertEqual(cache.lookup("/dev/sdb", "fp", lambda: "b again"), "b again")
+        with self.assertRaises(ValueError):
+            ReadCache(maxsize=0)
+
+    def testWhatIsNotRemembered(self):
+        cache = ReadCache()
+        cache.lookup("/dev/sda", None, lambda: "unreadable")
+        with self.assertRaises(OSError):
+            cache.lookup("/dev/sdb", "fp", mock.Mock(side_effect=OSError("no medium")))
+
+        def _read_during_a_write():
+            cache.invalidate("/dev/sdc")
+            return "stale"
+
+        cache.lookup("/dev/sdc", "fp", _read_during_a_write)
+        self.assertEqual(cache.stats().size, 0)
+
+    def testInvalidate(self):
+        cache = ReadCache()
+        cache.lookup("/dev/sda", "fp", lambda: "a")
+        cache.lookup("/dev/sdb", "fp", lambda: "b")
+        cache.invalidate("/dev/sda")
+        self.assertEqual(cache.lookup("/dev/sda", "fp", lambda: "a again"), "a again")
+        self.assertEqual(cache.lookup("/dev/sdb", "fp", lambda: "not me"), "b")
+        cache.invalidate()
+        self.assertEqual(cache.stats().invalidations, 3)
+        self.assertEqual(cache.stats().size, 0)
+        cache.clear()
+        self.assertEqual(cache.stats(), (0, 0, 0, 0, 0, cache.stats().maxsize))
+
+    def testRegistry(self):
+        self.assertIn("sfdisk_output", read_cache_stats())
+        self.assertIn("sfdisk_dump", read_cache_stats())
+        self.assertIn("geometry", read_cache_stats())
+        with self.assertRaises(ValueError):
+            read_cache("sfdisk_output")
+
+
+class TestWritesInvalidate(unittest.TestCase):
+    def setUp(self):
+        clear_read_caches()
+        self.fname = make_dos_image()
+
+    def tearDown(self):
+        os.unlink(self.fname)
+        clear_read_caches()
+
+    def testName(self):
+        with mock.patch.object(my.disktools.disks, "_sfdisk_output",
+                               side_effect=my.disktools.disks._sfdisk_output) as read:
+            for _ in range(5):
+                sfdisk_output(self.fname)
+            self.assertEqual(read.call_count, 1)
+        probe_geometry(self.fname)
+        probe_geometry(self.fname)
+        stats = read_cache_stats()
+        self.assertEqual((stats["sfdisk_output"].hits, stats["sfdisk_output"].misses), (4, 1))
+        self.assertGreaterEqual(stats["geometry"].hits, 1)
+
+    def testSetFstype(self):
+        self.assertIs(sfdisk_dump(self.fname), sfdisk_dump(self.fname))
+        self.assertIn("type=83", get_disk_partition_table(self.fname).split("\n")[7])
+        self.assertEqual(sfdisk_output(self.fname)["partitiontable"]["partitions"][1]["type"], "83")
+        set_partition_fstype(self.fname, 2, "c")
+        stats = read_cache_stats()
+        self.assertEqual(stats["sfdisk_output"].invalidations, 1)
+        self.assertEqual(stats["sfdisk_dump"].invalidations, 1)
+        self.assertIn("type=c", get_disk_partition_table(self.fname).split("\n")[7])
+        self.assertEqual(sfdisk_output(self.fname)["partitiontable"]["partitions"][1]["type"], "c")
+
+    def testInvalidateEverything(self):
+        sfdisk_output(self.fname)
+        invalidate_disk_reads()
+        self.assertEqual(read_cache_stats()["sfdisk_output"].size, 0)
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    sys.path.append(os.getcwd())
+    unittest.main()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""test_records test module
+
+Created on Oct 17, 2026
+
+@author: Tom Blackshaw
+
+These tests check that disk_namedtuple() hands out DiskRecords that behave
+like the namedtuples it used to build, and that Disk and DiskPartition
+objects no longer carry a __dict__. They use a hand-made disk image in /tmp.
+
+Usage:-
+    $ python3 -m unittest test.test_disktools.test_records
+    $ python3 -m unittest test.test_disktools.test_records.TestDiskRecord
+
+"""
+import os
+import sys
+import unittest
+
+from my.disktools.disks import Disk, disk_namedtuple
+from my.disktools.partitions import DiskPartition
+from my.disktools.parttable import DiskRecord, PartitionRecord, disk_record, read_partition_table
+from test.test_disktools.test_parttable import make_dos_image
+
+
+class TestDiskRecord(unittest.TestCase):
+    def setUp(self):
+        self.fname = make_dos_image()
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testName(self):
+        rec = disk_namedtuple(self.fname)
+        self.assertIsInstance(rec, DiskRecord)
+        self.assertEqual(rec.partitiontable.id, "0x1234abcd")
+        self.assertEqual(rec.partitiontable.node, self.fname)
+        self.assertEqual(
+            [(p.node, p.start, p.size, p.type) for p in rec.partitiontable.partitions][:2],
+            [(self.fname + "1", 2048, 8192, "c"), (self.fname + "2", 10240, 8192, "83")],
+        )
+        self.assertTrue(rec.partitiontable.partitions[0].bootable)
+        self.assertIsNone(rec.partitiontable.partitions[1].bootable)
+        self.assertIs(type(rec.partitiontable.partitions[0]), type(rec.partitiontable.partitions[1]))
+
+    def testRecordsAreImmutableAndComparable(self):
+        json_rec = read_partition_table(self.fname)
+        rec = disk_record(json_rec)
+        self.assertEqual(rec, disk_record(json_rec))
+        with self.assertRaises(AttributeError):
+            rec.partitiontable = None
+        with self.assertRaises(AttributeError):
+            rec.partitiontable.partitions[0].start = 0
+        self.assertEqual(rec.partitiontable.partitions[0]._asdict()["start"], 2048)
+        self.assertFalse(hasattr(rec.partitiontable.partitions[0], "__dict__"))
+
+    def testUnknownFieldsAreIgnored(self):
+        self.assertIsNone(PartitionRecord(node="/dev/sda1", wibble=1).start)
+
+
+class TestSlottedClasses(unittest.TestCase):
+    def testName(self):
+        self.assertIn("__slots__", Disk.__dict__)
+        self.assertIn("__slots__", DiskPartition.__dict__)
+        self.assertIn("_partitions", Disk.__slots__)
+        self.assertIn("_parentnode", DiskPartition.__slots__)
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    sys.path.append(os.getcwd())
+    unittest.main()
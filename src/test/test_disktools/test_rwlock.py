@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""test_rwlock test module
+
+Created on Oct 17, 2026
+
+@author: Tom Blackshaw
+
+These tests check ReadWriteLock (in my.globals) and the per-disk construction
+locks in threadsafeDisk(). They need no test disk.
+
+Usage:-
+    $ python3 -m unittest test.test_disktools.test_rwlock
+    $ python3 -m unittest test.test_disktools.test_rwlock.TestReadWriteLock
+
+"""
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+from my.globals import ReadWriteLock, read_locked, write_locked
+import my.disktools.disks
+
+
+class Guarded:
+    def __init__(self):
+        self._rwlock = ReadWriteLock()
+        self.concurrent_readers = 0
+        self.most_concurrent_readers = 0
+        self.writing = False
+        self.clashes = 0
+        self._counter_lock = threading.Lock()
+
+    @read_locked
+    def read(self):
+        with self._counter_lock:
+            self.concurrent_readers += 1
+            self.most_concurrent_readers = max(self.most_concurrent_readers, self.concurrent_readers)
+            if self.writing:
+                self.clashes += 1
+        time.sleep(0.05)
+        with self._counter_lock:
+            self.concurrent_readers -= 1
+
+    @write_locked
+    def write(self):
+        with self._counter_lock:
+            if self.writing or self.concurrent_readers:
+                self.clashes += 1
+            self.writing = True
+        time.sleep(0.02)
+        self.read_inside_write()
+        with self._counter_lock:
+            self.writing = False
+
+    @read_locked
+    def read_inside_write(self):
+        pass
+
+
+class TestReadWriteLock(unittest.TestCase):
+    def testReadersShareWritersDoNot(self):
+        g = Guarded()
+        threads = [threading.Thread(target=g.read) for _ in range(8)]
+        threads += [threading.Thread(target=g.write) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertGreater(g.most_concurrent_readers, 1)
+        self.assertEqual(g.clashes, 0)
+
+    def testReentrancy(self):
+        lock = ReadWriteLock()
+        with lock.writing():
+            with lock.writing():
+                with lock.reading():
+                    pass
+        with lock.reading():
+            with lock.reading():
+                with self.assertRaises(RuntimeError):
+                    lock.acquire_write()
+        with lock.writing():
+            pass
+
+    def testReleaseWithoutAcquire(self):
+        lock = ReadWriteLock()
+        with self.assertRaises(RuntimeError):
+            lock.release_read()
+        with self.assertRaises(RuntimeError):
+            lock.release_write()
+
+
+class TestThreadsafeDiskConstruction(unittest.TestCase):
+    def setUp(self):
+        my.disktools.disks._disks_dct.clear()
+
+    def tearDown(self):
+        my.disktools.disks._disks_dct.clear()
+
+    def testDifferentDisksAreBuiltInParallel(self):
+        built = []
+
+        def slow_disk(node):
+            time.sleep(0.3)
+            built.append(node)
+            return mock.Mock(node=node)
+
+        with mock.patch.object(my.disktools.disks, "Disk", side_effect=slow_disk):
+            began = time.perf_counter()
+            results = {}
+            paths = ["/tmp/.fofta.nonesuch.%d" % i for i in range(4)] * 2
+            threads = [
+                threading.Thread(target=lambda i=i, p=p: results.__setitem__(i, my.disktools.disks.threadsafeDisk(p)))
+                for i, p in enumerate(paths)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - began
+        self.assertEqual(sorted(built), sorted(set(paths)))
+        self.assertLess(elapsed, 0.3 * 3)
+        for i in range(4):
+            self.assertIs(results[i], results[i + 4])
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    sys.path.append(os.getcwd())
+    unittest.main()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""test_sfdiskdump test module
+
+Created on Oct 17, 2026
+
+@author: Tom Blackshaw
+
+These tests parse and print `sfdisk -d` dumps, and check that the
+partition-field helpers in my.disktools.partitions share one dump per
+partition table -- without calling sfdisk -- when the disk is an image
+file that the native reader understands. partition_exists() should ask
+sysfs about block devices and the table about image files, and never
+call sfdisk. They need no test disk.
+
+Usage:-
+    $ python3 -m unittest test.test_disktools.test_sfdiskdump
+    $ python3 -m unittest test.test_disktools.test_sfdiskdump.TestSfdiskDumpText
+
+"""
+import os
+import sys
+import unittest
+from unittest import mock
+
+import my.disktools.partitions
+import my.disktools.sfdiskdump
+from my.disktools.partitions import (
+    get_disk_partition_field_value,
+    get_disk_partition_table_line,
+    partition_exists,
+    set_disk_partition_field_value,
+)
+from my.disktools.sfdiskdump import SfdiskDump, sfdisk_dump
+from my.exceptions import PartitionAttributeReadFailureError
+from test.test_disktools.test_parttable import make_dos_image
+
+GPT_DUMP = """label: gpt
+label-id: 8D5F0E5C-4C4B-4E43-9C1B-3F3D0E4C2B1A
+device: /dev/sdq
+unit: sectors
+first-lba: 34
+last-lba: 65502
+sector-size: 512
+
+/dev/sdq1 : start=        2048, size=        8192, type=0FC63DAF-8483-4772-8E79-3D69D8477DE4, uuid=6E8C2A3B-5B5D-4B3A-8C1F-1A2B3C4D5E6F, name="boot, \\"really\\"", attrs="RequiredPartition GUID:60"
+/dev/sdq3 : start=       10240, size=       10240, type=0FC63DAF-8483-4772-8E79-3D69D8477DE4, uuid=0C5B1A2D-3E4F-4A5B-8C6D-7E8F9A0B1C2D
+"""
+
+
+class TestSfdiskDumpText(unittest.TestCase):
+    def testLoads(self):
+        dump = SfdiskDump.loads(GPT_DUMP)
+        self.assertEqual(dump.header["label"], "gpt")
+        self.assertEqual(dump.header["last-lba"], "65502")
+        self.assertEqual(dump.get(1, "start"), 2048)
+        self.assertEqual(dump.get(1, "name"), 'boot, "really"')
+        self.assertEqual(dump.get(1, "attrs"), "RequiredPartition GUID:60")
+        self.assertEqual(dump.get(3, "size"), 10240)
+        self.assertIsNone(dump.get(3, "name"))
+        self.assertIsNone(dump.partition(2))
+        with self.assertRaises(PartitionAttributeReadFailureError):
+            dump.get(2, "start")
+
+    def testRoundTrip(self):
+        dump = SfdiskDump.loads(GPT_DUMP)
+        self.assertEqual(dump.dumps(), GPT_DUMP)
+        self.assertEqual(SfdiskDump.loads(dump.dumps()), dump)
+        self.assertEqual(SfdiskDump.from_table(dump.to_table()), dump)
+
+    def testBootable(self):
+        dump = SfdiskDump.loads("label: dos\n\n/dev/sdq1 : start=2048, size=8192, type=c, bootable\n")
+        self.assertTrue(dump.get(1, "bootable"))
+        self.assertEqual(dump.line(1), "/dev/sdq1 : start=        2048, size=        8192, type=c, bootable")
+        edited = dump.copy()
+        edited.set(1, "bootable", False)
+        edited.set(1, "size", "4096")
+        self.assertIsNone(edited.get(1, "bootable"))
+        self.assertEqual(edited.get(1, "size"), 4096)
+        self.assertTrue(dump.get(1, "bootable"))
+
+
+class TestSharedSfdiskDump(unittest.TestCase):
+    def setUp(self):
+        self.fname = make_dos_image()
+        patcher = mock.patch.object(
+            my.disktools.sfdiskdump, "call_binary", side_effect=AssertionError("sfdisk was called")
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testName(self):
+        dump = sfdisk_dump(self.fname)
+        self.assertIs(sfdisk_dump(self.fname), dump)
+        self.assertEqual(dump.header["label-id"], "0x1234abcd")
+        self.assertTrue(partition_exists(self.fname, 5))
+        self.assertFalse(partition_exists(self.fname, 4))
+        self.assertEqual(get_disk_partition_field_value(self.fname, 2, 0), "10240")
+        self.assertEqual(get_disk_partition_field_value(self.fname, 6, 2), "82")
+        self.assertTrue(get_disk_partition_table_line(self.fname, 1).endswith("type=c, bootable"))
+        set_disk_partition_field_value(self.fname, 2, 2, "c")
+        self.assertEqual(get_disk_partition_field_value(self.fname, 2, 2), "c")
+        self.assertIsNot(sfdisk_dump(self.fname), dump)
+        self.assertEqual(dump.get(2, "type"), "83")
+        self.assertTrue(sfdisk_dump(self.fname).get(1, "bootable"))
+
+
+class TestPartitionExistsFastPath(unittest.TestCase):
+    def setUp(self):
+        self.fname = make_dos_image()
+        patcher = mock.patch.object(my.disktools.partitions, "call_binary",
+                                    side_effect=AssertionError("sfdisk was called"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testImageFilesAskTheTable(self):
+        self.assertTrue(partition_exists(self.fname, 5))
+        self.assertFalse(partition_exists(self.fname, 4))
+
+    def testBlockDevicesAskSysfs(self):
+        with mock.patch.object(my.disktools.partitions, "sfdisk_dump") as dump:
+            with mock.patch.object(my.disktools.partitions, "sysfs_has_partition", return_value=True):
+                self.assertTrue(partition_exists(self.fname, 4))  # The table isn't the kernel's
+            with mock.patch.object(my.disktools.partitions, "sysfs_has_partition", return_value=False):
+                self.assertFalse(partition_exists(self.fname, 5))  # The kernel hasn't caught up yet
+        self.assertFalse(dump.called)
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    sys.path.append(os.getcwd())
+    unittest.main()
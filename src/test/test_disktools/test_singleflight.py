@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""test_singleflight test module
+
+Created on Oct 17, 2026
+
+@author: Tom Blackshaw
+
+These tests check that threads which ask about the same disk at the same
+time share one probe; that they share its exceptions too, but nobody
+remembers those; that a finished probe is shared only for as long as the
+freshness window says; and that a caller who sees a changed partition
+table never gets the old answer. They use hand-made disk images in /tmp,
+and need no test disk.
+
+Usage:-
+    $ python3 -m unittest test.test_disktools.test_singleflight
+    $ python3 -m unittest test.test_disktools.test_singleflight.TestDiskNamedtupleIsCoalesced
+
+"""
+import os
+import sys
+import threading
+import time
+import unittest
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import my.disktools.disks
+from my.disktools.disks import disk_namedtuple, sfdisk_output
+from my.disktools.singleflight import (
+    SingleFlight,
+    coalesced_disk_read,
+    set_single_flight_freshness,
+    single_flight_freshness,
+)
+from my.disktools.transaction import DiskTransaction
+from test.test_disktools.test_parttable import make_dos_image, make_gpt_image
+
+SLOW_CALL = 0.2
+HOW_MANY_THREADS = 8
+
+
+class CountingCall:
+    """A slow function that counts how often it is called."""
+
+    def __init__(self, result=None, error=None, delay=SLOW_CALL):
+        self.calls = 0
+        self.result = result
+        self.error = error
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def call_concurrently(func, how_many=HOW_MANY_THREADS):
+    """Call func() from that many threads at once. Return a list of results (or exceptions)."""
+    barrier = threading.Barrier(how_many)
+
+    def _call():
+        barrier.wait()
+        try:
+            return func()
+        except Exception as e:  # pylint: disable=broad-except
+            return e
+
+    with ThreadPoolExecutor(max_workers=how_many) as pool:
+        return list(pool.map(lambda _: _call(), range(how_many)))
+
+
+class SingleFlightTestCase(unittest.TestCase):
+    def setUp(self):
+        self.original_freshness = single_flight_freshness()
+
+    def tearDown(self):
+        set_single_flight_freshness(self.original_freshness)
+
+
+class TestSingleFlight(SingleFlightTestCase):
+    def testName(self):
+        flights = SingleFlight(freshness=0)
+        func = CountingCall(result=object())
+        results = call_concurrently(lambda: flights.do("key", func))
+        self.assertEqual(func.calls, 1)
+        self.assertTrue(all(r is func.result for r in results))
+
+    def testDifferentKeysDoNotShare(self):
+        flights = SingleFlight(freshness=0)
+        func = CountingCall()
+        counter = iter(range(HOW_MANY_THREADS))
+        call_concurrently(lambda: flights.do(next(counter), func))
+        self.assertEqual(func.calls, HOW_MANY_THREADS)
+
+    def testErrorsAreSharedButNotRemembered(self):
+        flights = SingleFlight(freshness=60)
+        func = CountingCall(error=OSError("no such disk"))
+        results = call_concurrently(lambda: flights.do("key", func))
+        self.assertEqual(func.calls, 1)
+        self.assertTrue(all(r is func.error for r in results))
+        func.error = None
+        func.result = "ok"
+        self.assertEqual(flights.do("key", func), "ok")
+        self.assertEqual(func.calls, 2)
+
+    def testFreshness(self):
+        func = CountingCall(result="ok", delay=0)
+        flights = SingleFlight(freshness=0)
+        flights.do("key", func)
+        flights.do("key", func)
+        self.assertEqual(func.calls, 2)
+        flights = SingleFlight(freshness=60)
+        flights.do("key", func)
+        flights.do("key", func)
+        self.assertEqual(func.calls, 3)
+        flights.forget()
+        flights.do("key", func)
+        self.assertEqual(func.calls, 4)
+        flights = SingleFlight(freshness=0.05)
+        flights.do("key", func)
+        time.sleep(0.1)
+        flights.do("key", func)
+        self.assertEqual(func.calls, 6)
+
+    def testModuleWideFreshness(self):
+        set_single_flight_freshness(60)
+        self.assertEqual(SingleFlight().freshness, 60)
+        self.assertEqual(SingleFlight(freshness=1).freshness, 1)
+        with self.assertRaises(ValueError):
+            set_single_flight_freshness(-1)
+        self.assertEqual(single_flight_freshness(), 60)
+
+
+class TestCoalescedDiskRead(SingleFlightTestCase):
+    def setUp(self):
+        super().setUp()
+        set_single_flight_freshness(60)
+        self.fname = make_gpt_image([], str(uuid.uuid4()).upper())
+
+    def tearDown(self):
+        os.unlink(self.fname)
+        super().tearDown()
+
+    def testName(self):
+        func = CountingCall(result="ok", delay=0)
+        coalesced_disk_read("test", self.fname, func)
+        coalesced_disk_read("test", self.fname, func)
+        self.assertEqual(func.calls, 1)
+        coalesced_disk_read("something else", self.fname, func)
+        self.assertEqual(func.calls, 2)
+
+    def testChangedTableStartsANewRead(self):
+        func = CountingCall(result="ok", delay=0)
+        coalesced_disk_read("test", self.fname, func)
+        txn = DiskTransaction(disk_namedtuple(self.fname), sfdisk_output(self.fname))
+        txn.add_partition(partno=1, size_in_MiB=1)
+        self.assertTrue(txn.write_natively())
+        coalesced_disk_read("test", self.fname, func)
+        self.assertEqual(func.calls, 2)
+        self.assertEqual(len(disk_namedtuple(self.fname).partitiontable.partitions), 1)
+
+
+class TestDiskNamedtupleIsCoalesced(SingleFlightTestCase):
+    def setUp(self):
+        super().setUp()
+        set_single_flight_freshness(0)
+        self.fname = make_dos_image()
+        self.calls = 0
+        self.real_sfdisk_output = my.disktools.disks._sfdisk_output
+
+    def tearDown(self):
+        os.unlink(self.fname)
+        super().tearDown()
+
+    def _slow_sfdisk_output(self, disk_path):
+        self.calls += 1
+        time.sleep(SLOW_CALL)
+        return self.real_sfdisk_output(disk_path)
+
+    def testName(self):
+        with mock.patch.object(my.disktools.disks, "_sfdisk_output", side_effect=self._slow_sfdisk_output):
+            results = call_concurrently(lambda: disk_namedtuple(self.fname))
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(len(results[0].partitiontable.partitions), 5)
+
+    def testSfdiskOutputIsCopied(self):
+        with mock.patch.object(my.disktools.disks, "_sfdisk_output", side_effect=self._slow_sfdisk_output):
+            results = call_concurrently(lambda: sfdisk_output(self.fname))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len({id(r) for r in results}), HOW_MANY_THREADS)
+        del results[0]["partitiontable"]["label"]
+        self.assertIn("label", results[1]["partitiontable"])
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    sys.path.append(os.getcwd())
+    unittest.main()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""test_sysfs_topology test module
+
+Created on Oct 17, 2026
+
+@author: Tom Blackshaw
+
+These tests point my.disktools.sysfs at a fake /sys/class/block tree, in
+/tmp, and check the parent/partition#/sibling lookups.
+
+Usage:-
+    $ python3 -m unittest test.test_disktools.test_sysfs_topology
+    $ python3 -m unittest test.test_disktools.test_sysfs_topology.TestSysfsTopology
+
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import my.disktools.sysfs
+from my.disktools.sysfs import (
+    block_topology,
+    sysfs_has_partition,
+    sysfs_parentnode,
+    sysfs_partitions,
+    sysfs_partno,
+    sysfs_is_a_disk,
+    sysfs_siblings,
+)
+
+
+def make_fake_sysfs_block_device(tmpdir, name, parent=None, partno=None, size=1024, backing_file=None):
+    devdir = os.path.join(tmpdir, "devices", "block")
+    if parent is not None:
+        devdir = os.path.join(devdir, parent)
+    devdir = os.path.join(devdir, name)
+    os.makedirs(devdir)
+    attributes = {"dev": "259:%d" % len(os.listdir(os.path.join(tmpdir, "class", "block"))),
+                  "size": "%d" % size, "ro": "0", "removable": "1"}
+    if partno is not None:
+        attributes["partition"] = "%d" % partno
+    if backing_file is not None:
+        os.makedirs(os.path.join(devdir, "loop"))
+        attributes["loop/backing_file"] = backing_file
+    for attr, value in attributes.items():
+        with open(os.path.join(devdir, attr), "w", encoding="utf-8") as f:
+            f.write("%s\n" % value)
+    os.symlink(devdir, os.path.join(tmpdir, "class", "block", name))
+
+
+class TestSysfsTopology(unittest.TestCase):
+    def setUp(self):
+        self.old_root = my.disktools.sysfs._SYSFS_CLASS_BLOCK
+        self.tmpdir = tempfile.mkdtemp(prefix=".fofta.test.")
+        os.makedirs(os.path.join(self.tmpdir, "class", "block"))
+        my.disktools.sysfs._SYSFS_CLASS_BLOCK = os.path.join(self.tmpdir, "class", "block")
+        make_fake_sysfs_block_device(self.tmpdir, "mmcblk0")
+        for partno in (2, 1, 10):
+            make_fake_sysfs_block_device(self.tmpdir, "mmcblk0p%d" % partno, "mmcblk0", partno)
+        make_fake_sysfs_block_device(self.tmpdir, "loop5", size=0)
+
+    def tearDown(self):
+        my.disktools.sysfs._SYSFS_CLASS_BLOCK = self.old_root
+        shutil.rmtree(self.tmpdir)
+
+    def testName(self):
+        self.assertEqual(sysfs_parentnode("/dev/mmcblk0p2"), "/dev/mmcblk0")
+        self.assertIsNone(sysfs_parentnode("/dev/mmcblk0"))
+        self.assertIsNone(sysfs_parentnode("/dev/sdq1"))
+        self.assertIsNone(sysfs_parentnode("/tmp/foo.img1"))
+        self.assertEqual(sysfs_partno("/dev/mmcblk0p10"), 10)
+        self.assertIsNone(sysfs_partno("/dev/loop5"))
+        self.assertEqual(
+            sysfs_partitions("/dev/mmcblk0"),
+            ["/dev/mmcblk0p1", "/dev/mmcblk0p2", "/dev/mmcblk0p10"],
+        )
+        self.assertEqual(sysfs_partitions("/dev/loop5"), [])
+        self.assertEqual(sysfs_siblings("/dev/mmcblk0p2"), ["/dev/mmcblk0p1", "/dev/mmcblk0p10"])
+        self.assertEqual(sysfs_siblings("/dev/loop5"), [])
+
+    def testHasPartition(self):
+        self.assertTrue(sysfs_has_partition("/dev/mmcblk0", 2))
+        self.assertFalse(sysfs_has_partition("/dev/mmcblk0", 3))
+        self.assertFalse(sysfs_has_partition("/dev/loop5", 1))
+        self.assertIsNone(sysfs_has_partition("/dev/sdq", 1))
+        self.assertIsNone(sysfs_has_partition("/tmp/foo.img", 1))
+
+    def testStaleTopologyIsRebuilt(self):
+        before = block_topology()
+        self.assertIs(before, block_topology())
+        make_fake_sysfs_block_device(self.tmpdir, "loop5p1", "loop5", 1)
+        self.assertIsNot(before, block_topology())
+        self.assertEqual(sysfs_parentnode("/dev/loop5p1"), "/dev/loop5")
+
+
+class TestSysfsIsADisk(unittest.TestCase):
+    def setUp(self):
+        self.old_root = my.disktools.sysfs._SYSFS_CLASS_BLOCK
+        self.tmpdir = tempfile.mkdtemp(prefix=".fofta.test.")
+        os.makedirs(os.path.join(self.tmpdir, "class", "block"))
+        my.disktools.sysfs._SYSFS_CLASS_BLOCK = os.path.join(self.tmpdir, "class", "block")
+        make_fake_sysfs_block_device(self.tmpdir, "sdq")
+        make_fake_sysfs_block_device(self.tmpdir, "sdq1", "sdq", 1)
+        make_fake_sysfs_block_device(self.tmpdir, "zram0")
+        make_fake_sysfs_block_device(self.tmpdir, "loop40", size=0)
+        make_fake_sysfs_block_device(self.tmpdir, "loop41", backing_file="/root/foo.img")
+        make_fake_sysfs_block_device(self.tmpdir, "loop41p1", "loop41", 1)
+        make_fake_sysfs_block_device(self.tmpdir, "nvme9n1")
+
+    def tearDown(self):
+        my.disktools.sysfs._SYSFS_CLASS_BLOCK = self.old_root
+        my.disktools.sysfs._is_a_disk_memo.clear()
+        shutil.rmtree(self.tmpdir)
+
+    def testName(self):
+        self.assertTrue(sysfs_is_a_disk("/dev/sdq"))
+        self.assertFalse(sysfs_is_a_disk("/dev/sdq1"))
+        self.assertFalse(sysfs_is_a_disk("/dev/zram0"))
+        self.assertFalse(sysfs_is_a_disk("/dev/loop40"))
+        self.assertTrue(sysfs_is_a_disk("/dev/loop41"))
+        self.assertFalse(sysfs_is_a_disk("/dev/loop41p1"))
+        self.assertFalse(sysfs_is_a_disk("/dev/nvme9n1"))
+        self.assertIsNone(sysfs_is_a_disk("/dev/sdz"))
+        self.assertIsNone(sysfs_is_a_disk("/tmp/foo.img"))
+
+    def testMemo(self):
+        self.assertTrue(sysfs_is_a_disk("/dev/loop41"))
+        self.assertIn("loop41", my.disktools.sysfs._is_a_disk_memo)
+        self.assertNotIn("nvme9n1", my.disktools.sysfs._is_a_disk_memo)
+        with open(os.path.join(self.tmpdir, "devices", "block", "loop41", "loop", "backing_file"),
+                  "w", encoding="utf-8") as f:
+            f.write("/root/bar.img\n")
+        os.unlink(os.path.join(self.tmpdir, "class", "block", "loop41p1"))
+        self.assertFalse(sysfs_is_a_disk("/dev/loop41"))
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    sys.path.append(os.getcwd())
+    unittest.main()
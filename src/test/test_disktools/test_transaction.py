@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""test_transaction test module
+
+Created on Oct 17, 2026
+
+@author: Tom Blackshaw
+
+These tests check that a DiskTransaction fills in the blanks, refuses bad
+changes, and renders the result as an sfdisk script; and that fstype
+aliases such as "L" and "20" mean the same thing however the partition is
+added. They use hand-made disk images in /tmp. The test that actually
+writes the new table needs sfdisk and partprobe; it skips itself if they
+are missing.
+
+Usage:-
+    $ python3 -m unittest test.test_disktools.test_transaction
+    $ python3 -m unittest test.test_disktools.test_transaction.TestDiskTransaction
+
+"""
+import os
+import shutil
+import sys
+import unittest
+import uuid
+from unittest import mock
+
+from my.disktools.disks import disk_namedtuple, sfdisk_output
+from my.disktools.layout import CREATE, DELETE, RENAME, RESIZE, RETYPE, REST, LayoutEntry, PartitionSpec
+from my.disktools.partitions import add_partition_SUB
+from my.disktools.transaction import DiskTransaction, normalized_fstype
+from my.exceptions import (
+    ExistentPriorPartitionError,
+    MissingPriorPartitionError,
+    PartitionDeletionError,
+    PartitionsOverlapError,
+    StartEndAssBackwardsError,
+    WeNeedAnExtendedPartitionError,
+)
+from test.test_disktools.test_parttable import (
+    LINUX_FS_GUID,
+    MY_IMGSIZE_IN_SECTORS,
+    make_blank_image,
+    make_dos_image,
+    make_gpt_image,
+    mbr_entry,
+    write_sector,
+)
+
+
+class TestDiskTransaction(unittest.TestCase):
+    def setUp(self):
+        self.fname = make_dos_image()
+        self.txn = DiskTransaction(disk_namedtuple(self.fname), sfdisk_output(self.fname))
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testName(self):
+        self.assertFalse(self.txn.changed)
+        self.assertEqual(self.txn.add_partition(partno=7), LayoutEntry(7, 49152, 61439, "83"))
+        self.assertEqual(self.txn.add_partition(partno=4, size_in_MiB=1), LayoutEntry(4, 61440, 63487, "83"))
+        self.assertTrue(self.txn.changed)
+        self.txn.validate()
+
+    def testRefusals(self):
+        with self.assertRaises(ExistentPriorPartitionError):
+            self.txn.add_partition(partno=2)
+        with self.assertRaises(MissingPriorPartitionError):
+            self.txn.add_partition(partno=8)
+        with self.assertRaises(PartitionsOverlapError):
+            self.txn.add_partition(partno=4, start=18000, end=19000)
+        with self.assertRaises(StartEndAssBackwardsError):
+            self.txn.add_partition(partno=4, start=63000, end=62000)
+        with self.assertRaises(ValueError):
+            self.txn.add_partition(partno=4, start=63000, end=MY_IMGSIZE_IN_SECTORS)
+        with self.assertRaises(PartitionDeletionError):
+            self.txn.delete_partition(5)
+        self.assertFalse(self.txn.changed)
+
+    def testDeletingTheExtendedPartitionDeletesTheLogicals(self):
+        self.txn.delete_partition(3)
+        self.assertEqual([e.partno for e in self.txn.layout.partitions], [1, 2])
+        with self.assertRaises(WeNeedAnExtendedPartitionError):
+            self.txn.add_partition(partno=5)
+
+    def testScript(self):
+        self.txn.delete_partition(6)
+        self.txn.set_fstype(2, "82")
+        script = self.txn.sfdisk_script()
+        self.assertTrue(script.startswith("label: dos\nlabel-id: 0x1234abcd\ndevice: %s\nunit: sectors\n\n" % self.fname))
+        lines = script.strip().split("\n")[5:]
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(lines[0], "%s1 : start=        2048, size=        8192, type=c, bootable" % self.fname)
+        self.assertTrue(lines[1].endswith("type=82"))
+
+    def testStartingFromScratch(self):
+        self.txn.delete_all_partitions()
+        self.assertEqual(self.txn.add_partition(partno=1, start=8192, size_in_MiB=16), LayoutEntry(1, 8192, 40959, "83"))
+        self.assertEqual(self.txn.add_partition(partno=2), LayoutEntry(2, 40960, MY_IMGSIZE_IN_SECTORS - 1, "83"))
+
+
+class TestGptTransaction(unittest.TestCase):
+    def testName(self):
+        part_guid = str(uuid.uuid4()).upper()
+        fname = make_gpt_image([(0, LINUX_FS_GUID, part_guid, 2048, 10239, 0, "boot")], str(uuid.uuid4()).upper())
+        try:
+            txn = DiskTransaction(disk_namedtuple(fname), sfdisk_output(fname))
+            self.assertEqual(txn.add_partition(), LayoutEntry(2, 10240, MY_IMGSIZE_IN_SECTORS - 34, LINUX_FS_GUID))
+            script = txn.sfdisk_script()
+            self.assertIn("first-lba: 34\nlast-lba: %d\n" % (MY_IMGSIZE_IN_SECTORS - 34), script)
+            self.assertIn('uuid=%s, name="boot"' % part_guid, script)
+        finally:
+            os.unlink(fname)
+
+    def testGrownImage(self):
+        fname = make_gpt_image([(0, LINUX_FS_GUID, str(uuid.uuid4()), 2048, 10239, 0, ""),
+                                (1, LINUX_FS_GUID, str(uuid.uuid4()), 10240, 20479, 0, "")], str(uuid.uuid4()))
+        try:
+            os.truncate(fname, 2 * MY_IMGSIZE_IN_SECTORS * 512)
+            txn = DiskTransaction(disk_namedtuple(fname), sfdisk_output(fname))
+            txn.resize_partition(2, 2 * MY_IMGSIZE_IN_SECTORS - 100)
+            txn.add_partition(partno=3, start=2 * MY_IMGSIZE_IN_SECTORS - 99)
+            self.assertEqual(txn.layout.partitions[-1].end, 2 * MY_IMGSIZE_IN_SECTORS - 34)
+            self.assertTrue(txn.write_natively())
+            self.assertEqual(sfdisk_output(fname)["partitiontable"]["lastlba"], 2 * MY_IMGSIZE_IN_SECTORS - 34)
+        finally:
+            os.unlink(fname)
+
+    def testAliasesAreWrittenNatively(self):
+        fname = make_gpt_image([], str(uuid.uuid4()).upper())
+        try:
+            with mock.patch("os.system", side_effect=AssertionError("I should not need fdisk")):
+                add_partition_SUB(fname, 1, 2048, 10239, "20")
+                add_partition_SUB(fname, 2, 10240, 20479, "S")
+                with self.assertRaises(ValueError):
+                    add_partition_SUB(fname, 3, 20480, 30719, "bogus")
+            types = [p["type"] for p in sfdisk_output(fname)["partitiontable"]["partitions"]]
+            self.assertEqual(types, [LINUX_FS_GUID, "0657FD6D-A4AB-43C4-84E5-0933C84B4F4F"])
+        finally:
+            os.unlink(fname)
+
+
+class TestAddLogicalPartitionBySize(unittest.TestCase):
+    def setUp(self):
+        self.fname = make_blank_image()
+        write_sector(self.fname, 0, [mbr_entry(0, 0x83, 2048, 8192), mbr_entry(0, 0x05, 10240, 40960)])
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testName(self):
+        from my.disktools.disks import Disk
+
+        d = Disk(self.fname)
+        d.add_partition(partno=5, size_in_MiB=10)
+        d.add_partition(partno=6, start=34816, size_in_MiB=4)
+        self.assertEqual([(p.partno, p.start, p.size) for p in d.partitions],
+                         [(1, 2048, 8192), (2, 10240, 40960), (5, 12288, 20480), (6, 34816, 8192)])
+
+
+class TestNormalizedFstype(unittest.TestCase):
+    def testName(self):
+        self.assertEqual(normalized_fstype("83", "dos"), "83")
+        self.assertEqual(normalized_fstype("0x0C", "dos"), "c")
+        self.assertEqual(normalized_fstype("L", "dos"), "83")
+        self.assertEqual(normalized_fstype("Ex", "dos"), "5")
+        self.assertEqual(normalized_fstype("20", "gpt"), LINUX_FS_GUID)
+        self.assertEqual(normalized_fstype("L", "gpt"), LINUX_FS_GUID)
+        self.assertEqual(normalized_fstype("83", "gpt"), LINUX_FS_GUID)
+        self.assertEqual(normalized_fstype(LINUX_FS_GUID.lower(), "gpt"), LINUX_FS_GUID)
+
+    def testRefusals(self):
+        for fstype, partitiontable_type in (("0", "dos"), ("100", "dos"), ("H", "dos"), (LINUX_FS_GUID, "dos"),
+                                            ("5", "gpt"), ("c", "gpt"), ("bogus", "gpt")):
+            with self.assertRaises(ValueError):
+                normalized_fstype(fstype, partitiontable_type)
+
+    def testTransactionsNormalize(self):
+        fname = make_dos_image()
+        try:
+            txn = DiskTransaction(disk_namedtuple(fname), sfdisk_output(fname))
+            self.assertEqual(txn.add_partition(partno=4, fstype="L").fstype, "83")
+            txn.set_fstype(2, "0x82")
+            self.assertEqual(txn.layout.partitions[1].fstype, "82")
+            with self.assertRaises(ValueError):
+                txn.set_fstype(2, "bogus")
+        finally:
+            os.unlink(fname)
+
+
+class TestApplyLayout(unittest.TestCase):
+    def setUp(self):
+        self.fname = make_dos_image()
+        self.txn = DiskTransaction(disk_namedtuple(self.fname), sfdisk_output(self.fname))
+        self.specs = [
+            PartitionSpec(partno=1, start=2048, size=8192, fstype="c"),
+            PartitionSpec(partno=2, start=10240, size=8192),
+            PartitionSpec(partno=3, size=40960, fstype="5", align=4096),
+            PartitionSpec(partno=5, start=22528, size=4096),
+            PartitionSpec(partno=6, start=43008, size=4096, fstype="82"),
+        ]
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testAlreadyMatches(self):
+        self.assertEqual(self.txn.apply_layout(self.specs), [])
+        self.assertFalse(self.txn.changed)
+
+    def testName(self):
+        self.specs[1] = PartitionSpec(partno=2, start=10240, size=4096, fstype="82")
+        self.specs[2] = PartitionSpec(partno=3, start=20480, size=40960, fstype="5")
+        self.specs[4] = PartitionSpec(partno=6, start=43008, size=REST, fstype="82")
+        self.specs.append(PartitionSpec(partno=4, fstype="83"))
+        changes = self.txn.apply_layout(self.specs)
+        self.assertEqual(
+            [(c.op, c.partno) for c in changes],
+            [(RESIZE, 2), (RESIZE, 6), (RETYPE, 2), (CREATE, 4)],
+        )
+        self.assertEqual(self.txn.layout.partitions[1], LayoutEntry(2, 10240, 14335, "82"))
+        self.assertEqual(self.txn.layout.partitions[3], LayoutEntry(4, 61440, MY_IMGSIZE_IN_SECTORS - 1, "83"))
+        self.assertEqual(self.txn.layout.partitions[-1], LayoutEntry(6, 43008, 61439, "82"))
+        self.assertTrue(self.txn.table()["partitiontable"]["partitions"][0]["bootable"])
+        self.txn.validate()
+        self.assertEqual(self.txn.apply_layout(self.specs), [])
+
+    def testUnspecifiedFstypeIsKept(self):
+        self.assertEqual(self.txn.layout.partitions[0].fstype, "c")
+        changes = self.txn.apply_layout([PartitionSpec(partno=1, start=2048, size=16384)])
+        self.assertNotIn(RETYPE, [c.op for c in changes])
+        self.assertEqual(self.txn.layout.partitions[0], LayoutEntry(1, 2048, 18431, "c"))
+
+    def testGptKeepsPartuuidsAndNames(self):
+        part_guid = str(uuid.uuid4()).upper()
+        fname = make_gpt_image([(0, LINUX_FS_GUID, part_guid, 2048, 10239, 0, "boot")], str(uuid.uuid4()))
+        try:
+            txn = DiskTransaction(disk_namedtuple(fname), sfdisk_output(fname))
+            changes = txn.apply_layout([PartitionSpec(partno=1, start=2048, size=16384),
+                                        PartitionSpec(partno=2, name="root")])
+            self.assertEqual([(c.op, c.partno) for c in changes], [(RESIZE, 1), (CREATE, 2), (RENAME, 2)])
+            p1, p2 = txn.table()["partitiontable"]["partitions"]
+            self.assertEqual((p1["uuid"], p1["name"], p1["start"] + p1["size"]), (part_guid, "boot", 18432))
+            self.assertEqual((p2["start"], p2["name"]), (18432, "root"))
+            changes = txn.apply_layout([PartitionSpec(partno=1, start=4096)])
+            self.assertEqual([(c.op, c.partno) for c in changes], [(DELETE, 2), (DELETE, 1), (CREATE, 1)])
+        finally:
+            os.unlink(fname)
+
+
+@unittest.skipIf(shutil.which("sfdisk") is None or shutil.which("partprobe") is None, "sfdisk/partprobe missing")
+class TestDiskTransactionWrites(unittest.TestCase):
+    def setUp(self):
+        self.fname = make_blank_image()
+        write_sector(self.fname, 0, [])
+
+    def tearDown(self):
+        os.unlink(self.fname)
+
+    def testName(self):
+        from my.disktools.disks import Disk
+
+        d = Disk(self.fname)
+        with d.transaction() as txn:
+            txn.add_partition(partno=1, start=2048, size_in_MiB=8)
+            txn.add_partition(partno=2)
+        self.assertEqual([(p.partno, p.start) for p in d.partitions], [(1, 2048), (2, 18432)])
+        self.assertEqual(d.apply_layout([PartitionSpec(partno=1, start=2048, size=16384),
+                                         PartitionSpec(partno=2, size=REST)]), [])
+        with self.assertRaises(RuntimeError):
+            with d.transaction() as txn:
+                txn.delete_all_partitions()
+                raise RuntimeError("Changed my mind")
+        self.assertEqual(len(d.partitions), 2)
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    sys.path.append(os.getcwd())
+    unittest.main()